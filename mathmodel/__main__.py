@@ -0,0 +1,51 @@
+from runpy import run_module
+from sys import argv, exit, stderr
+from typing import List
+
+# Команди лаунчера: назва -> (модуль пакета, короткий опис). Модулі
+# імпортуються лише під час запуску відповідної команди, тож виклик
+# python -m mathmodel -h не тягне за собою жодних сторонніх бібліотек.
+commands = {
+    'gis': ('mathmodel.gis', 'interactive GIS of Dnipropetrovska oblast\''),
+    'spherical': ('mathmodel.spherical', 'GIS layers projected on a sphere'),
+    'fractals': ('mathmodel.fractals', 'discrete fractal visualizations'),
+    'explorer': ('mathmodel.explorer', 'tiled fractal explorer server'),
+    'animations': ('mathmodel.animations', 'animated Julia set'),
+    'spatial': ('mathmodel.spatial', 'spatial graphs of an image contour'),
+    'extrusion': ('mathmodel.extrusion', 'extrusion of every image contour'),
+    'synergy': ('mathmodel.synergy', 'attractor visualizations'),
+    'gradient': ('mathmodel.gradient', 'gradient descent over a surface'),
+    'statistics': ('mathmodel.statistics', 'descriptive statistics of two samples'),
+    'taxonometry': ('mathmodel.taxonometry', 'taxonometric method charts'),
+    'scoring': ('mathmodel.scoring', 'taxonometric ranking of large tables'),
+    'summation': ('mathmodel.summation', 'sum of squares strategies'),
+    'optimization': ('mathmodel.optimization', 'GeoJSON layer simplification'),
+    'export': ('mathmodel.export', 'batch export of GIS and globe maps'),
+    'tiles': ('mathmodel.tiles', 'vector tiles of GIS layers and tile server'),
+    'routing': ('mathmodel.routing', 'travel times and routes over the roads layer'),
+    'lookup': ('mathmodel.lookup', 'bulk point-in-region lookup'),
+    'benchmarks': ('mathmodel.benchmarks', 'performance benchmarks')
+}
+
+
+def main(arguments: List[str]) -> int:
+    """
+    Виконує обрану команду так, ніби її модуль запущено через python -m:
+    решта аргументів передається модулю без змін.
+    """
+    if not arguments or arguments[0] in {'-h', '--help'}:
+        print('usage: python -m mathmodel <command> [arguments]\n\ncommands:')
+        for name, (_, description) in commands.items():
+            print(f'  {name:<14}{description}')
+        return 0
+    if arguments[0] not in commands:
+        print(f'There\'re no commands with such a name: {arguments[0]}', file=stderr)
+        return 2
+    module = commands[arguments[0]][0]
+    argv[:] = [argv[0]] + arguments[1:]
+    run_module(module, run_name='__main__', alter_sys=True)
+    return 0
+
+
+if __name__ == '__main__':
+    exit(main(argv[1:]))
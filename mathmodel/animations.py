@@ -1,17 +1,143 @@
-from typing import Tuple
-from PIL.Image import fromarray, Image
+from typing import Any, Dict, List, Optional, Tuple
+from PIL.Image import fromarray, open as read, Image
 from numpy import linspace, pi, uint8
 from cmath import exp
+from argparse import ArgumentParser, ArgumentTypeError
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 from multiprocessing import Pool, cpu_count
+from os import getpid, replace
+from pathlib import Path
+from subprocess import run, DEVNULL
+from json import loads, dumps
+from sys import executable, exit, stderr
+from mathmodel.profiling import Traced, absorb, enable, timed, stage, count
+
+# Кількість кадрів повного оберту параметра c.
+frames = 250
+_frames_dir = Path(__file__).parent.parent / 'images/frames'
 
 
 def main():
-    pool = Pool(cpu_count())
-    pairs = pool.map(draw, enumerate(linspace(0, 2 * pi, 250)))
-    pool.close()
+    with stage('animations.pool'):
+        pool = Pool(cpu_count())
+        pairs = [
+            absorb(p)
+            for p in pool.map(Traced(draw), enumerate(linspace(0, 2 * pi, frames)))
+        ]
+        pool.close()
+    count('animations.frames', len(pairs))
     images = [p[1] for p in sorted(pairs, key=lambda p: p[0])]
+    with stage('animations.save'):
+        save(images, 'images/julia.gif')
+
+
+def render(
+    directory: Path = _frames_dir,
+    index: int = 0,
+    total: int = 1,
+    size: int = 200,
+    processes: Optional[int] = None
+) -> List[int]:
+    """
+    Рендерить шард index із total: кадри index, index + total, index + 2 *
+    total тощо, тож шарди рівномірно діляться роботою, а набір кадрів
+    кожного однаково визначений на будь-якій машині. Кадри пишуться у
+    спільну директорію як frame-NNNNN.png через тимчасовий файл з атомарним
+    перейменуванням, тож обірваний рендер не лишає пошкоджених кадрів, а
+    вже готові кадри при повторному запуску шарду пропускаються. Параметри
+    рендеру записуються в manifest.json директорії, і шард з іншими
+    параметрами відмовляється писати в неї, тож кадри різних запусків не
+    змішуються. Повертає номери відрендерених кадрів.
+    """
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    _claim(directory, {'frames': frames, 'size': size})
+    angles = linspace(0, 2 * pi, frames)
+    pending = [
+        (i, angles[i])
+        for i in shard(index, total)
+        if not _frame(directory, i).exists()
+    ]
+    with stage('animations.render'):
+        with Pool(processes or cpu_count()) as pool:
+            for pair in pool.imap_unordered(Traced(partial(draw, size=size)), pending):
+                i, image = absorb(pair)
+                path = _frame(directory, i)
+                temporary = path.with_suffix('.tmp')
+                image.save(temporary, format='PNG')
+                replace(temporary, path)
+    count('animations.frames', len(pending))
+    return [i for i, _ in pending]
+
+
+def merge(directory: Path = _frames_dir, path: str = 'images/julia.gif'):
+    """
+    Збирає кадри зі спільної директорії в анімацію (GIF чи WebP - за
+    розширенням) у порядку номерів. Якщо якихось кадрів бракує, анімація не
+    записується, а помилка перелічує номери відсутніх кадрів.
+    """
+    directory = Path(directory)
+    manifest = _manifest(directory)
+    if manifest is None or manifest['frames'] != frames:
+        raise ValueError(f'There\'re no frames of {frames}-frame renders in {directory}')
+    missing = [i for i in range(frames) if not _frame(directory, i).exists()]
+    if missing:
+        raise FileNotFoundError(f'There\'re {len(missing)} missing frames: {missing[:10]}')
+    with stage('animations.save'):
+        save([read(_frame(directory, i)) for i in range(frames)], path)
+
+
+def queue(
+    directory: Path = _frames_dir,
+    total: int = 8,
+    size: int = 200,
+    workers: Optional[int] = None,
+    attempts: int = 3
+) -> List[int]:
+    """
+    Локальна заміна планувальника рендер-ферми: кожен шард запускається
+    окремим процесом python -m mathmodel.animations render --shard i/n з
+    одним процесом рендеру, не більше workers одночасно. Шард, що
+    завершився з помилкою, перезапускається до attempts разів; завдяки
+    пропуску готових кадрів повтор дорендерює лише те, чого бракує.
+    Повертає номери шардів, що так і не завершились успішно.
+    """
+    def execute(index: int) -> Optional[int]:
+        for _ in range(attempts):
+            result = run(
+                [
+                    executable, '-m', 'mathmodel.animations', 'render',
+                    '--shard', f'{index}/{total}',
+                    '-d', str(directory),
+                    '-s', str(size),
+                    '-p', '1'
+                ],
+                stdout=DEVNULL
+            )
+            if result.returncode == 0:
+                return None
+            count('animations.retries')
+        return index
+
+    # Несумісні параметри виявляються до запуску шардів, а не в кожній спробі.
+    Path(directory).mkdir(parents=True, exist_ok=True)
+    _claim(Path(directory), {'frames': frames, 'size': size})
+    with stage('animations.queue'):
+        with ThreadPoolExecutor(workers or cpu_count()) as pool:
+            return [i for i in pool.map(execute, range(total)) if i is not None]
+
+
+def shard(index: int, total: int) -> range:
+    """
+    Номери кадрів шарду index із total.
+    """
+    return range(index, frames, total)
+
+
+def save(images: List[Image], path: str):
     images[0].save(
-        'images/julia.gif',
+        path,
         save_all=True,
         append_images=images[1:],
         optimize=True,
@@ -20,14 +146,15 @@ def main():
     )
 
 
-def draw(ia: Tuple[int, float]) -> Tuple[int, Image]:
+@timed('animations.draw')
+def draw(ia: Tuple[int, float], size: int = 200) -> Tuple[int, Image]:
     return (
         ia[0],
         fromarray(
             uint8(
                 [
-                    [paint(x, y, ia[1]) for x in linspace(3.5, -3.5, 200)]
-                    for y in linspace(3.5, -3.5, 200)
+                    [paint(x, y, ia[1]) for x in linspace(3.5, -3.5, size)]
+                    for y in linspace(3.5, -3.5, size)
                 ]
             )
         )
@@ -43,5 +170,82 @@ def paint(x: float, y: float, a: float) -> float:
     return n / stop * 255
 
 
+def _frame(directory: Path, index: int) -> Path:
+    return directory / f'frame-{index:05d}.png'
+
+
+def _manifest(directory: Path) -> Optional[Dict[str, Any]]:
+    path = directory / 'manifest.json'
+    return loads(path.read_text()) if path.exists() else None
+
+
+def _claim(directory: Path, parameters: Dict[str, Any]):
+    """
+    Записує параметри рендеру в маніфест директорії або перевіряє, що вони
+    збігаються з уже записаними.
+    """
+    manifest = _manifest(directory)
+    if manifest is None:
+        temporary = directory / f'manifest.{getpid()}.tmp'
+        temporary.write_text(dumps(parameters))
+        replace(temporary, directory / 'manifest.json')
+    elif manifest != parameters:
+        raise ValueError(
+            f'Frames in {directory} were rendered with {manifest}, not {parameters}'
+        )
+
+
+def _shard(value: str) -> Tuple[int, int]:
+    """
+    Розбирає аргумент --shard у форматі i/n.
+    """
+    try:
+        index, total = map(int, value.split('/'))
+    except ValueError:
+        raise ArgumentTypeError(f'Shard must look like i/n: {value}')
+    if not 0 <= index < total:
+        raise ArgumentTypeError(f'Shard index is out of range: {value}')
+    return index, total
+
+
 if __name__ == '__main__':
-    main()
+    parser = ArgumentParser(description='Animated Julia set rendering')
+    # Вмикає профілювання; необов'язкове значення - шлях для pstats-файлу.
+    parser.add_argument('--profile', nargs='?', const='', help='profile stages')
+    # Без підкоманди вся анімація рендериться на цій машині одним пулом.
+    commands = parser.add_subparsers(dest='command')
+    rendering = commands.add_parser('render', help='render a shard of frames')
+    # Шард i/n: кадри i, i + n, i + 2n тощо.
+    rendering.add_argument('--shard', type=_shard, default=(0, 1), help='shard i/n')
+    # Кількість процесів рендеру на цій машині.
+    rendering.add_argument('-p', type=int, help='processes count')
+    merging = commands.add_parser('merge', help='assemble frames into an animation')
+    # Шлях до анімації (GIF чи WebP).
+    merging.add_argument('-o', default='images/julia.gif', help='animation path')
+    queueing = commands.add_parser('queue', help='render shards as local jobs and merge')
+    # Кількість шардів, одночасних завдань і спроб кожного шарду.
+    queueing.add_argument('-n', type=int, default=8, help='shards count')
+    queueing.add_argument('-w', type=int, help='concurrent jobs')
+    queueing.add_argument('-a', type=int, default=3, help='attempts per shard')
+    queueing.add_argument('-o', default='images/julia.gif', help='animation path')
+    for subparser in (rendering, merging, queueing):
+        # Спільна директорія кадрів.
+        subparser.add_argument('-d', default=str(_frames_dir), help='frames directory')
+    for subparser in (rendering, queueing):
+        # Сторона кадру в пікселях.
+        subparser.add_argument('-s', type=int, default=200, help='frame size')
+    args = parser.parse_args()
+    if args.profile is not None:
+        enable(args.profile)
+    if args.command == 'render':
+        render(Path(args.d), *args.shard, args.s, args.p)
+    elif args.command == 'merge':
+        merge(Path(args.d), args.o)
+    elif args.command == 'queue':
+        failed = queue(Path(args.d), args.n, args.s, args.w, args.a)
+        if failed:
+            print(f'Failed shards: {", ".join(map(str, failed))}', file=stderr)
+            exit(1)
+        merge(Path(args.d), args.o)
+    else:
+        main()
@@ -0,0 +1,180 @@
+from hashlib import sha1
+from json import JSONDecoder
+from pathlib import Path
+from re import compile
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+from numpy import (
+    ndarray, array, asarray, empty, full, int32, int64, argsort, searchsorted,
+    arange, concatenate, intersect1d, sort, load, savez_compressed
+)
+from mathmodel.caching import LRU
+
+# Фільтр об'єктів: ключ властивості -> множина допустимих значень. Умови
+# різних ключів поєднуються через "і", наприклад
+# {'highway': {'motorway', 'trunk'}, 'oneway': {'yes'}}.
+Filters = Dict[str, Set[str]]
+_cache_dir = Path(__file__).parent.parent / '.cache/attributes'
+_gap = compile(r'[\s,]*')
+_tables = LRU(16)
+
+
+class Table:
+    """
+    Стовпчикова таблиця властивостей об'єктів GeoJSON-шару. Кожна
+    властивість закодована словником: унікальні значення зберігаються один
+    раз, а для об'єктів - лише їх номери (-1, якщо властивості немає). Окрім
+    цього таблиця пам'ятає межі тексту кожного об'єкта у файлі, тож
+    відфільтровані об'єкти можна розібрати, не розбираючи решту. Індекси
+    (об'єкти, впорядковані за кодом значення, й межі груп) будуються лише для
+    ключів, за якими фільтрують.
+    """
+    __slots__ = ['_spans', '_columns', '_codes', '_indexes']
+
+    def __init__(self, spans: ndarray, columns: Dict[str, Tuple[ndarray, List[str]]]):
+        """
+        Конструктор класу. Приймає межі об'єктів у тексті й стовпці у вигляді
+        пар (коди, словник значень).
+        """
+        self._spans = spans
+        self._columns = columns
+        self._codes: Dict[str, Dict[str, int]] = {}
+        self._indexes: Dict[str, Tuple[ndarray, ndarray]] = {}
+
+    @classmethod
+    def load(cls, path: Path) -> 'Table':
+        """
+        Повертає таблицю шару, шукаючи її спершу в пам'яті, потім у
+        npz-файлі поруч із кешем поверхонь, і лише тоді будуючи заново. Ключ
+        кешу - SHA-1 вмісту файлу, тож зміна шару інвалідує таблицю.
+        """
+        content = Path(path).read_bytes()
+        key = sha1(content).hexdigest()
+        table = _tables.get(key)
+        if table is not None:
+            return table
+        sidecar = _cache_dir / f'{key}.npz'
+        if sidecar.exists():
+            with load(sidecar) as archive:
+                table = cls(
+                    archive['spans'],
+                    {
+                        k: (archive[f'codes{i}'], archive[f'values{i}'].tolist())
+                        for i, k in enumerate(archive['keys'].tolist())
+                    }
+                )
+        else:
+            table = cls.build(content.decode('utf-8'))
+            sidecar.parent.mkdir(parents=True, exist_ok=True)
+            keys = list(table._columns)
+            savez_compressed(
+                sidecar,
+                spans=table._spans,
+                keys=array(keys, str),
+                **{
+                    name: data
+                    for i, k in enumerate(keys)
+                    for name, data in (
+                        (f'codes{i}', table._columns[k][0]),
+                        (f'values{i}', array(table._columns[k][1], str))
+                    )
+                }
+            )
+        _tables.put(key, table)
+        return table
+
+    @classmethod
+    def build(cls, content: str) -> 'Table':
+        """
+        Будує таблицю за один прохід тексту колекції: об'єкти масиву features
+        розбираються по черзі через raw_decode, що й дає межі кожного з них.
+        """
+        decoder = JSONDecoder()
+        i = content.index('[', content.index('"features"')) + 1
+        spans, properties = [], []
+        while True:
+            i = _gap.match(content, i).end()
+            if content[i] == ']':
+                break
+            feature, end = decoder.raw_decode(content, i)
+            spans.append((i, end))
+            properties.append(feature.get('properties') or {})
+            i = end
+        columns: Dict[str, Tuple[ndarray, List[str]]] = {}
+        lookups: Dict[str, Dict[str, int]] = {}
+        for n, p in enumerate(properties):
+            for k, v in p.items():
+                if k not in columns:
+                    columns[k], lookups[k] = (full(len(properties), -1, int32), []), {}
+                codes, values = columns[k]
+                v = v if isinstance(v, str) else str(v)
+                if v not in lookups[k]:
+                    lookups[k][v] = len(values)
+                    values.append(v)
+                codes[n] = lookups[k][v]
+        return cls(asarray(spans, int64).reshape(-1, 2), columns)
+
+    def __len__(self) -> int:
+        return len(self._spans)
+
+    @property
+    def spans(self) -> ndarray:
+        return self._spans
+
+    def keys(self) -> List[str]:
+        return list(self._columns)
+
+    def values(self, key: str) -> List[Optional[str]]:
+        """
+        Розкодовує стовпець властивості (None там, де її немає).
+        """
+        codes, values = self._columns[key]
+        return [None if c < 0 else values[c] for c in codes.tolist()]
+
+    def select(self, filters: Filters) -> ndarray:
+        """
+        Номери об'єктів (за зростанням, тобто в порядку файлу), що
+        задовольняють усі умови фільтра. Для кожного ключа номери
+        збираються з груп індексу, які відповідають допустимим значенням,
+        тож робота пропорційна кількості знайдених об'єктів.
+        """
+        selected = arange(len(self))
+        for key, allowed in filters.items():
+            if key not in self._columns:
+                return empty((0,), int64)
+            order, bounds = self._index(key)
+            codes = self._codes[key]
+            groups = [
+                order[bounds[c]:bounds[c + 1]]
+                for c in (codes[v] for v in allowed if v in codes)
+            ]
+            found = sort(concatenate(groups)) if groups else empty((0,), int64)
+            selected = intersect1d(selected, found, assume_unique=True)
+        return selected
+
+    def _index(self, key: str) -> Tuple[ndarray, ndarray]:
+        """
+        Індекс ключа: номери об'єктів, відсортовані за кодом значення, і межі
+        груп з однаковим кодом.
+        """
+        if key not in self._indexes:
+            codes, values = self._columns[key]
+            order = argsort(codes, kind='stable')
+            bounds = searchsorted(codes[order], arange(len(values) + 1))
+            self._indexes[key] = order, bounds
+            self._codes[key] = {v: i for i, v in enumerate(values)}
+        return self._indexes[key]
+
+
+def features(path: Path, filters: Filters) -> List[Dict[str, Any]]:
+    """
+    Розбирає лише ті об'єкти шару, що проходять фільтр.
+    """
+    table = Table.load(path)
+    content = Path(path).read_text(encoding='utf-8')
+    return list(_decode(content, table.spans[table.select(filters)]))
+
+
+def _decode(content: str, spans: ndarray) -> Iterable[Dict[str, Any]]:
+    decoder = JSONDecoder()
+    for start, end in spans.tolist():
+        yield decoder.decode(content[start:end])
@@ -0,0 +1,81 @@
+from argparse import ArgumentParser
+from pathlib import Path
+from statistics import median
+from sys import exit
+from timeit import default_timer
+from typing import Callable, Dict, List
+from tabulate import tabulate
+from mathmodel.benchmarks.history import load, save, record, compare
+from mathmodel.benchmarks.workloads import workloads
+
+
+def measure(
+    run: Callable[[], object],
+    repeat: int,
+    warmup: int = 1
+) -> Dict[str, float]:
+    """
+    Вимірює функцію repeat разів після warmup холостих запусків.
+    """
+    for _ in range(warmup):
+        run()
+    times = []
+    for _ in range(repeat):
+        start = default_timer()
+        run()
+        times.append(default_timer() - start)
+    return {
+        'best': min(times),
+        'median': median(times),
+        'mean': sum(times) / len(times)
+    }
+
+
+def main(
+    names: List[str],
+    repeat: int,
+    path: Path,
+    threshold: float,
+    is_baseline: bool
+) -> int:
+    """
+    Запускає обрані навантаження, порівнює їх із базовою лінією, дописує
+    результати в історію й повертає код виходу 1 за наявності регресій, аби
+    перевірку можна було вбудувати в процес розгортання.
+    """
+    results = {}
+    for name in names:
+        results[name] = measure(workloads[name](), repeat)
+        print(f'{name}: {results[name]["best"]:.6f} s')
+    history = load(path)
+    rows = compare(history, results, threshold)
+    print(
+        tabulate(
+            rows,
+            headers=['workload', 'baseline', 'best', 'ratio', 'regression'],
+            tablefmt='psql'
+        )
+    )
+    save(path, record(history, results, is_baseline))
+    return 1 if any(r[-1] for r in rows) and not is_baseline else 0
+
+
+if __name__ == '__main__':
+    parser = ArgumentParser(description='Performance benchmarks of mathmodel hot paths')
+    # Перелік навантажень, за замовчуванням - усі.
+    parser.add_argument(
+        '-w',
+        nargs='+',
+        default=list(workloads.keys()),
+        help=f'workloads (available ones: {", ".join(workloads.keys())})'
+    )
+    # Кількість вимірювань кожного навантаження.
+    parser.add_argument('-r', type=int, default=5, help='repeats')
+    # Файл історії вимірювань.
+    parser.add_argument('-f', default='benchmarks.json', help='history path')
+    # Допустиме відносне сповільнення відносно базової лінії.
+    parser.add_argument('-t', type=float, default=0.2, help='regression threshold')
+    # Робить поточний запуск новою базовою лінією.
+    parser.add_argument('-b', action='store_true', help='save as baseline')
+    args = parser.parse_args()
+    exit(main(args.w, args.r, Path(args.f), args.t, args.b))
@@ -0,0 +1,71 @@
+from datetime import datetime, timezone
+from json import loads, dumps
+from pathlib import Path
+from platform import machine, python_version
+from typing import Any, Dict, List, Optional
+
+History = Dict[str, Any]
+
+
+def load(path: Path) -> History:
+    """
+    Читає історію вимірювань або повертає порожню, якщо файлу ще немає.
+    """
+    if not path.exists():
+        return {'baseline': {}, 'runs': []}
+    with open(path) as stream:
+        return loads(stream.read())
+
+
+def save(path: Path, history: History):
+    """
+    Зберігає історію у форматі JSON.
+    """
+    with open(path, 'w') as stream:
+        stream.write(dumps(history, ensure_ascii=False, indent=2))
+
+
+def record(
+    history: History,
+    results: Dict[str, Dict[str, float]],
+    is_baseline: bool = False
+) -> History:
+    """
+    Дописує результати запуску в історію разом із часом і платформою.
+    Навантаження, яких ще немає в базовій лінії (наприклад, додані після
+    першого запуску), потрапляють туди з поточним часом, а з is_baseline
+    базова лінія оновлюється лише для виміряних зараз навантажень.
+    """
+    history['runs'].append(
+        {
+            'timestamp': datetime.now(timezone.utc).isoformat(),
+            'machine': machine(),
+            'python': python_version(),
+            'results': results
+        }
+    )
+    for name, result in results.items():
+        if is_baseline:
+            history['baseline'][name] = result['best']
+        else:
+            history['baseline'].setdefault(name, result['best'])
+    return history
+
+
+def compare(
+    history: History,
+    results: Dict[str, Dict[str, float]],
+    threshold: float = 0.2
+) -> List[List[Optional[Any]]]:
+    """
+    Порівнює найкращі часи з базовою лінією. Регресією вважається
+    сповільнення більше ніж на threshold (відносно). Повертає рядки для
+    tabulate: назва, базовий час, поточний, відношення й ознака регресії.
+    """
+    rows = []
+    for name, result in results.items():
+        base = history['baseline'].get(name)
+        ratio = None if not base else result['best'] / base
+        is_regression = ratio is not None and ratio > 1 + threshold
+        rows.append([name, base, result['best'], ratio, is_regression])
+    return rows
@@ -0,0 +1,174 @@
+from random import seed
+from subprocess import run as execute
+from sys import executable
+from typing import Callable, Dict
+from numpy import linspace, pi, cos, sin, column_stack, array
+from numpy.random import default_rng
+
+Workload = Callable[[], Callable[[], object]]
+
+
+def mesh() -> Callable[[], object]:
+    """
+    Тріангуляція й надування зіркоподібного полігона з 200 вершин. Функція
+    utils.mesh використовує модуль random, тож зерно фіксується перед
+    кожним запуском.
+    """
+    from mathmodel.utils import mesh as target
+    angles = linspace(0, 2 * pi, 200, endpoint=False)
+    radii = 10 + 3 * cos(7 * angles)
+    shape = column_stack((radii * cos(angles), radii * sin(angles)))
+
+    def run():
+        seed(42)
+        return target(shape)
+
+    return run
+
+
+def refine() -> Callable[[], object]:
+    """
+    Адаптивна тріангуляція того самого зіркоподібного полігона.
+    """
+    from mathmodel.utils import refine as target
+    angles = linspace(0, 2 * pi, 200, endpoint=False)
+    radii = 10 + 3 * cos(7 * angles)
+    shape = column_stack((radii * cos(angles), radii * sin(angles)))
+    return lambda: target(shape, tolerance=1e-5)
+
+
+def render2d() -> Callable[[], object]:
+    """
+    Повне малювання шару міст разом з анотаціями.
+    """
+    from mathmodel.layers import Layer
+    layer = Layer('cities', is_named=True)
+    return layer.render2d
+
+
+def render3d() -> Callable[[], object]:
+    """
+    Проєктування шару річок на сферу.
+    """
+    from mathmodel.layers import Layer
+    layer = Layer('rivers')
+
+    def run():
+        seed(42)
+        return layer.render3d()
+
+    return run
+
+
+def pipeline() -> Callable[[], object]:
+    """
+    Усі чотири шари глобуса через конвеєр із пулом процесів.
+    """
+    from mathmodel.layers import Layer
+    from mathmodel.pipeline import render3d as target
+    layers = [Layer(n) for n in ('oblasts', 'cities', 'rivers', 'roads')]
+    return lambda: target(layers)
+
+
+def lookup() -> Callable[[], object]:
+    """
+    Визначення області для мільйона випадкових точок у рамці області.
+    """
+    from mathmodel.lookup import Index
+    index = Index('oblasts')
+    rng = default_rng(42)
+    points = column_stack((rng.uniform(33, 37, 1 << 20), rng.uniform(47, 49.5, 1 << 20)))
+    return lambda: index(points)
+
+
+def fractals() -> Callable[[], object]:
+    """
+    Растр 160 x 80 кожного з трьох фракталів без експорту зображення.
+    """
+    from mathmodel.fractals import paint, draw, render
+
+    def run():
+        return [
+            [
+                [f(x, y) for x in linspace(-2.9, 2.3, 160)]
+                for y in linspace(1.7, -1.7, 80)
+            ]
+            for f in (paint, draw, render)
+        ]
+
+    return run
+
+
+def euler() -> Callable[[], object]:
+    """
+    Самописний метод Ейлера на аттракторі Рьослера.
+    """
+    from mathmodel.synergy import solve_ivp_euler, rossler
+    y0 = array([-0.8, 0.8, 0.8])
+    return lambda: solve_ivp_euler(rossler, (0.0, 150.0), y0)
+
+
+def bifurcation() -> Callable[[], object]:
+    """
+    Біфуркаційний рушій: 500 значень параметра c сімейства Рьослера.
+    """
+    from mathmodel.synergy import bifurcation as target, rossler
+    values = linspace(2, 6, 500)
+    return lambda: target(rossler, 'c', values, span=(0.0, 100.0), transient=50.0)
+
+
+def animation() -> Callable[[], object]:
+    """
+    Пул процесів animations.main на 8 кадрах анімації Жюліа.
+    """
+    from multiprocessing import Pool
+    from mathmodel.animations import draw
+
+    def run():
+        with Pool(2) as pool:
+            return pool.map(draw, enumerate(linspace(0, 2 * pi, 8)))
+
+    return run
+
+
+def summation() -> Callable[[], object]:
+    """
+    Поблочна сума квадратів мільйона чисел.
+    """
+    from mathmodel.summation import inplace
+    v = default_rng(42).random(10 ** 6)
+    return lambda: inplace(v)
+
+
+def startup(command: str) -> Workload:
+    """
+    Холодний старт консольної команди: окремий інтерпретатор виконує
+    python -m mathmodel <command> -h, тож вимірюється саме час імпортів.
+    """
+    def workload() -> Callable[[], object]:
+        return lambda: execute(
+            [executable, '-m', 'mathmodel', command, '-h'],
+            capture_output=True,
+            check=True
+        )
+
+    return workload
+
+
+# Реєстр навантажень: кожне готує дані й повертає функцію без аргументів.
+workloads: Dict[str, Workload] = {
+    'utils.mesh': mesh,
+    'utils.refine': refine,
+    'layers.render2d': render2d,
+    'layers.render3d': render3d,
+    'pipeline.render3d': pipeline,
+    'lookup.oblasts': lookup,
+    'fractals.paint': fractals,
+    'synergy.euler': euler,
+    'synergy.bifurcation': bifurcation,
+    'animations.pool': animation,
+    'summation.inplace': summation,
+    'startup.gis': startup('gis'),
+    'startup.spherical': startup('spherical'),
+    'startup.fractals': startup('fractals')
+}
@@ -0,0 +1,42 @@
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+
+class LRU:
+    """
+    Мінімалістичний кеш із витісненням найдавніше використаних записів. В
+    основі лежить впорядкований словник: кожне звернення переносить ключ у
+    кінець, а при переповненні видаляється перший елемент.
+    """
+    __slots__ = ['_size', '_items']
+
+    def __init__(self, size: int = 64):
+        """
+        Конструктор класу. Приймає максимальну кількість записів у кеші.
+        """
+        self._size = size
+        self._items = OrderedDict()
+
+    def get(self, key: Hashable, default: Optional[Any] = None) -> Any:
+        """
+        Повертає збережене значення або default, якщо ключа немає.
+        """
+        if key not in self._items:
+            return default
+        self._items.move_to_end(key)
+        return self._items[key]
+
+    def put(self, key: Hashable, value: Any):
+        """
+        Додає запис у кеш, витісняючи найстаріші при переповненні.
+        """
+        self._items[key] = value
+        self._items.move_to_end(key)
+        while len(self._items) > self._size:
+            self._items.popitem(last=False)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._items
+
+    def __len__(self) -> int:
+        return len(self._items)
@@ -0,0 +1,130 @@
+from typing import List, Optional, Tuple
+from numpy import (
+    ndarray, asarray, float64, full, inf, arange, empty, int64, argsort, sqrt,
+    maximum, argmin, array
+)
+from plotly.graph_objects import Figure, Scatter
+from scipy.cluster.hierarchy import dendrogram as layout
+
+
+def spanning_tree(
+    points: ndarray,
+    weights: Optional[ndarray] = None
+) -> Tuple[ndarray, ndarray, ndarray]:
+    """
+    Мінімальне кістякове дерево повного графа евклідових відстаней за
+    алгоритмом Прима без матриці попарних відстаней. На кожному кроці
+    рахуються лише відстані від щойно доданої вершини до решти, а масиви
+    невідвіданих точок ущільнюються обміном з останнім елементом, тож пам'ять
+    лінійна за n, а робота спадає від кроку до кроку. Квадрати відстаней
+    обчислюються через скалярні добутки (|a|^2 - 2ab + |b|^2), що
+    перекладає основну роботу на BLAS. Ваги ознак множать квадрати різниць,
+    як у taxonometry.score. Повертає ребра дерева як пари вершин і довжини.
+    """
+    points = asarray(points, float64)
+    if weights is not None:
+        points = points * sqrt(asarray(weights, float64))
+    n = len(points)
+    rest, index = points.copy(), arange(n)
+    squares = (rest ** 2).sum(1)
+    best, parent = full((n,), inf), full((n,), -1, int64)
+    sources, targets = empty((n - 1,), int64), empty((n - 1,), int64)
+    lengths = empty((n - 1,))
+    m, current = n, 0
+    for step in range(n - 1):
+        _swap(current, m - 1, rest, index, squares, best, parent)
+        m -= 1
+        origin = rest[m]
+        distances = squares[:m] - 2 * rest[:m] @ origin + squares[m]
+        closer = distances < best[:m]
+        best[:m][closer] = distances[closer]
+        parent[:m][closer] = index[m]
+        current = argmin(best[:m])
+        sources[step], targets[step] = parent[current], index[current]
+        lengths[step] = best[current]
+    return sources, targets, sqrt(maximum(lengths, 0))
+
+
+def _swap(i: int, j: int, *arrays: ndarray):
+    """
+    Обмінює i-й та j-й елементи (рядки) в кожному з масивів.
+    """
+    for a in arrays:
+        a[[i, j]] = a[[j, i]]
+
+
+def linkage(points: ndarray, weights: Optional[ndarray] = None) -> ndarray:
+    """
+    Матриця зв'язків одиночного зв'язування у форматі scipy: ребра
+    кістякового дерева сортуються за довжиною, а система неперетинних
+    множин об'єднує кластери, видаючи нові номери n, n + 1, ... Результат
+    збігається з scipy.cluster.hierarchy.linkage(method='single'), проте не
+    потребує стиснутої матриці відстаней розміром n(n - 1) / 2.
+    """
+    sources, targets, lengths = spanning_tree(points, weights)
+    n = len(sources) + 1
+    roots, sizes, labels = arange(n), [1] * n, list(range(n))
+    z = empty((n - 1, 4))
+    for step, e in enumerate(argsort(lengths, kind='stable')):
+        a, b = _root(roots, sources[e]), _root(roots, targets[e])
+        first, second = sorted((labels[a], labels[b]))
+        roots[b] = a
+        sizes[a] += sizes[b]
+        labels[a] = n + step
+        z[step] = first, second, lengths[e], sizes[a]
+    return z
+
+
+def _root(roots: ndarray, i: int) -> int:
+    """
+    Пошук кореня множини зі стисненням шляху.
+    """
+    r = i
+    while roots[r] != r:
+        r = roots[r]
+    while roots[i] != r:
+        roots[i], i = r, roots[i]
+    return r
+
+
+def dendrogram(
+    z: ndarray,
+    labels: Optional[List[str]] = None,
+    levels: int = 8,
+    orientation: str = 'left'
+) -> Figure:
+    """
+    Малює лише верхні levels рівнів дерева: глибші піддерева згортаються в
+    листки з кількістю елементів у дужках. Координати гілок обчислює scipy, а
+    сама фігура складається з Scatter-ліній, як у plotly create_dendrogram.
+    """
+    info = layout(
+        z,
+        p=levels,
+        truncate_mode='level',
+        labels=labels,
+        no_plot=True
+    )
+    figure = Figure()
+    for xs, ys in zip(info['icoord'], info['dcoord']):
+        xs, ys = (ys, xs) if orientation == 'left' else (xs, ys)
+        figure.add_trace(
+            Scatter(
+                x=array(xs) * (-1 if orientation == 'left' else 1),
+                y=ys,
+                mode='lines',
+                hoverinfo='skip',
+                line={'color': 'rgb(61, 153, 112)'}
+            )
+        )
+    ticks = {
+        'tickmode': 'array',
+        'tickvals': [5 + 10 * i for i in range(len(info['ivl']))],
+        'ticktext': info['ivl']
+    }
+    if orientation == 'left':
+        figure.update_yaxes(**ticks)
+    else:
+        figure.update_xaxes(**ticks)
+    figure.update_layout(showlegend=False)
+    return figure
@@ -0,0 +1,187 @@
+from typing import Callable, List, NamedTuple, Optional, Tuple, Any
+from numpy import (
+    ndarray, array, float64, int64, zeros, full, empty, sqrt, minimum, arange,
+    nonzero, median, count_nonzero, column_stack
+)
+
+Function = Callable[[ndarray, ndarray], ndarray]
+Gradient = Callable[[ndarray, ndarray], Tuple[ndarray, ndarray]]
+
+
+class Descent(NamedTuple):
+    """
+    Результат пакетного градієнтного спуску. Кожен масив проіндексований за
+    стартовими точками: кінцеві координати, значення функції, довжина
+    останнього кроку, кількість ітерацій і ознака збіжності. Якщо спуск
+    запускався з історією, path містить тензор 3 x (I + 1) x N траєкторій, де
+    I - найбільша кількість виконаних ітерацій.
+    """
+    x: ndarray
+    y: ndarray
+    z: ndarray
+    rate: ndarray
+    steps: ndarray
+    converged: ndarray
+    path: Optional[ndarray]
+
+
+def central(
+    f: Function,
+    x: ndarray,
+    y: ndarray,
+    h: float = 1e-5
+) -> Tuple[ndarray, ndarray]:
+    """
+    Центральна скінченна різниця для обох частинних похідних. Похибка має
+    порядок O(h^2) проти O(h) у правої різниці, а функція викликається над
+    цілими масивами точок, а не над окремими скалярами.
+    """
+    return (
+        (f(x + h, y) - f(x - h, y)) / (2 * h),
+        (f(x, y + h) - f(x, y - h)) / (2 * h)
+    )
+
+
+def descend(
+    f: Function,
+    x0: Any,
+    y0: Any,
+    gradient: Optional[Gradient] = None,
+    maximize: bool = False,
+    rate: float = 1.0,
+    h: float = 1e-5,
+    tolerance: float = 1e-4,
+    limit: int = 1000,
+    shrink: float = 0.5,
+    armijo: float = 1e-4,
+    backtracks: int = 30,
+    history: bool = False
+) -> Descent:
+    """
+    Векторизований градієнтний спуск (або підйом при maximize) одночасно з
+    усіх стартових точок. Крок підбирається бектрекінговим лінійним пошуком за
+    умовою Арміхо: якщо значення функції зменшилось недостатньо, крок
+    множиться на shrink, а після вдалої ітерації знову поступово зростає до
+    rate. Точка вважається збіжною, щойно норма градієнта стає меншою за
+    tolerance або повний крок rate, прийнятий без скорочення, має довжину,
+    меншу за tolerance. Мала зміна значення функції після скорочення кроку
+    ознакою збіжності не є: вона свідчить лише про занадто короткий крок.
+    Збіжні точки виключаються з подальших обчислень. Історія траєкторій
+    пишеться в заздалегідь виділений буфер, тому жодних копіювань списків на
+    кожному кроці немає. Якщо аналітичний градієнт не передано,
+    використовується центральна різниця.
+    """
+    sign = -1.0 if maximize else 1.0
+    x = array(x0, dtype=float64).ravel()
+    y = array(y0, dtype=float64).ravel()
+    z = f(x, y) + zeros(x.shape)
+    n = len(x)
+    derivative = gradient or (lambda a, b: central(f, a, b, h))
+    rates = full((n,), float(rate))
+    steps = zeros((n,), int64)
+    converged = zeros((n,), bool)
+    path = None
+    if history:
+        path = empty((3, limit + 1, n))
+        path[:, 0] = x, y, z
+    active, i = arange(n), 0
+    while active.size > 0 and i < limit:
+        xa, ya, za = x[active], y[active], z[active]
+        gx, gy = derivative(xa, ya)
+        gx, gy = sign * gx, sign * gy
+        norm = gx ** 2 + gy ** 2
+        ta = rates[active]
+        xn, yn = xa - ta * gx, ya - ta * gy
+        zn = f(xn, yn)
+        bad = nonzero(sign * zn > sign * za - armijo * ta * norm)[0]
+        for _ in range(backtracks):
+            if bad.size == 0:
+                break
+            ta[bad] *= shrink
+            xn[bad] = xa[bad] - ta[bad] * gx[bad]
+            yn[bad] = ya[bad] - ta[bad] * gy[bad]
+            zn[bad] = f(xn[bad], yn[bad])
+            bad = bad[sign * zn[bad] > sign * za[bad] - armijo * ta[bad] * norm[bad]]
+        length = sqrt(norm)
+        done = (length < tolerance) | ((ta == rate) & (ta * length < tolerance))
+        x[active], y[active], z[active] = xn, yn, zn
+        rates[active] = minimum(ta / shrink, rate)
+        steps[active] += 1
+        converged[active[done]] = True
+        active = active[~done]
+        i += 1
+        if history:
+            path[:, i] = x, y, z
+    return Descent(
+        x, y, z, rates, steps, converged, None if path is None else path[:, :i + 1]
+    )
+
+
+def label(
+    descent: Descent,
+    f: Function,
+    maximize: bool = False,
+    radius: float = 1e-2,
+    h: float = 1e-4
+) -> Tuple[ndarray, ndarray]:
+    """
+    Групує стартові точки за басейнами притягання: кінцеві точки збіжних
+    стартів об'єднуються в кластери радіуса radius навколо першої ще не
+    розподіленої точки, а центром кластера стає середнє його точок. Кластер
+    вважається екстремумом, лише якщо матриця Гессе функції f (центральні
+    різниці з кроком h) у центрі додатно визначена, а при maximize - від'ємно
+    визначена; сідлові точки, де градієнт теж нульовий, так відкидаються.
+    Повертає центри знайдених екстремумів і масив міток для кожного старту:
+    -1 для незбіжних стартів і тих, що зупинились не в екстремумі.
+    """
+    ends = column_stack((descent.x, descent.y))
+    labels = full((len(ends),), -1, int64)
+    pending = nonzero(descent.converged)[0]
+    centers = []
+    while pending.size > 0:
+        offsets = ends[pending] - ends[pending[0]]
+        near = (offsets ** 2).sum(axis=1) <= radius ** 2
+        members = pending[near]
+        x, y = ends[members].mean(axis=0)
+        if _extremum(f, x, y, maximize, h):
+            labels[members] = len(centers)
+            centers.append((x, y))
+        pending = pending[~near]
+    return array(centers, dtype=float64).reshape(-1, 2), labels
+
+
+def summary(
+    descent: Descent,
+    f: Function,
+    maximize: bool = False,
+    radius: float = 1e-2
+) -> List[List[Any]]:
+    """
+    Зведена статистика збіжності у вигляді рядків для tabulate.
+    """
+    centers, labels = label(descent, f, maximize, radius)
+    return [
+        ['metric', 'value'],
+        ['starts', len(descent.x)],
+        ['converged', count_nonzero(descent.converged) / len(descent.x)],
+        ['mean steps', descent.steps.mean()],
+        ['median steps', median(descent.steps)],
+        ['max steps', descent.steps.max()],
+        ['extrema', len(centers)],
+        ['unlabeled', count_nonzero(labels < 0) / len(descent.x)]
+    ]
+
+
+def _extremum(f: Function, x: float, y: float, maximize: bool, h: float) -> bool:
+    """
+    Перевіряє визначеність матриці Гессе f у точці за центральними
+    різницями другого порядку.
+    """
+    sign = -1.0 if maximize else 1.0
+    z = f(x, y)
+    xx = (f(x + h, y) - 2 * z + f(x - h, y)) / h ** 2
+    yy = (f(x, y + h) - 2 * z + f(x, y - h)) / h ** 2
+    xy = (
+        f(x + h, y + h) - f(x + h, y - h) - f(x - h, y + h) + f(x - h, y - h)
+    ) / (4 * h ** 2)
+    return bool(sign * xx > 0 and xx * yy - xy ** 2 > 0)
@@ -0,0 +1,287 @@
+from argparse import ArgumentParser
+from pathlib import Path
+from re import fullmatch
+from sqlite3 import connect
+from threading import Lock
+from typing import Dict, List, Optional, Tuple, Union
+from numpy import (
+    ndarray, arange, zeros, full, empty, interp, asarray, float32, float64, uint8,
+    int64, complex128, clip
+)
+from mathmodel.caching import LRU
+from mathmodel.fractals import scales
+from mathmodel.profiling import stage, count
+
+# Площини фракталів: центр і сторона квадрата, який покриває тайл рівня 0 -
+# ті самі ділянки, що й у fractals.julia, burning_ship та mandelbrot.
+# Уявна вісь спрямована вниз, як і на зображеннях модуля fractals.
+planes = {
+    'julia': (0j, 6.8),
+    'burning-ship': (-0.3 - 0.6j, 5.2),
+    'mandelbrot': (-0.4 + 0j, 5.0)
+}
+# Версія алгоритму фарбування: її зміна очищає дискове сховище тайлів.
+version = '1'
+zooms = (0, 32)
+# Опорні кольори шкали inferno, якої немає серед явних шкал fractals.scales.
+_named = {
+    'inferno': [
+        [0, 'rgb(0, 0, 4)'],
+        [0.25, 'rgb(87, 16, 110)'],
+        [0.5, 'rgb(188, 55, 84)'],
+        [0.75, 'rgb(249, 142, 9)'],
+        [1, 'rgb(252, 255, 164)']
+    ]
+}
+_cache_path = Path(__file__).parent.parent / '.cache/explorer/tiles.sqlite'
+_page = '''<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<link rel="stylesheet" href="https://unpkg.com/leaflet@1.9.4/dist/leaflet.css">
+<script src="https://unpkg.com/leaflet@1.9.4/dist/leaflet.js"></script>
+<style>html, body, #map {height: 100%%; margin: 0; background: #000}</style>
+</head>
+<body>
+<div id="map"></div>
+<script>
+const bounds = [[-256, 0], [0, 256]];
+const map = L.map('map', {crs: L.CRS.Simple, minZoom: %d, maxZoom: %d});
+const layers = {};
+for (const name of %s) {
+  layers[name] = L.tileLayer(`/${name}/{z}/{x}/{y}.png`, {
+    noWrap: true,
+    bounds: bounds,
+    minZoom: %d,
+    maxZoom: %d
+  });
+}
+L.control.layers(layers).addTo(map);
+Object.values(layers)[0].addTo(map);
+map.fitBounds(bounds);
+</script>
+</body>
+</html>
+'''
+
+
+class Explorer:
+    """
+    Тайловий бекенд для інтерактивного дослідження фракталів. Комплексна
+    площина кожного фрактала ділиться на піраміду тайлів z/x/y: на рівні z
+    квадрат planes[name] розбито на 2^z x 2^z тайлів по size x size пікселів.
+    Тайл обчислюється лише на вимогу векторизованим алгоритмом часу втечі
+    (див. intensities), фарбується шкалою з fractals.scales і кодується в
+    PNG. Готові тайли зберігаються в обмеженому LRU-кеші в пам'яті та в
+    SQLite-сховищі на диску, тож переміщення карти повторно використовує вже
+    обчислені тайли, а зміна масштабу обчислює лише нові.
+    """
+    __slots__ = ['_size', '_memory', '_connection', '_lock', '_palettes']
+
+    def __init__(
+        self,
+        path: Path = _cache_path,
+        size: int = 256,
+        capacity: int = 1024
+    ):
+        """
+        Конструктор класу. Приймає шлях до сховища, розмір тайла в пікселях
+        і кількість тайлів у кеші в пам'яті.
+        """
+        self._size = size
+        self._memory = LRU(capacity)
+        self._lock = Lock()
+        self._palettes = {name: _palette(scale) for name, scale in scales.items()}
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._connection = connect(str(path), check_same_thread=False)
+        self._connection.executescript(
+            '''
+            CREATE TABLE IF NOT EXISTS metadata (name TEXT PRIMARY KEY, value TEXT);
+            CREATE TABLE IF NOT EXISTS tiles (
+                fractal TEXT,
+                tile_size INTEGER,
+                zoom_level INTEGER,
+                tile_column INTEGER,
+                tile_row INTEGER,
+                tile_data BLOB,
+                PRIMARY KEY (fractal, tile_size, zoom_level, tile_column, tile_row)
+            );
+            '''
+        )
+        metadata = dict(self._connection.execute('SELECT name, value FROM metadata'))
+        if metadata.get('version') != version:
+            self._connection.execute('DELETE FROM tiles')
+            self._connection.execute(
+                'INSERT OR REPLACE INTO metadata VALUES (?, ?)',
+                ('version', version)
+            )
+        self._connection.commit()
+
+    def get(self, name: str, z: int, x: int, y: int) -> Optional[bytes]:
+        """
+        Повертає PNG-тайл або None для невідомого фрактала чи тайла поза
+        пірамідою. Тайл шукається в пам'яті, потім на диску й лише тоді
+        обчислюється.
+        """
+        if name not in planes or not zooms[0] <= z <= zooms[1]:
+            return None
+        if not (0 <= x < 1 << z and 0 <= y < 1 << z):
+            return None
+        key = name, z, x, y
+        with self._lock:
+            data = self._memory.get(key)
+            if data is None:
+                row = self._connection.execute(
+                    'SELECT tile_data FROM tiles WHERE fractal = ? AND tile_size = ? AND '
+                    'zoom_level = ? AND tile_column = ? AND tile_row = ?',
+                    (name, self._size, z, x, y)
+                ).fetchone()
+                data = None if row is None else row[0]
+                if data is not None:
+                    self._memory.put(key, data)
+        if data is not None:
+            count('explorer.hits')
+            return data
+        from cv2 import imencode
+        with stage('explorer.tile'):
+            values = intensities(name, z, x, y, self._size)
+            pixels = self._palettes[name][(values * 255).astype(uint8)]
+            data = imencode('.png', pixels[:, :, ::-1])[1].tobytes()
+        with self._lock:
+            self._memory.put(key, data)
+            self._connection.execute(
+                'INSERT OR REPLACE INTO tiles VALUES (?, ?, ?, ?, ?, ?)',
+                (name, self._size, z, x, y, data)
+            )
+            self._connection.commit()
+        count('explorer.tiles')
+        return data
+
+    def seed(self, zoom: int) -> int:
+        """
+        Попередньо обчислює всі тайли рівнів 0..zoom усіх фракталів.
+        Повертає кількість тайлів.
+        """
+        n = 0
+        for name in planes:
+            for z in range(zoom + 1):
+                for x in range(1 << z):
+                    for y in range(1 << z):
+                        n += self.get(name, z, x, y) is not None
+        return n
+
+    def handle(self, path: str) -> Optional[Tuple[bytes, Dict[str, str]]]:
+        """
+        Обробник запитів для serving.serve: /name/z/x/y.png віддає тайл, а
+        корінь - сторінку Leaflet із перемикачем фракталів.
+        """
+        if path in {'/', '/index.html'}:
+            page = _page % (
+                zooms[0],
+                zooms[1],
+                list(planes),
+                zooms[0],
+                zooms[1]
+            )
+            return page.encode(), {'Content-Type': 'text/html; charset=utf-8'}
+        match = fullmatch(r'/([\w-]+)/(\d+)/(\d+)/(\d+)\.png', path)
+        data = None if match is None else self.get(
+            match.group(1),
+            *map(int, match.groups()[1:])
+        )
+        if data is None:
+            return None
+        return data, {'Content-Type': 'image/png'}
+
+
+def intensities(name: str, z: int, x: int, y: int, size: int = 256) -> ndarray:
+    """
+    Інтенсивності пікселів тайла (size x size, рядки зверху вниз) у шкалі
+    [0, 1], як у fractals.paint, draw і render. Кількість ітерацій зростає
+    з рівнем масштабу, аби дрібні деталі межі не зливалися в суцільну
+    пляму.
+    """
+    center, span = planes[name]
+    step = span / (1 << z) / size
+    offsets = arange(size) + 0.5
+    re = center.real - span / 2 + (x * size + offsets) * step
+    im = center.imag - span / 2 + (y * size + offsets) * step
+    points = empty((size, size), complex128)
+    points.real = re[None, :]
+    points.imag = im[:, None]
+    return escape(name, points.ravel(), iterations(z)).reshape(size, size)
+
+
+def iterations(z: int) -> int:
+    """
+    Межа кількості ітерацій для рівня масштабу z.
+    """
+    return 50 + 25 * z
+
+
+def escape(name: str, points: ndarray, stop: int = 50) -> ndarray:
+    """
+    Векторизований алгоритм часу втечі для масиву точок площини: на кожній
+    ітерації оновлюються лише точки, що ще не покинули круг радіуса втечі, а
+    решта вилучається з робочих масивів. Результат - частка виконаних
+    ітерацій, тобто те саме, що повертають скалярні функції модуля
+    fractals для кожної точки окремо.
+    """
+    points = asarray(points, complex128)
+    steps = zeros(len(points), int64)
+    active = arange(len(points))
+    if name == 'julia':
+        z, c, limit = points.copy(), full(len(points), 0.285 + 0.01j), 10
+    else:
+        z, c, limit = zeros(len(points), complex128), points, 4 if name == 'burning-ship' else 2
+    for _ in range(stop):
+        kept = z.real * z.real + z.imag * z.imag <= limit * limit
+        if not kept.all():
+            active, z, c = active[kept], z[kept], c[kept]
+            if len(active) == 0:
+                break
+        if name == 'burning-ship':
+            z = (abs(z.real) + 1j * abs(z.imag)) ** 2 + c
+        else:
+            z = z * z + c
+        steps[active] += 1
+    return (steps / stop).astype(float32)
+
+
+def _palette(scale: Union[str, List[List[Union[float, str]]]]) -> ndarray:
+    """
+    Таблиця з 256 кольорів RGB, інтерпольованих між опорними кольорами
+    шкали plotly.
+    """
+    stops = _named[scale] if isinstance(scale, str) else scale
+    positions = asarray([s for s, _ in stops], float64)
+    colors = asarray(
+        [[float(v) for v in c[c.index('(') + 1:-1].split(',')] for _, c in stops]
+    )
+    levels = arange(256) / 255
+    return clip(
+        [interp(levels, positions, colors[:, i]) for i in range(3)],
+        0,
+        255
+    ).T.round().astype(uint8)
+
+
+if __name__ == '__main__':
+    parser = ArgumentParser(description='Tiled fractal explorer')
+    # Попередньо обчислює тайли рівнів 0..N замість запуску сервера.
+    parser.add_argument('-s', type=int, help='seed tiles up to the zoom and exit')
+    # Шлях до SQLite-сховища тайлів.
+    parser.add_argument('-f', default=str(_cache_path), help='tiles storage path')
+    # Кількість тайлів у кеші в пам'яті.
+    parser.add_argument('-m', type=int, default=1024, help='memory cache capacity')
+    # Адреса й порт HTTP-сервера.
+    parser.add_argument('-H', default='127.0.0.1', help='host')
+    parser.add_argument('-p', type=int, default=8000, help='port')
+    args = parser.parse_args()
+    explorer = Explorer(Path(args.f), capacity=args.m)
+    if args.s is not None:
+        print(f'{explorer.seed(args.s)} tiles')
+    else:
+        from mathmodel.serving import serve
+        serve(explorer.handle, args.H, args.p)
@@ -0,0 +1,156 @@
+from __future__ import annotations
+from argparse import ArgumentParser
+from json import loads
+from pathlib import Path
+from timeit import default_timer
+from typing import Any, Dict, List, Optional, Sequence, Tuple, TYPE_CHECKING
+from mathmodel.profiling import enable, stage, count
+
+if TYPE_CHECKING:
+    from plotly.graph_objs import Figure
+
+# Формати, що растеризуються/векторизуються рушієм kaleido.
+images = {'.png', '.jpg', '.jpeg', '.webp', '.svg', '.pdf', '.eps'}
+# Ключі конфігурації, від яких залежать самі траси фігури: конфігурації з
+# однаковими значеннями цих ключів малюються з однієї побудованої фігури.
+toggles = ('map', 'oblasts', 'roads', 'highways', 'route')
+
+
+def main(path: str):
+    """
+    Пакетний експорт: читає JSON-список конфігурацій карт і записує кожну у
+    вказаний файл, друкуючи час запису.
+    """
+    configs = loads(Path(path).read_text())
+    for output, seconds in render(configs):
+        print(f'{output}: {seconds:.3f} s')
+
+
+def write(
+    figure: Figure,
+    path: str,
+    width: Optional[int] = None,
+    height: Optional[int] = None,
+    scale: float = 1,
+    is_compact: bool = False
+):
+    """
+    Записує фігуру у файл без браузера; формат визначається розширенням.
+    Зображення рендерить kaleido: його процес запускається під час першого
+    запису й далі перевикористовується всіма наступними в межах процесу
+    Python, тож пакетний експорт платить за старт рушія лише один раз. HTML
+    посилається на plotly.js з CDN замість вбудовування 3 МБ скрипта, а в
+    компактному режимі координати ще й квантуються й кодуються бінарно
+    (див. payload.compact).
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    suffix = path.suffix.lower()
+    with stage('export.write'):
+        if suffix == '.html' and is_compact:
+            from mathmodel.payload import write as compact
+            compact(figure, str(path))
+        elif suffix == '.html':
+            figure.write_html(
+                str(path),
+                include_plotlyjs='cdn',
+                default_width=width or '100%',
+                default_height=height or '100%'
+            )
+        elif suffix in images:
+            figure.write_image(
+                str(path),
+                format=suffix[1:],
+                width=width,
+                height=height,
+                scale=scale
+            )
+        else:
+            raise ValueError(f'Unsupported export format: {path.suffix}')
+    count('export.files')
+
+
+def frame(figure: Figure, config: Dict[str, Any]):
+    """
+    Налаштовує видиму ділянку: для плоскої карти - обмежувальну рамку
+    [захід, південь, схід, північ] у градусах, для глобуса - камеру сцени у
+    форматі plotly (eye, center, up). Без цих ключів повертається
+    автомасштабування та камера за замовчуванням.
+    """
+    if config.get('map', 'gis') == 'gis':
+        bbox = config.get('bbox')
+        figure.update_xaxes(
+            range=None if bbox is None else [bbox[0], bbox[2]],
+            autorange=bbox is None
+        )
+        figure.update_yaxes(
+            range=None if bbox is None else [bbox[1], bbox[3]],
+            autorange=bbox is None
+        )
+    else:
+        figure.update_layout(scene_camera=config.get('camera'))
+
+
+def build(config: Dict[str, Any]) -> Figure:
+    """
+    Будує фігуру за перемикачами шарів конфігурації.
+    """
+    kind = config.get('map', 'gis')
+    if kind == 'gis':
+        from mathmodel.gis import build as gis
+        return gis(
+            config.get('oblasts', True),
+            config.get('roads', True),
+            config.get('highways'),
+            config.get('route')
+        )
+    if kind == 'spherical':
+        from mathmodel.spherical import build as spherical
+        return spherical(config.get('roads', True))
+    raise ValueError(f'There\'re no maps with such a name: {kind}')
+
+
+def render(configs: Sequence[Dict[str, Any]]) -> List[Tuple[str, float]]:
+    """
+    Рендерить усі конфігурації в одному процесі. Конфігурації групуються за
+    перемикачами шарів, тож GeoJSON розбирається, а траси будуються лише раз
+    на групу; рамки й камери застосовуються до вже готової фігури перед
+    кожним записом. Повертає шляхи файлів і час їх запису.
+    """
+    groups: Dict[Tuple, List[Dict[str, Any]]] = {}
+    for config in configs:
+        key = tuple(
+            tuple(sorted(v) if k == 'highways' else v) if isinstance(v, list) else v
+            for k, v in ((k, config.get(k)) for k in toggles)
+        )
+        groups.setdefault(key, []).append(config)
+    results = []
+    for group in groups.values():
+        figure = build(group[0])
+        for config in group:
+            start = default_timer()
+            frame(figure, config)
+            write(
+                figure,
+                config['output'],
+                config.get('width'),
+                config.get('height'),
+                config.get('scale', 1),
+                config.get('compact', False)
+            )
+            results.append((config['output'], default_timer() - start))
+    return results
+
+
+if __name__ == '__main__':
+    parser = ArgumentParser(description='Batch export of GIS and globe maps')
+    # JSON-файл зі списком конфігурацій: map (gis або spherical), output,
+    # oblasts, roads, highways, route, bbox, camera, width, height, scale,
+    # compact.
+    parser.add_argument('configs', help='JSON configurations path')
+    # Вмикає профілювання; необов'язкове значення - шлях для pstats-файлу.
+    parser.add_argument('--profile', nargs='?', const='', help='profile stages')
+    args = parser.parse_args()
+    if args.profile is not None:
+        enable(args.profile)
+    main(args.configs)
@@ -0,0 +1,244 @@
+from argparse import ArgumentParser
+from multiprocessing import Pool, cpu_count
+from typing import List, Tuple
+from numpy import (
+    ndarray, reshape, vstack, hstack, zeros, full, arange, column_stack, meshgrid,
+    float64, concatenate, amin, amax, array
+)
+from plotly.graph_objs import Figure, Mesh3d
+from scipy.spatial import Delaunay
+from cv2 import (
+    imread, COLOR_BGR2GRAY, RETR_TREE, CHAIN_APPROX_NONE, THRESH_BINARY,
+    THRESH_BINARY_INV, cvtColor, threshold, findContours, approxPolyDP, contourArea
+)
+from mathmodel.utils import inflate, inside
+
+Shape = Tuple[ndarray, List[ndarray]]
+Part = Tuple[ndarray, ndarray]
+
+
+def main(
+    path: str,
+    level: int,
+    is_inverted: bool,
+    budget: int,
+    mode: str,
+    height: float
+):
+    """
+    Головна функція конвеєра: зчитує всі контури картинки разом із
+    порожнинами, спрощує їх до заданого бюджету вершин, паралельно будує меш
+    для кожної фігури й зводить результат в один Mesh3d.
+    """
+    shapes = outlines(path, level, is_inverted, budget)
+    pool = Pool(cpu_count())
+    parts = pool.map(
+        _build,
+        [(s, mode, height) for s in shapes],
+        chunksize=max(len(shapes) // (4 * cpu_count()), 1)
+    )
+    pool.close()
+    points, faces = merge(parts)
+    figure = Figure()
+    figure.add_trace(
+        Mesh3d(
+            x=points[:, 0],
+            y=points[:, 1],
+            z=points[:, 2],
+            i=faces[:, 0],
+            j=faces[:, 1],
+            k=faces[:, 2],
+            color='red',
+            opacity=0.6,
+            hoverinfo='skip'
+        )
+    )
+    figure.update_layout(title=f'shapes = {len(shapes)}, triangles = {len(faces)}')
+    figure.show()
+
+
+def outlines(
+    path: str,
+    level: int = 200,
+    is_inverted: bool = False,
+    budget: int = 20000,
+    size: float = 16
+) -> List[Shape]:
+    """
+    На відміну від spatial.contour, яка лишає тільки найбільший контур,
+    тут зберігається вся ієрархія findContours: контури на парній глибині
+    вкладеності вважаються зовнішніми кільцями, а їх безпосередні нащадки -
+    порожнинами. Дрібні плями площею менше size пікселів відкидаються, а
+    решта кілець спрощується алгоритмом Дугласа-Пекера (approxPolyDP) з
+    таким допуском, аби сумарна кількість вершин не перевищила budget.
+    Координату Y перевернуто, щоб картинка не була дзеркальною.
+    """
+    _, mask = threshold(
+        cvtColor(imread(path), COLOR_BGR2GRAY),
+        level,
+        255,
+        THRESH_BINARY_INV if is_inverted else THRESH_BINARY
+    )
+    contours, hierarchy = findContours(mask, RETR_TREE, CHAIN_APPROX_NONE)[-2:]
+    if hierarchy is None:
+        return []
+    parents = hierarchy[0][:, 3]
+    depths = zeros((len(contours),), int)
+    for i in range(len(contours)):
+        p = parents[i]
+        while p >= 0:
+            depths[i] += 1
+            p = parents[p]
+    kept = [i for i, c in enumerate(contours) if abs(contourArea(c)) >= size]
+    epsilon = _epsilon([contours[i] for i in kept], budget)
+    rings = {
+        i: _ring(approxPolyDP(contours[i], epsilon, True), mask.shape)
+        for i in kept
+    }
+    return [
+        (
+            rings[i],
+            [
+                rings[j]
+                for j in kept
+                if parents[j] == i and len(rings[j]) >= 3
+            ]
+        )
+        for i in kept
+        if depths[i] % 2 == 0 and len(rings[i]) >= 3
+    ]
+
+
+def _epsilon(contours: List[ndarray], budget: int) -> float:
+    """
+    Бінарний пошук найменшого допуску спрощення, за якого загальна кількість
+    вершин усіх кілець вкладається в бюджет.
+    """
+    if sum(len(c) for c in contours) <= budget:
+        return 0.0
+    low, high = 0.0, 1.0
+    while sum(len(approxPolyDP(c, high, True)) for c in contours) > budget:
+        high *= 2
+    for _ in range(20):
+        middle = (low + high) / 2
+        if sum(len(approxPolyDP(c, middle, True)) for c in contours) > budget:
+            low = middle
+        else:
+            high = middle
+    return high
+
+
+def _ring(contour: ndarray, size: Tuple[int, int]) -> ndarray:
+    """
+    Перетворює контур OpenCV на незамкнений масив N x 2 в декартових осях.
+    """
+    ring = reshape(contour, (contour.shape[0], 2)).astype(float64)
+    ring[:, 0] -= size[1] / 2
+    ring[:, 1] = size[0] / 2 - ring[:, 1]
+    return ring
+
+
+def _build(task: Tuple[Shape, str, float]) -> Part:
+    """
+    Робоча функція процесу з пулу: обирає спосіб побудови мешу для фігури.
+    """
+    shape, mode, height = task
+    return inflated(shape) if mode == 'inflate' else extruded(shape, height)
+
+
+def triangulate(shape: Shape, points: ndarray) -> ndarray:
+    """
+    Тріангуляція Делоне фігури з порожнинами. Трикутник лишається, якщо його
+    центр ваги й середини всіх трьох ребер лежать усередині фігури - так
+    відсікаються й порожнини, й грані, що перетинають увігнуті ділянки.
+    """
+    simplices = Delaunay(points).simplices
+    a, b, c = points[simplices[:, 0]], points[simplices[:, 1]], points[simplices[:, 2]]
+    rings = [shape[0]] + shape[1]
+    mask = inside((a + b + c) / 3, rings)
+    for u, v in [(a, b), (b, c), (c, a)]:
+        mask &= inside((u + v) / 2, rings)
+    return simplices[mask]
+
+
+def extruded(shape: Shape, height: float = 10) -> Part:
+    """
+    Видавлює плоску фігуру на задану висоту: нижня й верхня кришки є
+    тріангуляцією фігури, а кожне кільце (зовнішнє й порожнини) дає бічну
+    стінку з двох трикутників на ребро.
+    """
+    rings = [shape[0]] + shape[1]
+    flat = vstack(rings)
+    n = len(flat)
+    caps = triangulate(shape, flat)
+    walls = []
+    offset = 0
+    for ring in rings:
+        i = arange(len(ring)) + offset
+        j = (arange(len(ring)) + 1) % len(ring) + offset
+        walls += [column_stack((i, j, i + n)), column_stack((i + n, j, j + n))]
+        offset += len(ring)
+    points = vstack(
+        (
+            column_stack((flat, zeros((n,)))),
+            column_stack((flat, full((n,), float(height))))
+        )
+    )
+    return points, vstack([caps[:, ::-1], caps + n] + walls)
+
+
+def inflated(
+    shape: Shape,
+    spacing: float = 8,
+    r: float = 200,
+    z: float = 20
+) -> Part:
+    """
+    "Надуває" фігуру на сферу, як це робить utils.mesh, але з урахуванням
+    порожнин. Замість випадкових точок усередину додається регулярна ґратка
+    з кроком spacing, тож результат детермінований.
+    """
+    outer = shape[0]
+    low, high = amin(outer, 0), amax(outer, 0)
+    xg, yg = meshgrid(
+        arange(low[0] + spacing / 2, high[0], spacing),
+        arange(low[1] + spacing / 2, high[1], spacing)
+    )
+    grid = column_stack((xg.ravel(), yg.ravel()))
+    grid = grid[inside(grid, [outer] + shape[1])]
+    flat = vstack([outer] + shape[1] + [grid])
+    faces = triangulate(shape, flat)
+    x, y, h = inflate(flat, r=r, z=z)
+    return column_stack((x, y, h)), faces
+
+
+def merge(parts: List[Part]) -> Part:
+    """
+    Зводить набір мешів в один: точки конкатенуються, а індекси граней кожної
+    частини зсуваються на кількість вершин попередніх частин.
+    """
+    if not parts:
+        return zeros((0, 3)), zeros((0, 3), int)
+    offsets = hstack(([0], array([len(p[0]) for p in parts]).cumsum()[:-1]))
+    return (
+        concatenate([p[0] for p in parts]),
+        concatenate([p[1] + o for p, o in zip(parts, offsets)])
+    )
+
+
+if __name__ == '__main__':
+    parser = ArgumentParser(description='Extrudes every contour of an image into 3D')
+    # Шлях до зображення, контури якого необхідно перетворити на меш.
+    parser.add_argument('-i', default='images/map.jpg', help='image path')
+    # Поріг бінаризації зображення.
+    parser.add_argument('-l', type=int, default=200, help='threshold level')
+    # Інвертує бінаризацію, коли фігури світліші за фон.
+    parser.add_argument('-v', action='store_true', help='invert threshold')
+    # Максимальна сумарна кількість вершин усіх контурів.
+    parser.add_argument('-b', type=int, default=20000, help='vertex budget')
+    # Видавлювання призмою або надування на сферу.
+    parser.add_argument('-m', default='extrude', help='mode (extrude, inflate)')
+    # Висота видавлювання.
+    parser.add_argument('-H', type=float, default=10, help='extrusion height')
+    args = parser.parse_args()
+    main(args.i, args.l, args.v, args.b, args.m, args.H)
@@ -1,7 +1,28 @@
 from argparse import ArgumentParser
 from typing import List, Union
-from plotly.graph_objects import Figure, Heatmap
 from numpy import linspace
+from mathmodel.profiling import enable, timed, stage, count
+
+# Кольорові шкали фракталів у форматі plotly (назва або опорні кольори).
+scales = {
+    'julia': 'inferno',
+    'burning-ship': [
+        [0, 'rgb(103, 0, 31)'],
+        [0.2, 'rgb(178, 24, 43)'],
+        [0.4, 'rgb(214, 96, 77)'],
+        [0.6, 'rgb(244, 165, 130)'],
+        [0.8, 'rgb(77, 77, 77)'],
+        [1, 'rgb(0, 0, 0)']
+    ],
+    'mandelbrot': [
+        [0, 'rgb(77, 0, 75)'],
+        [0.2, 'rgb(129, 15, 124)'],
+        [0.4, 'rgb(136, 65, 157)'],
+        [0.6, 'rgb(140, 107, 177)'],
+        [0.8, 'rgb(77, 77, 77)'],
+        [1, 'rgb(0, 0, 0)']
+    ]
+}
 
 
 def julia():
@@ -18,19 +39,23 @@ def julia():
             [paint(x, y) for x in linspace(3.4, -3.4, 1600)]
             for y in linspace(1.7, -1.7, 800)
         ],
-        'inferno',
+        scales['julia'],
         'images/julia.png'
     )
 
 
+@timed('fractals.build')
 def build(
     z: List[List[float]],
     scale: Union[str, List[List[Union[float, str]]]],
     path: str
 ):
     """
-    Тут будується графік, після чого зображення зберігається у файл.
+    Тут будується графік, після чого зображення зберігається у файл. plotly
+    імпортується лише тут, тож решта модуля потребує тільки NumPy.
     """
+    from plotly.graph_objects import Figure, Heatmap
+    count('fractals.pixels', len(z) * len(z[0]))
     figure = Figure()
     figure.add_trace(Heatmap(z=z, zmin=0, zmax=1, colorscale=scale, showscale=False))
     figure.update_layout(
@@ -52,7 +77,8 @@ def build(
         showline=False,
         zeroline=False
     )
-    figure.write_image(path, width=1600, height=800)
+    with stage('fractals.build.export'):
+        figure.write_image(path, width=1600, height=800)
 
 
 def paint(x: float, y: float) -> float:
@@ -79,14 +105,7 @@ def burning_ship():
             [draw(x, y) for x in linspace(-2.9, 2.3, 1600)]
             for y in linspace(0.7, -1.9, 800)
         ],
-        [
-            [0, 'rgb(103, 0, 31)'],
-            [0.2, 'rgb(178, 24, 43)'],
-            [0.4, 'rgb(214, 96, 77)'],
-            [0.6, 'rgb(244, 165, 130)'],
-            [0.8, 'rgb(77, 77, 77)'],
-            [1, 'rgb(0, 0, 0)']
-        ],
+        scales['burning-ship'],
         'images/burning_ship.png'
     )
 
@@ -114,14 +133,7 @@ def mandelbrot():
             [render(x, y) for x in linspace(-2.9, 2.1, 1600)]
             for y in linspace(1.25, -1.25, 800)
         ],
-        [
-            [0, 'rgb(77, 0, 75)'],
-            [0.2, 'rgb(129, 15, 124)'],
-            [0.4, 'rgb(136, 65, 157)'],
-            [0.6, 'rgb(140, 107, 177)'],
-            [0.8, 'rgb(77, 77, 77)'],
-            [1, 'rgb(0, 0, 0)']
-        ],
+        scales['mandelbrot'],
         'images/mandelbrot.png'
     )
 
@@ -146,7 +158,11 @@ if __name__ == '__main__':
         default='julia',
         help=f'figure name (available ones: {", ".join(fractals.keys())})'
     )
+    # Вмикає профілювання; необов'язкове значення - шлях для pstats-файлу.
+    parser.add_argument('--profile', nargs='?', const='', help='profile stages')
     args = parser.parse_args()
+    if args.profile is not None:
+        enable(args.profile)
     if args.f not in fractals:
         print('There\'re no functions with such a name')
     else:
@@ -1,6 +1,10 @@
+from __future__ import annotations
 from argparse import ArgumentParser, ArgumentTypeError
-from plotly.graph_objs import Figure
-from mathmodel.layers import Layer
+from typing import Optional, Sequence, Set, TYPE_CHECKING
+from mathmodel.profiling import enable, stage
+
+if TYPE_CHECKING:
+    from plotly.graph_objs import Figure
 
 
 def str2bool(value):
@@ -17,7 +21,32 @@ def str2bool(value):
         raise ArgumentTypeError('Boolean value expected.')
 
 
-def main(is_oblasts_filled: bool, is_roads_visible: bool):
+def main(
+    is_oblasts_filled: bool,
+    is_roads_visible: bool,
+    path: Optional[str] = None,
+    highways: Optional[Set[str]] = None,
+    route: Optional[Sequence[str]] = None
+):
+    """
+    Будує карту й показує її в браузері або, якщо передано шлях, записує у
+    файл (PNG, SVG, PDF чи HTML - за розширенням) без запуску браузера.
+    """
+    figure = build(is_oblasts_filled, is_roads_visible, highways, route)
+    if path:
+        from mathmodel.export import write
+        write(figure, path)
+        return
+    with stage('gis.show'):
+        figure.show()
+
+
+def build(
+    is_oblasts_filled: bool = True,
+    is_roads_visible: bool = True,
+    highways: Optional[Set[str]] = None,
+    route: Optional[Sequence[str]] = None
+) -> Figure:
     """
     Головна функція програми, яка виконує малювання (рендеринг) карти. Вона
     почергово створює усі необхідні рівні в порядку накладання - області,
@@ -32,6 +61,9 @@ def main(is_oblasts_filled: bool, is_roads_visible: bool):
     більш специфічному форматі - наприклад, shapefile або KML, але це
     виходить за межі даної лабораторної.
     """
+    from plotly.graph_objs import Figure
+    from mathmodel.layers import Layer
+    from mathmodel.pipeline import render2d
     layers = [
         Layer(
             'oblasts',
@@ -62,15 +94,31 @@ def main(is_oblasts_filled: bool, is_roads_visible: bool):
             'roads',
             is_visible=is_roads_visible,
             outer_line_color='#ffb732',
-            outer_line_width=2
+            outer_line_width=2,
+            filters=None if not highways else {'highway': set(highways)}
         )
     ]
     figure = Figure()
-    for layer in layers:
-        scatters, annotations = layer.render2d()
-        figure.add_traces(scatters)
-        for annotation in annotations:
-            figure.add_annotation(**annotation)
+    for scatters, labels in render2d(layers):
+        with stage('gis.figure'):
+            figure.add_traces(scatters)
+            for annotation in labels:
+                figure.add_annotation(**annotation)
+    if route:
+        from plotly.graph_objs import Scatter
+        from mathmodel.routing import Graph, cities, trip
+        seconds, points = trip(Graph(), cities(), *route)
+        figure.add_trace(
+            Scatter(
+                x=points[:, 0],
+                y=points[:, 1],
+                mode='lines',
+                name='route',
+                hovertext=f'{route[0]} - {route[1]}: {seconds / 3600:.2f} h',
+                hoverinfo='text',
+                line={'color': '#d62728', 'width': 4}
+            )
+        )
     figure.update_layout(plot_bgcolor='rgba(0,0,0,0)', showlegend=False)
     figure.update_xaxes(
         showline=True,
@@ -86,7 +134,7 @@ def main(is_oblasts_filled: bool, is_roads_visible: bool):
         linecolor='#8b8b8b',
         mirror=True
     )
-    figure.show()
+    return figure
 
 
 if __name__ == '__main__':
@@ -112,5 +160,15 @@ if __name__ == '__main__':
         nargs='?',
         const=True
     )
+    # Класи доріг OSM (motorway, trunk, primary), які слід показати.
+    parser.add_argument('-c', nargs='+', help='highway classes to render')
+    # Найшвидший маршрут між двома містами поверх карти.
+    parser.add_argument('--route', nargs=2, help='route origin and destination')
+    # Записує карту у файл (PNG, SVG, PDF, HTML) замість показу в браузері.
+    parser.add_argument('-e', help='export path')
+    # Вмикає профілювання; необов'язкове значення - шлях для pstats-файлу.
+    parser.add_argument('--profile', nargs='?', const='', help='profile stages')
     args = parser.parse_args()
-    main(not args.o, not args.r)
+    if args.profile is not None:
+        enable(args.profile)
+    main(not args.o, not args.r, args.e, args.c, args.route)
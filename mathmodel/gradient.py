@@ -1,39 +1,79 @@
-from numpy import meshgrid, sin, linspace
+from argparse import ArgumentParser
+from numpy import meshgrid, sin, cos, linspace, sqrt
 from plotly.subplots import make_subplots
-from plotly.graph_objs import Surface, Scatter3d, Scatter
+from plotly.graph_objs import Surface, Scatter3d, Scatter, Heatmap, Figure
+from tabulate import tabulate
+from mathmodel.descent import descend, label, summary
+from mathmodel.surfaces import sample
 
 
 def main():
-    x, y, z = [0], [0], [f(0, 0)]
-    h, i = 0.1, 0
-    while len(z) == 1 or abs(z[-2] - z[-1]) >= 0.0001:
-        xi = x[-1] + (f(x[-1] + h, y[-1]) - z[-1]) / h
-        yi = y[-1] + (f(x[-1], y[-1] + h) - z[-1]) / h
-        x, y, z = x + [xi], y + [yi], z + [f(xi, yi)]
-        if z[-2] >= z[-1]:
-            h *= 0.5
-        i += 1
+    result = descend(f, [0], [0], gradient=df, maximize=True, history=True)
+    x, y, z = result.path[:, :result.steps[0] + 1, 0]
     figure = make_subplots(
         cols=3,
         specs=[[{'type': 'xy'}, {'type': 'scene'}, {'type': 'scene'}]]
     )
-    xg, yg = meshgrid(linspace(-2, 2, 100), linspace(-0.2, 1, 100))
+    xg, yg, zg = sample(f, ((-2, 2), (-0.2, 1)), 100)
     figure.add_trace(Scatter(x=x, y=y, name=''), row=1, col=1)
-    figure.add_trace(Surface(x=xg, y=yg, z=f(xg, yg)), row=1, col=2)
+    figure.add_trace(Surface(x=xg, y=yg, z=zg), row=1, col=2)
     figure.add_trace(Scatter3d(x=x, y=y, z=z, name=''), row=1, col=2)
-    xg, yg = meshgrid(linspace(-5, 5, 200), linspace(-5, 5, 200))
-    figure.add_trace(Surface(x=xg, y=yg, z=f(xg, yg)), row=1, col=3)
+    xg, yg, zg = sample(f, ((-5, 5), (-5, 5)), 200)
+    figure.add_trace(Surface(x=xg, y=yg, z=zg), row=1, col=3)
     figure.add_trace(Scatter3d(x=x, y=y, z=z, name=''), row=1, col=3)
     figure.update_layout(
-        title=f'x = {x[-1]:.4f}, y = {y[-1]:.4f}, z = {z[-1]:.4f}, h = {h}, i = {i}',
+        title=(
+            f'x = {x[-1]:.4f}, y = {y[-1]:.4f}, z = {z[-1]:.4f}, '
+            f'h = {result.rate[0]:.4g}, i = {result.steps[0]}'
+        ),
         showlegend=False
     )
     figure.show()
 
 
+def basins(n: int = 100000):
+    """
+    Карта басейнів притягання мінімумів: спуск одночасно стартує з рівномірної
+    сітки приблизно n точок на квадраті [-5, 5] x [-5, 5], а кожен піксель
+    теплової карти зафарбовується номером мінімуму, до якого прийшла точка.
+    """
+    side = max(int(sqrt(n)), 2)
+    xs, ys = linspace(-5, 5, side), linspace(-5, 5, side)
+    xg, yg = meshgrid(xs, ys)
+    result = descend(f, xg, yg, gradient=df)
+    print(tabulate(summary(result, f), headers='firstrow', tablefmt='psql'))
+    _, labels = label(result, f)
+    figure = Figure()
+    figure.add_trace(
+        Heatmap(x=xs, y=ys, z=labels.reshape(xg.shape), colorscale='Viridis')
+    )
+    figure.update_yaxes(scaleanchor='x', scaleratio=1)
+    figure.show()
+
+
 def f(x, y):
     return sin(x - 9) * sin(y - 5.4)
 
 
+def df(x, y):
+    """
+    Аналітичний градієнт функції f.
+    """
+    return cos(x - 9) * sin(y - 5.4), sin(x - 9) * cos(y - 5.4)
+
+
 if __name__ == '__main__':
-    main()
+    parser = ArgumentParser(description='Gradient descent over a 2D surface')
+    # Аргумент командного рядка для ідентифікації обраного графіка.
+    parser.add_argument(
+        '-g',
+        default='trajectory',
+        help='graph name (available ones: trajectory, basins)'
+    )
+    # Кількість стартових точок для карти басейнів.
+    parser.add_argument('-n', type=int, default=100000, help='number of starts')
+    args = parser.parse_args()
+    if args.g == 'basins':
+        basins(args.n)
+    else:
+        main()
@@ -1,11 +1,17 @@
+from __future__ import annotations
+from concurrent.futures import Executor
 from json import loads
 from pathlib import Path
-from typing import Any, Dict, List, Iterable, Tuple, Optional, Union
-from plotly.graph_objs import Scatter, Mesh3d, Scatter3d
+from typing import Any, Dict, List, Iterable, Tuple, Optional, Union, TYPE_CHECKING
 from numpy import array, ndarray
-from shapely.geometry import shape
+from mathmodel.attributes import Filters, features
+from mathmodel.profiling import Traced, absorb, timed, stage, count
 from mathmodel.utils import inflate, mesh
 
+# plotly й shapely підвантажуються лише під час малювання.
+if TYPE_CHECKING:
+    from plotly.graph_objs import Scatter, Mesh3d, Scatter3d
+
 
 class Layer:
     """
@@ -30,7 +36,9 @@ class Layer:
         '_dx',
         '_dy',
         '_r',
-        '_z'
+        '_z',
+        '_filters',
+        '_tolerance'
     ]
     _root_dir = Path(__file__).parent.parent
 
@@ -49,12 +57,17 @@ class Layer:
         dx: float = 36.8,
         dy: float = 48.1,
         r: float = 100,
-        z: float = 1
+        z: float = 1,
+        filters: Optional[Filters] = None,
+        tolerance: Optional[float] = None
     ):
         """
         Конструктор класу. Ініціалізує поля для шляху файлу з координатами,
         кольорів заливки й стилів кордонів зовнішнього й внутрішніх кілець
-        полігонів.
+        полігонів. Фільтр обмежує шар об'єктами з заданими значеннями
+        властивостей, наприклад {'highway': {'motorway', 'trunk'}}. Допуск
+        tolerance вмикає адаптивну тріангуляцію багатокутників на сфері
+        (див. utils.refine).
         """
         self._path = self._root_dir / f'layers/{name}.geojson'
         self._is_visible = is_visible
@@ -70,7 +83,10 @@ class Layer:
         self._dy = dy
         self._r = r
         self._z = z
+        self._filters = filters
+        self._tolerance = tolerance
 
+    @timed('layers.render2d')
     def render2d(self) -> Tuple[List[Scatter], List[Dict[str, Any]]]:
         """
         "Лінивий" метод малювання об'єктів шару. Створює множину полігонів
@@ -79,19 +95,33 @@ class Layer:
         """
         if not self._is_visible:
             return [], []
-        with open(self._path) as stream:
-            content = stream.read()
-        features = loads(content)['features']
-        return (
-            [
+        with stage('layers.render2d.parse'):
+            features = self._features()
+        count('layers.features', len(features))
+        with stage('layers.render2d.traces'):
+            scatters = [
                 s
                 for f in features
                 for s in self._flatten2d(f['geometry'])
-            ],
-            []
-            if not self._is_named
-            else [a for a in map(self._annotate, features) if a]
-        )
+            ]
+        with stage('layers.render2d.annotations'):
+            annotations = (
+                []
+                if not self._is_named
+                else [a for a in map(self._annotate, features) if a]
+            )
+        return scatters, annotations
+
+    def _features(self) -> List[Dict[str, Any]]:
+        """
+        Об'єкти шару: без фільтра розбирається весь файл, інакше - лише ті
+        об'єкти, які знайдено за індексами таблиці атрибутів.
+        """
+        if self._filters:
+            return features(self._path, self._filters)
+        with open(self._path) as stream:
+            content = stream.read()
+        return loads(content)['features']
 
     def _flatten2d(self, geometry: Dict[str, Any]) -> Iterable[Scatter]:
         """
@@ -134,12 +164,15 @@ class Layer:
         результуючі списки рахуються лише в момент відкладеного виклику, не
         обтяжуючи CPU неостаточними розрахунками.
         """
+        from plotly.graph_objs import Scatter
+        count('layers.vertices', sum(len(r) for r in coordinates))
         return (
             Scatter(
                 x=r[:, 0],
                 y=r[:, 1],
                 mode='lines',
                 fill='toself',
+                name=self._path.stem,
                 hoverinfo='skip',
                 fillcolor=(
                     self._outer_fill_color
@@ -166,11 +199,14 @@ class Layer:
         """
         Логіка малювання двовимірної ламаної лінії без самоперетинів.
         """
+        from plotly.graph_objs import Scatter
         points = array(coordinates)
+        count('layers.vertices', len(points))
         return Scatter(
             x=points[:, 0],
             y=points[:, 1],
             mode='lines',
+            name=self._path.stem,
             hoverinfo='skip',
             line={
                 'color': self._outer_line_color,
@@ -187,6 +223,7 @@ class Layer:
         тексту береться середнє арифметичне західної і східної меж, в якості
         Y-координати - північна межа фрейму.
         """
+        from shapely.geometry import shape
         name = feature['properties'].get('name', '')
         if name == '':
             return None
@@ -202,68 +239,91 @@ class Layer:
             'font': {'size': 7}
         }
 
-    def render3d(self) -> List[Union[Mesh3d, Scatter3d]]:
+    @timed('layers.render3d')
+    def render3d(
+        self,
+        executor: Optional[Executor] = None
+    ) -> List[Union[Mesh3d, Scatter3d]]:
         """
         Функція малювання ділянок на поверхні сфери. Повертає результуючі
         фігури у вигляді списку діаграм розсіяння та мешів. Перші - для ліній
-        та контурів, другі - для заповнення поверхонь.
+        та контурів, другі - для заповнення поверхонь. Якщо передано пул
+        (наприклад, ProcessPoolExecutor), триангуляції всіх багатокутників
+        шару рахуються в ньому паралельно, а траси збираються у вихідному
+        порядку.
         """
         if not self._is_visible:
             return []
-        with open(self._path) as stream:
-            content = stream.read()
-        features = loads(content)['features']
-        return [
-            s
-            for f in features
-            for s in self._flatten3d(f['geometry'])
-        ]
+        with stage('layers.render3d.parse'):
+            features = self._features()
+        count('layers.features', len(features))
+        parts = [p for f in features for p in self._flatten3d(f['geometry'])]
+        meshes = {} if executor is None else {
+            i: executor.submit(Traced(mesh), points, self._r, self._z, self._tolerance)
+            for i, (is_polygon, points) in enumerate(parts)
+            if is_polygon
+        }
+        traces = []
+        for i, (is_polygon, points) in enumerate(parts):
+            if is_polygon:
+                future = meshes.get(i)
+                traces.extend(
+                    self._polygon3d(
+                        points,
+                        mesh(points, r=self._r, z=self._z, tolerance=self._tolerance)
+                        if future is None else
+                        absorb(future.result())
+                    )
+                )
+            else:
+                traces.append(self._line3d(points))
+        return traces
 
-    def _flatten3d(
-        self,
-        geometry: Dict[str, Any]
-    ) -> Iterable[Union[Mesh3d, Scatter3d]]:
+    def _flatten3d(self, geometry: Dict[str, Any]) -> Iterable[Tuple[bool, ndarray]]:
         """
         "Розгортає" переданий об'єкт геометрії відповідно до заданого типу.
         Багатокутники і колекції багатокутників перетворюються в заповнені за
         зовнішнім кільцем ділянки поверхні сфери, лінії ж стають сферичними
-        ламаними.
+        ламаними. Повертає пари (чи це багатокутник, масштабовані точки).
         """
         if geometry['type'] == 'Polygon':
-            return self._polygon3d(geometry['coordinates'][0])
+            return [(True, self._array(geometry['coordinates'][0]))]
         if geometry['type'] == 'MultiPolygon':
             return (
-                s
+                (True, self._array(c[0]))
                 for c in geometry['coordinates']
-                for s in self._polygon3d(c[0])
             )
         if geometry['type'] == 'LineString':
-            return [self._line3d(self._array(geometry['coordinates']))]
+            return [(False, self._array(geometry['coordinates']))]
         return []
 
     def _polygon3d(
         self,
-        coordinates: List[List[float]]
+        points: ndarray,
+        triangulation: Tuple[ndarray, ...]
     ) -> Tuple[Mesh3d, Scatter3d]:
         """
-        Обраховує меш для заповнення території полігона на поверхні разом із
-        контуром.
+        Будує меш для заповнення території полігона на поверхні за готовою
+        триангуляцією разом із контуром.
         """
-        points = self._array(coordinates)
-        x, y, z, i, j, k = mesh(points, r=self._r, z=self._z)
-        return (
-            Mesh3d(
-                x=x,
-                y=y,
-                z=z,
-                i=i,
-                j=j,
-                k=k,
-                color=self._outer_fill_color,
-                hoverinfo='skip'
-            ),
-            self._line3d(points)
-        )
+        from plotly.graph_objs import Mesh3d
+        count('layers.vertices', len(points))
+        x, y, z, i, j, k = triangulation
+        with stage('layers.render3d.traces'):
+            return (
+                Mesh3d(
+                    x=x,
+                    y=y,
+                    z=z,
+                    i=i,
+                    j=j,
+                    k=k,
+                    color=self._outer_fill_color,
+                    name=self._path.stem,
+                    hoverinfo='skip'
+                ),
+                self._line3d(points)
+            )
 
     def _array(self, coordinates: List[List[float]]) -> ndarray:
         """
@@ -279,12 +339,14 @@ class Layer:
         """
         Обрахунок тривимірної ламаної на поверхні сфери.
         """
+        from plotly.graph_objs import Scatter3d
         x, y, z = inflate(points, r=self._r, z=self._z)
         return Scatter3d(
             x=x,
             y=y,
             z=z,
             mode='lines',
+            name=self._path.stem,
             hoverinfo='skip',
             line={
                 'color': self._outer_line_color,
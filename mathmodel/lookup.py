@@ -0,0 +1,255 @@
+from argparse import ArgumentParser
+from concurrent.futures import ProcessPoolExecutor
+from hashlib import sha1
+from multiprocessing import cpu_count
+from pathlib import Path
+from timeit import default_timer
+from typing import Any, Dict, List, Optional, Tuple
+from numpy import (
+    ndarray, asarray, full, floor, clip, nonzero, repeat, arange,
+    cumsum, concatenate, array_split, column_stack, float64, int32, int64, load,
+    savez_compressed
+)
+from numpy.random import default_rng
+from mathmodel.attributes import Filters, features
+from mathmodel.profiling import Traced, absorb, stage, count
+from mathmodel.utils import inside
+
+_layers_dir = Path(__file__).parent.parent / 'layers'
+_cache_dir = Path(__file__).parent.parent / '.cache/lookup'
+# Індекс у процесі-робітнику пулу: будується один раз ініціалізатором.
+_worker: Optional['Index'] = None
+
+
+class Index:
+    """
+    Індекс для масового визначення об'єкта шару (області, міста), якому
+    належать точки. Обмежувальна рамка шару ділиться на рівномірну сітку
+    cells x cells, і кожна клітинка класифікується один раз за допомогою
+    STRtree і підготовлених (prepared) багатокутників shapely: клітинка, що
+    повністю лежить в одному об'єкті, одразу дає відповідь, клітинка поза
+    всіма об'єктами - -1, а для граничних клітинок зберігається короткий
+    перелік кандидатів. Тож точки всередині об'єктів і поза ними отримують
+    відповідь однією операцією індексування масиву, і лише точки граничних
+    клітинок перевіряються векторизованим ядром utils.inside, причому
+    кожна лише проти своїх кандидатів. Класифікація сітки кешується в npz за
+    хешем вмісту шару, фільтрів і розміру сітки.
+    """
+    __slots__ = ['_bounds', '_owners', '_offsets', '_members', '_rings']
+
+    def __init__(
+        self,
+        name: str,
+        filters: Optional[Filters] = None,
+        cells: int = 256
+    ):
+        """
+        Конструктор класу. Приймає назву шару в директорії layers, фільтри
+        атрибутів (див. attributes.Table.select) і кількість клітинок сітки
+        вздовж кожної осі.
+        """
+        path = _layers_dir / f'{name}.geojson'
+        geometries = [f['geometry'] for f in features(path, filters or {})]
+        self._rings = [
+            [asarray(r, float64)[:, :2] for p in _polygons(g) for r in p]
+            for g in geometries
+        ]
+        key = sha1(
+            path.read_bytes() + repr((sorted((filters or {}).items()), cells)).encode()
+        ).hexdigest()
+        self._bounds, self._owners, self._offsets, self._members = self._grid(
+            key,
+            geometries,
+            cells
+        )
+
+    def __len__(self) -> int:
+        return len(self._rings)
+
+    def __call__(self, points: ndarray) -> ndarray:
+        """
+        Номери об'єктів шару (у порядку файлу) для масиву точок N x 2
+        (довгота, широта); -1 для точок поза всіма об'єктами.
+        """
+        points = asarray(points, float64)
+        result = full(len(points), -1, int32)
+        if len(points) == 0 or len(self._rings) == 0:
+            return result
+        x0, y0, x1, y1 = self._bounds
+        ny, nx = self._owners.shape
+        within = nonzero(
+            (points[:, 0] >= x0) & (points[:, 0] <= x1) &
+            (points[:, 1] >= y0) & (points[:, 1] <= y1)
+        )[0]
+        column = clip(floor((points[within, 0] - x0) / (x1 - x0) * nx), 0, nx - 1)
+        row = clip(floor((points[within, 1] - y0) / (y1 - y0) * ny), 0, ny - 1)
+        owners = self._owners[row.astype(int64), column.astype(int64)]
+        result[within] = clip(owners, -1, None)
+        # Граничні клітинки закодовано як -2 - k, де k - номер переліку
+        # кандидатів; кожна точка розгортається в пари (точка, кандидат).
+        mixed = nonzero(owners <= -2)[0]
+        if len(mixed) == 0:
+            return result
+        lists = -2 - owners[mixed]
+        starts, ends = self._offsets[lists], self._offsets[lists + 1]
+        lengths = ends - starts
+        pairs = repeat(within[mixed], lengths)
+        shifts = arange(lengths.sum()) - repeat(cumsum(lengths) - lengths, lengths)
+        candidates = self._members[repeat(starts, lengths) + shifts]
+        order = candidates.argsort(kind='stable')
+        pairs, candidates = pairs[order], candidates[order]
+        bounds = concatenate(
+            ([0], nonzero(candidates[1:] != candidates[:-1])[0] + 1, [len(candidates)])
+        )
+        for s, e in zip(bounds[:-1], bounds[1:]):
+            members = pairs[s:e]
+            members = members[result[members] == -1]
+            if len(members):
+                hits = inside(points[members], self._rings[candidates[s]])
+                result[members[hits]] = candidates[s]
+        count('lookup.tested', len(pairs))
+        return result
+
+    def _grid(
+        self,
+        key: str,
+        geometries: List[Dict[str, Any]],
+        cells: int
+    ) -> Tuple[ndarray, ndarray, ndarray, ndarray]:
+        """
+        Класифікує клітинки сітки (див. опис класу) або читає їх із кешу.
+        """
+        path = _cache_dir / f'{key}.npz'
+        if path.exists():
+            with load(path) as archive:
+                return (
+                    archive['bounds'],
+                    archive['owners'],
+                    archive['offsets'],
+                    archive['members']
+                )
+        from shapely.geometry import box, shape
+        from shapely.prepared import prep
+        from shapely.strtree import STRtree
+        shapes = [shape(g) for g in geometries]
+        owners = full((cells, cells), -1, int32)
+        offsets, members = [0], []
+        if shapes:
+            x0, y0 = min(s.bounds[0] for s in shapes), min(s.bounds[1] for s in shapes)
+            x1, y1 = max(s.bounds[2] for s in shapes), max(s.bounds[3] for s in shapes)
+        else:
+            x0, y0, x1, y1 = 0, 0, 1, 1
+        prepared = [prep(s) for s in shapes]
+        tree = STRtree(shapes)
+        numbers = {id(s): i for i, s in enumerate(shapes)}
+        width, height = (x1 - x0) / cells, (y1 - y0) / cells
+        with stage('lookup.grid'):
+            for row in range(cells):
+                for column in range(cells):
+                    cell = box(
+                        x0 + column * width,
+                        y0 + row * height,
+                        x0 + (column + 1) * width,
+                        y0 + (row + 1) * height
+                    )
+                    found = []
+                    for c in sorted(_query(tree, cell, numbers)):
+                        if prepared[c].contains(cell):
+                            found = [c]
+                            owners[row, column] = c
+                            break
+                        if prepared[c].intersects(cell):
+                            found.append(c)
+                    if found and owners[row, column] == -1:
+                        owners[row, column] = -2 - (len(offsets) - 1)
+                        members.extend(found)
+                        offsets.append(len(members))
+        bounds = asarray([x0, y0, x1, y1], float64)
+        offsets, members = asarray(offsets, int64), asarray(members, int32)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        savez_compressed(path, bounds=bounds, owners=owners, offsets=offsets, members=members)
+        return bounds, owners, offsets, members
+
+
+def locate(
+    name: str,
+    points: ndarray,
+    processes: Optional[int] = None,
+    chunk: int = 1 << 20,
+    filters: Optional[Filters] = None
+) -> ndarray:
+    """
+    Пакетний пошук: точки діляться на частини по chunk і обробляються в пулі
+    процесів, кожен з яких будує (або читає з кешу) власний індекс шару
+    один раз. Для одного процесу пул не створюється.
+    """
+    points = asarray(points, float64)
+    processes = processes or cpu_count()
+    with stage('lookup.locate'):
+        if processes == 1 or len(points) <= chunk:
+            return Index(name, filters)(points)
+        parts = array_split(points, -(-len(points) // chunk))
+        with ProcessPoolExecutor(
+            processes,
+            initializer=_initialize,
+            initargs=(name, filters)
+        ) as pool:
+            return concatenate(list(map(absorb, pool.map(Traced(_locate), parts))))
+
+
+def main(names: List[str], size: int, processes: Optional[int]):
+    """
+    Консольний замір: випадкові точки в рамці області тегуються кожним
+    шаром, друкуються швидкість і кількість влучань.
+    """
+    rng = default_rng(42)
+    points = column_stack((rng.uniform(33, 37, size), rng.uniform(47, 49.5, size)))
+    for name in names:
+        Index(name)
+        start = default_timer()
+        result = locate(name, points, processes)
+        elapsed = default_timer() - start
+        print(
+            f'{name}: {size / elapsed / 1e6:.2f} M points/s, '
+            f'{int((result >= 0).sum())} inside'
+        )
+
+
+def _initialize(name: str, filters: Optional[Filters]):
+    global _worker
+    _worker = Index(name, filters)
+
+
+def _locate(points: ndarray) -> ndarray:
+    return _worker(points)
+
+
+def _query(tree: Any, geometry: Any, numbers: Dict[int, int]) -> List[int]:
+    """
+    Кандидати STRtree за перетином рамок: shapely 2 повертає номери
+    геометрій, а shapely 1.x - самі геометрії.
+    """
+    return [
+        int(r) if not hasattr(r, 'geom_type') else numbers[id(r)]
+        for r in tree.query(geometry)
+    ]
+
+
+def _polygons(geometry: Dict[str, Any]) -> List[Any]:
+    if geometry['type'] == 'Polygon':
+        return [geometry['coordinates']]
+    if geometry['type'] == 'MultiPolygon':
+        return geometry['coordinates']
+    return []
+
+
+if __name__ == '__main__':
+    parser = ArgumentParser(description='Bulk point-in-region lookup')
+    # Шари, за якими тегуються точки.
+    parser.add_argument('layers', nargs='*', default=['oblasts', 'cities'], help='layer names')
+    # Кількість випадкових точок для заміру.
+    parser.add_argument('-n', type=int, default=1 << 22, help='points count')
+    # Кількість процесів пулу (за замовчуванням - кількість ядер).
+    parser.add_argument('-p', type=int, help='processes count')
+    args = parser.parse_args()
+    main(args.layers, args.n, args.p)
@@ -1,23 +1,40 @@
+from argparse import ArgumentParser
 from json import loads, dumps
 from typing import Any, Dict, List
-from area import area, ring__area, polygon__area
+from numpy import abs as absolute, cumsum
 from shapely.geometry import shape, mapping
+from mathmodel.geodesy import areas, flatten, ring_areas
+from mathmodel.topology import build, simplify, geometries, encode
 
 
-def main():
+def main(is_topological: bool = False, tolerance: float = 0.008):
     whitelist = {'relation/2081686', 'relation/7388499'}
-    for layer in ['oblasts', 'cities', 'rivers', 'roads']:
+    layers = ['oblasts', 'cities', 'rivers', 'roads']
+    collections = {}
+    for layer in layers:
         with open(f'layers/{layer}.geojson') as stream:
             content = stream.read()
-        collection = loads(content)
+        collections[layer] = loads(content)
+    if is_topological:
+        optimized = iter(topological(collections, tolerance))
+    for layer in layers:
+        collection = collections[layer]
+        features = [
+            {
+                **f,
+                'geometry': (
+                    next(optimized)
+                    if is_topological else
+                    optimize(f['geometry'], tolerance)
+                )
+            }
+            for f in collection['features']
+        ]
         collection['features'] = [
             x
-            for x in (
-                {**f, 'geometry': optimize(f['geometry'])}
-                for f in collection['features']
-            )
+            for x, a in zip(features, areas([x['geometry'] for x in features]))
             if (
-                area(x['geometry']) >= 5e6 or
+                a >= 5e6 or
                 x['id'] in whitelist or
                 x['geometry']['type'] == 'LineString'
             )
@@ -33,29 +50,96 @@ def main():
             )
 
 
-def optimize(geometry: Dict[str, Any]) -> Dict[str, Any]:
-    figure = mapping(shape(geometry).simplify(0.008))
+def topological(
+    collections: Dict[str, Dict[str, Any]],
+    tolerance: float = 0.008
+) -> List[Dict[str, Any]]:
+    """
+    Спрощення з урахуванням топології: межі багатокутників усіх шарів
+    розбиваються на спільні дуги, кожна дуга спрощується один раз, а
+    багатокутники збираються з посилань на дуги, тож сусідні області
+    отримують однакові межі без щілин і накладань. Спрощена топологія
+    зберігається в layers/topology.json. Лінії спрощуються окремо, як і
+    раніше. Повертає геометрії всіх об'єктів у порядку шарів.
+    """
+    originals = [
+        f['geometry']
+        for collection in collections.values()
+        for f in collection['features']
+    ]
+    topology = build(originals)
+    simplified = simplify(topology, tolerance)
+    with open('layers/topology.json', 'w+') as stream:
+        stream.write(
+            dumps(
+                encode(
+                    simplified,
+                    [
+                        layer
+                        for layer, collection in collections.items()
+                        for _ in collection['features']
+                    ]
+                ),
+                ensure_ascii=False
+            )
+        )
+    return [
+        prune(g) if 'arcs' in t else optimize(o, tolerance)
+        for o, g, t in zip(
+            originals,
+            geometries(simplified, topology),
+            simplified.geometries
+        )
+    ]
+
+
+def optimize(
+    geometry: Dict[str, Any],
+    tolerance: float = 0.008,
+    part: float = 5e6,
+    hole: float = 1e6
+) -> Dict[str, Any]:
+    """
+    Спрощує геометрію з допуском у градусах і відкидає частини
+    мультиполігонів, менші за part, та отвори, менші за hole (у квадратних
+    метрах).
+    """
+    return prune(mapping(shape(geometry).simplify(tolerance)), part, hole)
+
+
+def prune(
+    figure: Dict[str, Any],
+    part: float = 5e6,
+    hole: float = 1e6
+) -> Dict[str, Any]:
     if figure['type'] == 'Polygon':
-        return {**figure, 'coordinates': coalesce(figure['coordinates'])}
+        return {**figure, 'coordinates': coalesce(figure['coordinates'], hole)}
     elif figure['type'] == 'MultiPolygon':
-        return {
-            **figure,
-            'coordinates': [
-                p
-                for p in map(coalesce, figure['coordinates'])
-                if polygon__area(p) >= 5e6
-            ]
-        }
+        polygons = figure['coordinates']
+        rings = absolute(ring_areas(*flatten(r for p in polygons for r in p)))
+        ends = cumsum([len(p) for p in polygons])
+        kept = []
+        for p, end in zip(polygons, ends):
+            a = rings[end - len(p):end]
+            if a[0] - a[1:][a[1:] >= hole].sum() >= part:
+                kept.append([r for i, r in enumerate(p) if i == 0 or a[i] >= hole])
+        return {**figure, 'coordinates': kept}
     return figure
 
 
-def coalesce(coordinates: List[List[List[float]]]) -> List[List[List[float]]]:
-    return [
-        r
-        for i, r in enumerate(coordinates)
-        if i == 0 or abs(ring__area(r)) >= 1e6
-    ]
+def coalesce(
+    coordinates: List[List[List[float]]],
+    hole: float = 1e6
+) -> List[List[List[float]]]:
+    a = absolute(ring_areas(*flatten(coordinates)))
+    return [r for i, r in enumerate(coordinates) if i == 0 or a[i] >= hole]
 
 
 if __name__ == '__main__':
-    main()
+    parser = ArgumentParser(description='Simplifies GeoJSON layers')
+    # Спрощує спільні межі багатокутників як дуги топології.
+    parser.add_argument('-t', action='store_true', help='topology-aware simplification')
+    # Допуск спрощення в градусах.
+    parser.add_argument('-s', type=float, default=0.008, help='tolerance')
+    args = parser.parse_args()
+    main(args.t, args.s)
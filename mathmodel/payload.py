@@ -0,0 +1,163 @@
+from __future__ import annotations
+from base64 import b64encode, b64decode
+from json import dumps
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple, TYPE_CHECKING
+from numpy import (
+    asarray, ndarray, frombuffer, round as quantize, float32, ones, diff, any as some,
+    iinfo, concatenate, full, nan
+)
+from mathmodel.profiling import stage, count
+
+if TYPE_CHECKING:
+    from plotly.graph_objs import Figure
+
+# Кількість знаків після коми для координат кожного шару (за назвою траси).
+# Для плоскої карти це градуси: 1e-4 градуса - близько 10 м, що менше за
+# піксель навіть на повноекранній карті області. Координати сфери задано в
+# одиницях радіуса 100, тож двох знаків досить.
+precision = {'oblasts': 4, 'cities': 4, 'rivers': 4, 'roads': 4}
+spherical = 2
+# Версія plotly.js, що вміє читати типізовані масиви {dtype, bdata}.
+_script = 'https://cdn.plot.ly/plotly-2.35.2.min.js'
+_page = '''<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<script src="{script}"></script>
+<style>html, body, #figure {{height: 100%; margin: 0}}</style>
+</head>
+<body>
+<div id="figure"></div>
+<script>
+const figure = {figure};
+Plotly.newPlot('figure', figure.data, figure.layout, {{responsive: true}});
+</script>
+</body>
+</html>
+'''
+
+
+def compact(
+    figure: Figure,
+    decimals: Optional[Dict[str, int]] = None,
+    default: int = 4
+) -> Dict[str, Any]:
+    """
+    Компактне подання фігури для браузера. Спершу сусідні (в порядку
+    накладання) лінійні траси з однаковим стилем зливаються в одну з
+    розривами NaN між частинами: карта з тисячами доріг інакше витрачає
+    більше байтів на повторені стилі, ніж на координати. Координати кожної траси
+    округлюються до точності її шару (decimals за назвою траси), після чого
+    з ліній і контурів видаляються послідовні вершини, що збіглися. Масиви
+    кодуються як base64-буфери float32 (координати) та найменшого достатнього
+    цілого типу (індекси трикутників Mesh3d), які plotly.js 2.x читає без
+    розбору десяткового тексту.
+    """
+    decimals = precision if decimals is None else decimals
+    content = figure.to_plotly_json()
+    content['data'] = _merge(content['data'])
+    for trace in content['data']:
+        kind = trace.get('type', 'scatter')
+        if kind not in {'scatter', 'scatter3d', 'mesh3d'}:
+            continue
+        keys = [k for k in ('x', 'y', 'z') if trace.get(k) is not None]
+        places = (
+            decimals.get(trace.get('name'), default)
+            if kind == 'scatter' else
+            spherical
+        )
+        columns = [quantize(_array(trace[k]).astype(float), places) for k in keys]
+        if kind != 'mesh3d' and columns and len(columns[0]) > 1:
+            kept = ones(len(columns[0]), bool)
+            kept[1:] = some(diff(columns, axis=1) != 0, axis=0)
+            count('payload.vertices', len(kept) - int(kept.sum()))
+            columns = [c[kept] for c in columns]
+        for k, c in zip(keys, columns):
+            trace[k] = _typed(c.astype(float32))
+        for k in ('i', 'j', 'k'):
+            if trace.get(k) is not None:
+                trace[k] = _typed(_integers(_array(trace[k])))
+    return content
+
+
+def write(
+    figure: Figure,
+    path: str,
+    decimals: Optional[Dict[str, int]] = None
+):
+    """
+    Записує компактну фігуру в самодостатню HTML-сторінку з plotly.js з CDN.
+    """
+    with stage('payload.write'):
+        content = dumps(compact(figure, decimals), separators=(',', ':'))
+        Path(path).write_text(_page.format(script=_script, figure=content))
+
+
+def _merge(traces: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Зливає послідовні траси scatter/scatter3d з однаковими властивостями
+    (окрім координат). Заливка toself для траси з розривами замикає кожну
+    частину окремо, тож багатокутники малюються так само.
+    """
+    groups: List[Tuple[Optional[str], List[Dict[str, Any]]]] = []
+    for trace in traces:
+        style = None
+        if trace.get('type', 'scatter') in {'scatter', 'scatter3d'}:
+            style = dumps(
+                {k: v for k, v in trace.items() if k not in {'x', 'y', 'z'}},
+                sort_keys=True,
+                default=str
+            )
+        if style is not None and groups and groups[-1][0] == style:
+            groups[-1][1].append(trace)
+        else:
+            groups.append((style, [trace]))
+    merged = []
+    for _, group in groups:
+        trace = group[0]
+        if len(group) > 1:
+            trace = {**trace}
+            for k in ('x', 'y', 'z'):
+                if trace.get(k) is not None:
+                    trace[k] = concatenate(
+                        [
+                            part
+                            for t in group
+                            for part in (_array(t[k]).astype(float), full(1, nan))
+                        ][:-1]
+                    )
+        merged.append(trace)
+    count('payload.traces', len(traces) - len(merged))
+    return merged
+
+
+def _array(value: Any) -> ndarray:
+    """
+    Масив траси: plotly 4 віддає списки чи масиви NumPy, а новіші версії -
+    вже закодовані буфери {dtype, bdata}.
+    """
+    if isinstance(value, dict) and 'bdata' in value:
+        return frombuffer(b64decode(value['bdata']), value['dtype'])
+    return asarray(value)
+
+
+def _integers(values: ndarray) -> ndarray:
+    """
+    Переводить невід'ємні індекси в найменший беззнаковий тип.
+    """
+    top = int(values.max()) if len(values) else 0
+    for kind in ('uint8', 'uint16'):
+        if top <= iinfo(kind).max:
+            return values.astype(kind)
+    return values.astype('uint32')
+
+
+def _typed(values: ndarray) -> Dict[str, str]:
+    """
+    Типізований масив у форматі plotly.js: код типу й base64 байтів.
+    """
+    return {
+        'dtype': values.dtype.str.lstrip('<>|='),
+        'bdata': b64encode(values.tobytes()).decode('ascii')
+    }
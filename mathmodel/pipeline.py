@@ -0,0 +1,47 @@
+from __future__ import annotations
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from multiprocessing import cpu_count, get_all_start_methods, get_context
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union, TYPE_CHECKING
+from mathmodel.profiling import stage
+
+if TYPE_CHECKING:
+    from plotly.graph_objs import Scatter, Mesh3d, Scatter3d
+    from mathmodel.layers import Layer
+
+
+def render2d(
+    layers: Sequence[Layer],
+    workers: Optional[int] = None
+) -> List[Tuple[List[Scatter], List[Dict[str, Any]]]]:
+    """
+    Одночасне завантаження шарів: кожен шар читається й розбирається у
+    власному потоці, тож очікування на диск перекривається з обробкою інших
+    шарів. Результати повертаються в порядку шарів, тобто в порядку їх
+    накладання на полотно.
+    """
+    with stage('pipeline.render2d'):
+        with ThreadPoolExecutor(workers or len(layers) or 1) as pool:
+            return list(pool.map(lambda layer: layer.render2d(), layers))
+
+
+def render3d(
+    layers: Sequence[Layer],
+    processes: Optional[int] = None
+) -> List[List[Union[Mesh3d, Scatter3d]]]:
+    """
+    Конвеєр для сферичних шарів. Потоки, по одному на шар, читають файли й
+    надсилають триангуляцію кожного багатокутника в спільний пул процесів,
+    тож CPU-важка робота utils.mesh усіх шарів виконується паралельно на
+    всіх ядрах, а час побудови прямує до часу найповільнішого шару замість
+    суми. Траси кожного шару збираються у вихідному порядку, а шари
+    повертаються в порядку накладання. Робітники пулу запускаються ліниво з
+    потоків шарів, тож fork багатопотокового процесу міг би успадкувати
+    захоплені іншими потоками блокування; тому процеси створюються через
+    forkserver (або spawn, де його немає).
+    """
+    methods = get_all_start_methods()
+    context = get_context('forkserver' if 'forkserver' in methods else 'spawn')
+    with stage('pipeline.render3d'):
+        with ProcessPoolExecutor(processes or cpu_count(), mp_context=context) as meshes:
+            with ThreadPoolExecutor(len(layers) or 1) as pool:
+                return list(pool.map(lambda layer: layer.render3d(meshes), layers))
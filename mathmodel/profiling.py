@@ -0,0 +1,185 @@
+from atexit import register
+from collections import defaultdict
+from contextlib import contextmanager
+from cProfile import Profile
+from functools import wraps
+from os import environ, getpid
+from sys import stderr
+from time import perf_counter
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, TypeVar
+
+F = TypeVar('F', bound=Callable)
+_enabled = False
+_path: Optional[str] = None
+_profile: Optional[Profile] = None
+_timings: Dict[str, List[float]] = defaultdict(lambda: [0, 0.0])
+_counters: Dict[str, int] = defaultdict(int)
+# Таймінги й лічильники, зібрані в іншому процесі (див. Traced).
+Collected = Tuple[Dict[str, List[float]], Dict[str, int]]
+
+
+def enable(path: Optional[str] = None):
+    """
+    Вмикає збір таймінгів і лічильників. Якщо передано шлях, додатково
+    запускається cProfile, чия статистика буде збережена у pstats-файл. Звіт
+    по етапах друкується в stderr під час завершення процесу.
+    """
+    global _enabled, _path, _profile
+    if not _enabled:
+        register(report)
+    _enabled, _path = True, path or None
+    if _path and _profile is None:
+        _profile = Profile()
+        _profile.enable()
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """
+    Контекстний менеджер, що додає час виконання блоку до етапу name. Коли
+    профілювання вимкнене, вся робота зводиться до перевірки одного прапора.
+    """
+    if not _enabled:
+        yield
+        return
+    start = perf_counter()
+    try:
+        yield
+    finally:
+        timing = _timings[name]
+        timing[0] += 1
+        timing[1] += perf_counter() - start
+
+
+def timed(name: str) -> Callable[[F], F]:
+    """
+    Декоратор-аналог stage для цілих функцій і методів.
+    """
+    def decorator(function: F) -> F:
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return function(*args, **kwargs)
+            start = perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                timing = _timings[name]
+                timing[0] += 1
+                timing[1] += perf_counter() - start
+
+        return wrapper
+
+    return decorator
+
+
+def count(name: str, n: int = 1):
+    """
+    Збільшує лічильник (кількість об'єктів, вершин, пікселів тощо).
+    """
+    if _enabled:
+        _counters[name] += n
+
+
+class Traced:
+    """
+    Обгортка функції для пулу процесів. Таймінги й лічильники, записані в
+    процесі-робітнику, лишаються в ньому, тож звіт батьківського процесу їх
+    не бачить. Обгортка запам'ятовує, чи ввімкнено профілювання в батьківському
+    процесі, вмикає збір у робітнику лише на час виклику й повертає разом
+    із результатом зібрані за виклик дані, які батьківський процес додає до
+    своїх функцією absorb. У процесі, що створив обгортку (наприклад, у пулі
+    потоків), функція викликається напряму, і дані пишуться одразу в спільні
+    таймінги. Обгортку можна серіалізувати pickle, якщо це можливо для самої
+    функції.
+    """
+    __slots__ = ['_function', '_is_enabled', '_pid']
+
+    def __init__(self, function: Callable):
+        self._function = function
+        self._is_enabled = _enabled
+        self._pid = getpid()
+
+    def __call__(self, *args, **kwargs) -> Tuple[Any, Optional[Collected]]:
+        global _enabled
+        if not self._is_enabled or getpid() == self._pid:
+            return self._function(*args, **kwargs), None
+        # Робітник, створений через fork, успадковує дані батьківського
+        # процесу, а перевикористаний - дані попередніх завдань.
+        _drain()
+        previous, _enabled = _enabled, True
+        try:
+            result = self._function(*args, **kwargs)
+        finally:
+            _enabled = previous
+        return result, _drain()
+
+
+def absorb(pair: Tuple[Any, Optional[Collected]]) -> Any:
+    """
+    Додає дані, зібрані обгорткою Traced в іншому процесі, до таймінгів і
+    лічильників поточного, й повертає результат виклику.
+    """
+    result, collected = pair
+    if collected is not None and _enabled:
+        timings, counters = collected
+        for name, (calls, seconds) in timings.items():
+            timing = _timings[name]
+            timing[0] += calls
+            timing[1] += seconds
+        for name, n in counters.items():
+            _counters[name] += n
+    return result
+
+
+def _drain() -> Collected:
+    """
+    Забирає накопичені таймінги й лічильники, очищуючи їх.
+    """
+    collected = {k: list(v) for k, v in _timings.items()}, dict(_counters)
+    _timings.clear()
+    _counters.clear()
+    return collected
+
+
+def report():
+    """
+    Друкує розбивку часу за етапами (вкладені етапи входять і в час
+    зовнішніх, тож назви побудовано ієрархічно) й значення лічильників, а також
+    зберігає статистику cProfile, якщо її збір було ввімкнено.
+    """
+    from tabulate import tabulate
+    if _profile is not None:
+        _profile.disable()
+        _profile.dump_stats(_path)
+    print(
+        tabulate(
+            [
+                [name, t[0], t[1], t[1] / t[0]]
+                for name, t in sorted(_timings.items(), key=lambda p: -p[1][1])
+            ],
+            headers=['stage', 'calls', 'seconds', 'mean'],
+            tablefmt='psql'
+        ),
+        file=stderr
+    )
+    if _counters:
+        print(
+            tabulate(
+                sorted(_counters.items()),
+                headers=['counter', 'value'],
+                tablefmt='psql'
+            ),
+            file=stderr
+        )
+
+
+# Змінна середовища MATHMODEL_PROFILE вмикає профілювання без змін у коді:
+# значення 1 друкує лише звіт, будь-який інший рядок - шлях для pstats.
+if environ.get('MATHMODEL_PROFILE'):
+    _variable = environ['MATHMODEL_PROFILE']
+    enable(None if _variable == '1' else _variable)
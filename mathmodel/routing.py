@@ -0,0 +1,314 @@
+from argparse import ArgumentParser
+from hashlib import sha1
+from heapq import heappush, heappop
+from json import loads
+from timeit import default_timer
+from pathlib import Path
+from typing import Dict, List, Sequence, Tuple
+from numpy import (
+    ndarray, asarray, concatenate, unique, radians, sin, cos, arcsin, sqrt, full,
+    where, ones, int64, float64, isinf, isfinite, argmax, minimum, maximum, fmax,
+    inf, load, savez_compressed, column_stack, bincount, errstate
+)
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import dijkstra, connected_components
+from scipy.spatial import cKDTree
+from tabulate import tabulate
+from mathmodel.geodesy import radius
+
+# Швидкості за замовчуванням (км/год) для доріг без тегу maxspeed.
+speeds = {'motorway': 110, 'trunk': 90, 'primary': 90}
+_layers_dir = Path(__file__).parent.parent / 'layers'
+_cache_dir = Path(__file__).parent.parent / '.cache/routing'
+
+
+class Graph:
+    """
+    Орієнтований граф дорожньої мережі у форматі CSR. Вузли - вершини
+    ламаних шару доріг, тож дороги з'єднуються там, де мають спільну (з
+    точністю до snap) вершину. Вага ребра - час проїзду в секундах: довжина за гаверсинусом,
+    поділена на maxspeed (або типову швидкість класу дороги). Дороги з
+    oneway=yes мають лише пряме ребро, oneway=-1 - лише зворотне. Для
+    прискорення A* заздалегідь рахуються відстані від і до кількох
+    орієнтирів (ALT): нерівність трикутника дає допустиму оцінку часу до
+    цілі, що відсікає більшу частину графа. Орієнтири зберігаються в
+    npz-кеші за хешем шару.
+    """
+    __slots__ = [
+        '_points', '_matrix', '_reverse', '_landmarks', '_forward', '_backward',
+        '_tree', '_component'
+    ]
+
+    def __init__(
+        self,
+        path: Path = _layers_dir / 'roads.geojson',
+        landmarks: int = 8,
+        snap: float = 1e-3
+    ):
+        """
+        Конструктор класу. Будує граф із GeoJSON-шару доріг і готує індекс
+        орієнтирів. Шар спрощено, тож кінці сусідніх доріг часто не
+        збігаються точно: вершини, ближчі за snap градусів (1e-3 - близько
+        100 м), зливаються в один вузол.
+        """
+        content = Path(path).read_bytes()
+        features = loads(content)['features']
+        lines = [
+            (asarray(f['geometry']['coordinates'], float64), f['properties'])
+            for f in features
+            if f['geometry']['type'] == 'LineString'
+        ]
+        coordinates = concatenate([c for c, _ in lines])
+        self._points, ids = _snap(coordinates, snap)
+        sources, targets, weights = [], [], []
+        offset = 0
+        for c, properties in lines:
+            a, b = ids[offset:offset + len(c) - 1], ids[offset + 1:offset + len(c)]
+            offset += len(c)
+            seconds = _haversine(c[:-1], c[1:]) / (_speed(properties) / 3.6)
+            a, b, seconds = a[a != b], b[a != b], seconds[a != b]
+            oneway = properties.get('oneway')
+            if oneway != '-1':
+                sources.append(a)
+                targets.append(b)
+                weights.append(seconds)
+            if oneway not in {'yes', 'true', '1'}:
+                sources.append(b)
+                targets.append(a)
+                weights.append(seconds)
+        sources, targets = concatenate(sources), concatenate(targets)
+        weights = concatenate(weights)
+        # Дублікати ребер між тими самими вузлами замінюються найкоротшим.
+        n = len(self._points)
+        keys = sources * n + targets
+        order = keys.argsort(kind='stable')
+        keys, weights = keys[order], weights[order]
+        first, positions = unique(keys, return_index=True)
+        best = minimum.reduceat(weights, positions)
+        self._matrix = csr_matrix(
+            (maximum(best, 1e-9), (first // n, first % n)),
+            shape=(n, n)
+        )
+        self._reverse = self._matrix.T.tocsr()
+        _, labels = connected_components(self._matrix, connection='weak')
+        self._component = labels == argmax(bincount(labels))
+        self._tree = cKDTree(self._project(self._points))
+        self._landmarks, self._forward, self._backward = self._index(
+            sha1(content + repr(snap).encode()).hexdigest(),
+            landmarks
+        )
+
+    def __len__(self) -> int:
+        return len(self._points)
+
+    @property
+    def points(self) -> ndarray:
+        return self._points
+
+    def nearest(self, lon: float, lat: float) -> int:
+        """
+        Найближчий до точки вузол найбільшої зв'язної компоненти графа.
+        """
+        k = min(64, len(self._points))
+        _, candidates = self._tree.query(self._project(asarray([[lon, lat]]))[0], k)
+        for c in candidates:
+            if self._component[c]:
+                return int(c)
+        return int(candidates[0])
+
+    def route(self, source: int, target: int) -> Tuple[float, List[int]]:
+        """
+        Найшвидший маршрут алгоритмом A* з евристикою ALT. Повертає час у
+        секундах і послідовність вузлів; для недосяжної цілі - inf і [].
+        """
+        h = self._estimates(target)
+        indptr, indices, data = self._matrix.indptr, self._matrix.indices, self._matrix.data
+        best = {source: 0.0}
+        parents: Dict[int, int] = {}
+        heap = [(h[source], source)]
+        closed = set()
+        while heap:
+            _, v = heappop(heap)
+            if v == target:
+                break
+            if v in closed:
+                continue
+            closed.add(v)
+            g = best[v]
+            for e in range(indptr[v], indptr[v + 1]):
+                u, w = indices[e], g + data[e]
+                if w < best.get(u, inf):
+                    best[u] = w
+                    parents[u] = v
+                    heappush(heap, (w + h[u], u))
+        if target not in best:
+            return inf, []
+        path = [target]
+        while path[-1] != source:
+            path.append(parents[path[-1]])
+        return best[target], path[::-1]
+
+    def table(self, sources: Sequence[int], targets: Sequence[int]) -> ndarray:
+        """
+        Матриця часу проїзду між множинами вузлів: по одному проходу
+        алгоритму Дейкстри (реалізація scipy на C) з кожного джерела.
+        """
+        distances = dijkstra(self._matrix, indices=asarray(sources, int64))
+        return distances[:, asarray(targets, int64)]
+
+    def _estimates(self, target: int) -> ndarray:
+        """
+        Оцінки знизу часу до цілі для всіх вузлів: для орієнтира L
+        d(v, t) >= d(L, t) - d(L, v) та d(v, t) >= d(v, L) - d(t, L).
+        Нескінченності (недосяжні пари) не беруть участі в оцінці.
+        """
+        with errstate(invalid='ignore'):
+            forward = self._forward[:, target][:, None] - self._forward
+            backward = self._backward - self._backward[:, target][:, None]
+        bounds = fmax(forward, backward)
+        bounds[~isfinite(bounds)] = 0
+        return maximum(bounds.max(0), 0)
+
+    def _index(self, key: str, count: int) -> Tuple[ndarray, ndarray, ndarray]:
+        """
+        Орієнтири обираються послідовно як найвіддаленіші (за часом у
+        неорієнтованому графі) від уже обраних, починаючи з довільного вузла
+        найбільшої компоненти. Для кожного рахуються часи до всіх вузлів
+        (прямий граф) і від усіх вузлів (транспонований граф).
+        """
+        path = _cache_dir / f'{key}-{count}.npz'
+        if path.exists():
+            with load(path) as archive:
+                return archive['landmarks'], archive['forward'], archive['backward']
+        undirected = self._matrix.maximum(self._reverse)
+        members = where(self._component)[0]
+        landmarks = [int(members[0])]
+        nearest = full(len(self._points), inf)
+        for _ in range(count):
+            d = dijkstra(undirected, indices=landmarks[-1])
+            nearest = minimum(nearest, d)
+            score = where(self._component & ~isinf(nearest), nearest, -1)
+            landmarks.append(int(argmax(score)))
+        landmarks = asarray(landmarks[1:], int64)
+        forward = dijkstra(self._matrix, indices=landmarks)
+        backward = dijkstra(self._reverse, indices=landmarks)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        savez_compressed(path, landmarks=landmarks, forward=forward, backward=backward)
+        return landmarks, forward, backward
+
+    def _project(self, points: ndarray) -> ndarray:
+        """
+        Рівнопроміжна проекція для пошуку найближчого вузла.
+        """
+        k = cos(radians(48))
+        return column_stack((points[:, 0] * k, points[:, 1]))
+
+
+def main(names: Sequence[str], route: Sequence[str]):
+    """
+    Консольний звіт: маршрут між двома містами або матриця часу проїзду (в
+    годинах) між переліченими містами, чи першими десятьма, якщо їх не
+    вказано.
+    """
+    graph, centers = Graph(), cities()
+    if route:
+        seconds, path = trip(graph, centers, *route)
+        print(f'{route[0]} -> {route[1]}: {seconds / 3600:.2f} h, {len(path)} nodes')
+        return
+    names = list(names) or list(centers)[:10]
+    nodes = [graph.nearest(*centers[n]) for n in names]
+    start = default_timer()
+    hours = graph.table(nodes, nodes) / 3600
+    elapsed = default_timer() - start
+    print(
+        tabulate(
+            [[n] + list(r) for n, r in zip(names, hours)],
+            headers=['from / to'] + names,
+            tablefmt='psql',
+            floatfmt='.2f'
+        )
+    )
+    print(f'{len(names) ** 2} pairs in {elapsed * 1000:.1f} ms')
+
+
+def trip(
+    graph: Graph,
+    centers: Dict[str, Tuple[float, float]],
+    origin: str,
+    destination: str
+) -> Tuple[float, ndarray]:
+    """
+    Найшвидший маршрут між двома містами: час у секундах і координати
+    вузлів шляху.
+    """
+    for name in (origin, destination):
+        if name not in centers:
+            raise ValueError(f'There\'re no cities with such a name: {name}')
+    seconds, path = graph.route(
+        graph.nearest(*centers[origin]),
+        graph.nearest(*centers[destination])
+    )
+    return seconds, graph.points[path]
+
+
+def cities(path: Path = _layers_dir / 'cities.geojson') -> Dict[str, Tuple[float, float]]:
+    """
+    Центри міст шару (центр обмежувальної рамки) за назвами.
+    """
+    from shapely.geometry import shape
+    centers = {}
+    for f in loads(Path(path).read_text())['features']:
+        name = f['properties'].get('name', '')
+        if name:
+            x0, y0, x1, y1 = shape(f['geometry']).bounds
+            centers[name] = (x0 + x1) / 2, (y0 + y1) / 2
+    return centers
+
+
+def _snap(coordinates: ndarray, tolerance: float) -> Tuple[ndarray, ndarray]:
+    """
+    Зливає точки, ближчі за tolerance (транзитивно), і повертає координати
+    вузлів (середні точок групи) та номер вузла для кожної точки.
+    """
+    points, ids = unique(coordinates, axis=0, return_inverse=True)
+    pairs = cKDTree(points).query_pairs(tolerance, output_type='ndarray')
+    n = len(points)
+    _, labels = connected_components(
+        csr_matrix((ones(len(pairs)), (pairs[:, 0], pairs[:, 1])), shape=(n, n)),
+        directed=False
+    )
+    sizes = bincount(labels)
+    nodes = column_stack(
+        (
+            bincount(labels, points[:, 0]) / sizes,
+            bincount(labels, points[:, 1]) / sizes
+        )
+    )
+    return nodes, labels[ids.ravel()]
+
+
+def _speed(properties: Dict[str, str]) -> float:
+    """
+    Швидкість у км/год за тегом maxspeed або класом дороги.
+    """
+    value = properties.get('maxspeed', '')
+    return float(value) if value.isdigit() else speeds.get(properties.get('highway'), 60)
+
+
+def _haversine(a: ndarray, b: ndarray) -> ndarray:
+    """
+    Відстані в метрах між відповідними точками (довгота, широта).
+    """
+    lon1, lat1, lon2, lat2 = map(radians, (a[:, 0], a[:, 1], b[:, 0], b[:, 1]))
+    h = sin((lat2 - lat1) / 2) ** 2 + cos(lat1) * cos(lat2) * sin((lon2 - lon1) / 2) ** 2
+    return 2 * radius * arcsin(sqrt(h))
+
+
+if __name__ == '__main__':
+    parser = ArgumentParser(description='Routing over the roads layer')
+    # Міста для матриці часу проїзду.
+    parser.add_argument('cities', nargs='*', help='city names')
+    # Пара міст для окремого маршруту.
+    parser.add_argument('-r', nargs=2, default=[], help='route origin and destination')
+    args = parser.parse_args()
+    main(args.cities, args.r)
@@ -0,0 +1,151 @@
+from argparse import ArgumentParser
+from pathlib import Path
+from typing import Iterator, Optional, Tuple, Union
+from numpy import (
+    ndarray, asarray, float64, load, zeros, full, maximum, sqrt, where, arange,
+    argpartition, argsort, concatenate, empty, int64, inf
+)
+from tabulate import tabulate
+
+Source = Union[str, Path, ndarray]
+
+
+def main(
+    source: str,
+    k: int,
+    weights: Optional[ndarray],
+    is_normalized: bool,
+    size: int
+):
+    """
+    Консольний звіт: k найкращих сутностей, тобто найближчих до еталона.
+    """
+    if weights is not None and is_normalized:
+        weights = weights / weights.sum()
+    indices, scores = rank(source, weights, k, size)
+    print(
+        tabulate(
+            [['rank', 'row', 'score']] +
+            [[i + 1, r, s] for i, (r, s) in enumerate(zip(indices, scores))],
+            headers='firstrow',
+            tablefmt='psql',
+            numalign='right'
+        )
+    )
+
+
+def chunks(source: Source, size: int = 100000) -> Iterator[ndarray]:
+    """
+    Порційне читання таблиці ознак: рядки - сутності, стовпці - ознаки. CSV
+    читається через pandas із chunksize, Parquet - пакетами pyarrow, а
+    npy-файл відкривається як memmap, тож у пам'яті одночасно перебуває лише
+    одна порція. Масив NumPy, переданий напряму, просто нарізається.
+    """
+    if isinstance(source, ndarray):
+        for i in range(0, len(source), size):
+            yield asarray(source[i:i + size], float64)
+        return
+    path = Path(source)
+    if path.suffix == '.csv':
+        from pandas import read_csv
+        for frame in read_csv(path, chunksize=size):
+            yield frame.to_numpy(float64)
+    elif path.suffix == '.parquet':
+        from pyarrow.parquet import ParquetFile
+        for batch in ParquetFile(path).iter_batches(batch_size=size):
+            yield batch.to_pandas().to_numpy(float64)
+    elif path.suffix == '.npy':
+        table = load(path, mmap_mode='r')
+        for i in range(0, len(table), size):
+            yield asarray(table[i:i + size], float64)
+    else:
+        raise ValueError(f'Unsupported feature table format: {path.suffix}')
+
+
+def moments(
+    source: Source,
+    size: int = 100000
+) -> Tuple[int, ndarray, ndarray, ndarray]:
+    """
+    Перший прохід: кількість рядків, середні, стандартні відхилення й
+    максимуми кожної ознаки. Порції об'єднуються за формулою Чана для
+    паралельного алгоритму Велфорда, тому похибка не накопичується так, як
+    у наївній сумі квадратів. Як і в sklearn.preprocessing.scale,
+    відхилення рахується зі зміщеною оцінкою, а нульове замінюється одиницею.
+    """
+    count, mean, m2, top = 0, None, None, None
+    for chunk in chunks(source, size):
+        n = len(chunk)
+        if n == 0:
+            continue
+        if mean is None:
+            mean, m2 = zeros(chunk.shape[1]), zeros(chunk.shape[1])
+            top = full(chunk.shape[1], -inf)
+        local = chunk.mean(0)
+        delta = local - mean
+        total = count + n
+        mean = mean + delta * n / total
+        m2 = m2 + ((chunk - local) ** 2).sum(0) + delta ** 2 * count * n / total
+        top = maximum(top, chunk.max(0))
+        count = total
+    if mean is None:
+        raise ValueError('Feature table is empty')
+    std = sqrt(m2 / count)
+    return count, mean, where(std == 0, 1, std), top
+
+
+def rank(
+    source: Source,
+    weights: Optional[ndarray] = None,
+    k: int = 10,
+    size: int = 100000
+) -> Tuple[ndarray, ndarray]:
+    """
+    Таксонометричний метод для таблиць довільного розміру. Після першого
+    проходу ознаки стандартизуються порціями, а еталоном стає покомпонентний
+    максимум стандартизованих значень, що дорівнює стандартизованому
+    максимуму. На другому проході для кожної порції рахуються (зважені)
+    квазівідстані до еталона, як у taxonometry.score, і лише k найменших
+    з них переносяться в наступну ітерацію. Повертає номери рядків і оцінки
+    k найкращих сутностей у порядку зростання відстані.
+    """
+    _, mean, std, top = moments(source, size)
+    standard = (top - mean) / std
+    best_rows, best_scores = empty((0,), int64), empty((0,))
+    offset = 0
+    for chunk in chunks(source, size):
+        squares = ((chunk - mean) / std - standard) ** 2
+        if weights is not None:
+            squares *= weights
+        scores = squares.sum(1)
+        rows = concatenate((best_rows, arange(offset, offset + len(chunk))))
+        scores = concatenate((best_scores, scores))
+        if len(scores) > k:
+            kept = argpartition(scores, k - 1)[:k]
+            rows, scores = rows[kept], scores[kept]
+        best_rows, best_scores = rows, scores
+        offset += len(chunk)
+    order = argsort(best_scores, kind='stable')
+    return best_rows[order], best_scores[order]
+
+
+if __name__ == '__main__':
+    parser = ArgumentParser(description='Taxonometric ranking of large feature tables')
+    # Шлях до таблиці ознак (CSV, Parquet або npy).
+    parser.add_argument('source', help='feature table path')
+    # Кількість найкращих сутностей у звіті.
+    parser.add_argument('-k', type=int, default=10, help='number of best rows')
+    # Ваги ознак; без них рахуються незважені оцінки.
+    parser.add_argument('-w', type=float, nargs='*', help='feature weights')
+    # Нормалізує ваги так, аби їх сума дорівнювала одиниці.
+    parser.add_argument('-n', action='store_true', help='normalize weights')
+    # Кількість рядків в одній порції.
+    parser.add_argument('-s', type=int, default=100000, help='chunk size')
+    args = parser.parse_args()
+    main(
+        args.source,
+        args.k,
+        None if not args.w else asarray(args.w, float64),
+        args.n,
+        args.s
+    )
@@ -0,0 +1,125 @@
+from asyncio import (
+    StreamReader, StreamWriter, LimitOverrunError, get_running_loop, start_server,
+    run, wait_for, TimeoutError as Timeout
+)
+from email.utils import formatdate
+from hashlib import sha1
+from typing import Callable, Dict, Optional, Tuple
+from urllib.parse import unquote, urlsplit
+from mathmodel.caching import LRU
+
+# Обробник отримує шлях запиту й повертає тіло відповіді із заголовками
+# (Content-Type, Content-Encoding тощо) або None, якщо ресурсу немає.
+Response = Tuple[bytes, Dict[str, str]]
+Handler = Callable[[str], Optional[Response]]
+_reasons = {200: 'OK', 304: 'Not Modified', 404: 'Not Found', 405: 'Method Not Allowed'}
+
+
+def serve(
+    handler: Handler,
+    host: str = '127.0.0.1',
+    port: int = 8000,
+    size: int = 1024,
+    timeout: float = 15
+):
+    """
+    Запускає мінімальний HTTP/1.1-сервер на asyncio для статичних за змістом
+    ресурсів на кшталт тайлів. Обробник - звичайна блокувальна функція: він
+    виконується в пулі потоків, тож повільна генерація одного ресурсу не
+    зупиняє решту з'єднань. Готові відповіді зберігаються в LRU-кеші на size
+    записів разом з ETag (SHA-1 тіла), а запит з If-None-Match, що збігається
+    з ним, отримує порожню відповідь 304. З'єднання тримаються відкритими між
+    запитами (keep-alive) і закриваються після timeout секунд простою.
+    """
+    cache = LRU(size)
+
+    async def respond(reader: StreamReader, writer: StreamWriter):
+        try:
+            while True:
+                head = await wait_for(reader.readuntil(b'\r\n\r\n'), timeout)
+                lines = head.decode('latin-1').split('\r\n')
+                method, target, version = lines[0].split(' ', 2)
+                headers = {
+                    k.strip().lower(): v.strip()
+                    for k, v in (
+                        line.split(':', 1) for line in lines[1:] if ':' in line
+                    )
+                }
+                path = unquote(urlsplit(target).path)
+                if method not in {'GET', 'HEAD'}:
+                    status, body, extra = 405, b'', {'Allow': 'GET, HEAD'}
+                else:
+                    entry = cache.get(path)
+                    if entry is None:
+                        response = await get_running_loop().run_in_executor(
+                            None,
+                            handler,
+                            path
+                        )
+                        if response is not None:
+                            body, extra = response
+                            entry = body, {
+                                **extra,
+                                'ETag': f'"{sha1(body).hexdigest()}"'
+                            }
+                            cache.put(path, entry)
+                    if entry is None:
+                        status, body, extra = 404, b'', {}
+                    elif entry[1]['ETag'] in _tags(headers.get('if-none-match')):
+                        status, body, extra = 304, b'', {'ETag': entry[1]['ETag']}
+                    else:
+                        status, (body, extra) = 200, entry
+                is_closed = (
+                    headers.get('connection', '').lower() == 'close' or
+                    version == 'HTTP/1.0'
+                )
+                writer.write(
+                    _head(status, len(body), extra, is_closed) +
+                    (b'' if method == 'HEAD' else body)
+                )
+                await writer.drain()
+                if is_closed:
+                    break
+        except (Timeout, ConnectionError, LimitOverrunError, ValueError, EOFError):
+            pass
+        finally:
+            writer.close()
+
+    async def listen():
+        server = await start_server(respond, host, port)
+        print(f'Serving on http://{host}:{port}/')
+        async with server:
+            await server.serve_forever()
+
+    try:
+        run(listen())
+    except KeyboardInterrupt:
+        pass
+
+
+def _tags(value: Optional[str]) -> Tuple[str, ...]:
+    """
+    Розбирає список ETag із заголовка If-None-Match.
+    """
+    return () if not value else tuple(t.strip() for t in value.split(','))
+
+
+def _head(
+    status: int,
+    length: int,
+    headers: Dict[str, str],
+    is_closed: bool
+) -> bytes:
+    """
+    Формує рядок статусу й заголовки відповіді.
+    """
+    lines = [
+        f'HTTP/1.1 {status} {_reasons[status]}',
+        f'Date: {formatdate(usegmt=True)}',
+        f'Content-Length: {length}',
+        'Cache-Control: no-cache',
+        f'Connection: {"close" if is_closed else "keep-alive"}',
+        'Access-Control-Allow-Origin: *'
+    ]
+    lines.extend(f'{k}: {v}' for k, v in headers.items())
+    return ('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1')
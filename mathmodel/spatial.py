@@ -1,13 +1,21 @@
 from argparse import ArgumentParser
+from hashlib import sha1
+from typing import Dict, Tuple
 from numpy import (
-    full, reshape, ndarray, hstack, vstack, amin, amax, array, repeat, tile, zeros
+    full, reshape, ndarray, hstack, vstack, amin, amax, repeat, tile, zeros, frombuffer,
+    uint8
 )
 from plotly.graph_objs import Scatter, Scatter3d, Mesh3d, Figure
 from cv2 import (
-    imread, COLOR_BGR2GRAY, RETR_TREE, CHAIN_APPROX_SIMPLE, cvtColor, threshold,
-    findContours
+    imdecode, IMREAD_COLOR, COLOR_BGR2GRAY, RETR_TREE, CHAIN_APPROX_SIMPLE, cvtColor,
+    threshold, findContours
 )
-from mathmodel.utils import inflate, mesh
+from mathmodel.utils import (
+    inflate, mesh, cone_faces, cylinder_faces, dual_cone_faces
+)
+
+# Кеш контурів, проіндексований за хешем вмісту зображення й порогом.
+_contours: Dict[Tuple[str, int], ndarray] = {}
 
 
 def frame_plane_2d():
@@ -29,27 +37,42 @@ def frame_plane_2d():
     figure.show()
 
 
-def contour(is_closed=True) -> ndarray:
+def contour(
+    is_closed: bool = True,
+    path: str = 'images/shape.png',
+    level: int = 200
+) -> ndarray:
     """
     Функція читання контуру необхідного зображення з картинки, аналог ginput в Matlab.
     Бібліотечні алгоритми "комп'ютерного зору" переводять картинку в чорно-білу шкалу й
     відокремлюють найбільший із контурів, який відповідає зовнішньому кільцю. При
     потребі масив 2D-точок можна закільцювати, це необхідно лінійним графікам.
+    Результат кешується за SHA-1 вмісту файлу й порогом бінаризації, тож повторні
+    виклики не декодують картинку й не шукають контури наново, а зміна зображення
+    автоматично інвалідує запис.
     """
-    shape = max(
-        findContours(
-            threshold(
-                cvtColor(imread('images/shape.png'), COLOR_BGR2GRAY),
-                200,
-                255,
-                0
-            )[1],
-            RETR_TREE,
-            CHAIN_APPROX_SIMPLE
-        )[0],
-        key=len
-    )
-    shape = reshape(shape, (shape.shape[0], 2))
+    with open(path, 'rb') as stream:
+        content = stream.read()
+    key = sha1(content).hexdigest(), level
+    if key not in _contours:
+        image = imdecode(frombuffer(content, uint8), IMREAD_COLOR)
+        shape = max(
+            findContours(
+                threshold(
+                    cvtColor(image, COLOR_BGR2GRAY),
+                    level,
+                    255,
+                    0
+                )[1],
+                RETR_TREE,
+                CHAIN_APPROX_SIMPLE
+            )[0],
+            key=len
+        )
+        shape = reshape(shape, (shape.shape[0], 2))
+        shape.setflags(write=False)
+        _contours[key] = shape
+    shape = _contours[key]
     return vstack((shape, shape[:1])) if is_closed else shape
 
 
@@ -136,7 +159,7 @@ def surface_cone():
     figure = Figure()
     shape = contour(False)
     x, y = shape[:, 0], shape[:, 1]
-    ijk = array([[i, (i + 1) % len(shape), len(shape)] for i in range(len(shape))])
+    ijk = cone_faces(len(shape))
     figure.add_trace(
         Mesh3d(
             x=hstack((x, [(amin(x) + amax(x)) / 2])),
@@ -162,9 +185,7 @@ def surface_cylinder():
     """
     figure = Figure()
     shape = repeat(contour(False), 2, 0)
-    ijk = array(
-        [[i, (i + 1) % len(shape), (i + 2) % len(shape)] for i in range(len(shape))]
-    )
+    ijk = cylinder_faces(len(shape))
     figure.add_trace(
         Mesh3d(
             x=shape[:, 0],
@@ -189,12 +210,7 @@ def surface_cone_dual():
     figure = Figure()
     shape = contour(False)
     x, y = shape[:, 0], shape[:, 1]
-    ijk = array(
-        [
-            [j + i * len(shape), (j + 1) % len(shape) + i * len(shape), 2 * len(shape)]
-            for i in range(2) for j in range(len(shape))
-        ]
-    )
+    ijk = dual_cone_faces(len(shape))
     figure.add_trace(
         Mesh3d(
             x=hstack((x, x, [(amin(x) + amax(x)) / 2])),
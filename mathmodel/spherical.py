@@ -1,19 +1,46 @@
-from plotly.graph_objs import Figure
-from mathmodel.layers import Layer
+from __future__ import annotations
+from argparse import ArgumentParser
+from typing import Optional, TYPE_CHECKING
+from mathmodel.profiling import enable, stage
 
+if TYPE_CHECKING:
+    from plotly.graph_objs import Figure
 
-def main():
+
+def main(path: Optional[str] = None, tolerance: Optional[float] = 1e-7):
+    """
+    Показує глобус у браузері або записує його у файл, якщо передано шлях.
+    """
+    figure = build(tolerance=tolerance)
+    if path:
+        from mathmodel.export import write
+        write(figure, path)
+        return
+    with stage('spherical.show'):
+        figure.show()
+
+
+def build(
+    is_roads_visible: bool = True,
+    tolerance: Optional[float] = 1e-7
+) -> Figure:
     """
     Це - головна функція рендерингу 3D-об'єктів. Код майже ідентичний до модуля
     з ГІС, але єдина відмінність - у повноцінній відмальовці усіх рівнів на
-    сферичній поверхні.
+    сферичній поверхні. Допуск tolerance (відносно радіуса сфери) задає
+    адаптивну тріангуляцію заповнених ділянок; None повертає випадкове
+    заповнення utils.mesh.
     """
+    from plotly.graph_objs import Figure
+    from mathmodel.layers import Layer
+    from mathmodel.pipeline import render3d
     layers = [
         Layer(
             'oblasts',
             outer_fill_color='#ebf2e7',
             outer_line_color='#b46198',
-            outer_line_width=2
+            outer_line_width=2,
+            tolerance=tolerance
         ),
         Layer(
             'cities',
@@ -21,7 +48,8 @@ def main():
             outer_line_color='#656464',
             outer_line_width=1,
             inner_fill_color='#ebf2e7',
-            inner_line_color='#ebf2e7'
+            inner_line_color='#ebf2e7',
+            tolerance=tolerance
         ),
         Layer(
             'rivers',
@@ -30,21 +58,34 @@ def main():
             outer_line_width=1,
             inner_fill_color='#ebf2e7',
             inner_line_color='#2a5eea',
-            inner_line_width=1
+            inner_line_width=1,
+            tolerance=tolerance
         ),
         Layer(
             'roads',
+            is_visible=is_roads_visible,
             outer_line_color='#ffb732',
             outer_line_width=2
         )
     ]
     figure = Figure()
-    for layer in layers:
-        figure.add_traces(layer.render3d())
+    for traces in render3d(layers):
+        with stage('spherical.figure'):
+            figure.add_traces(traces)
     figure.update_layout(showlegend=False)
     figure.update_yaxes(scaleanchor='x', scaleratio=1.5)
-    figure.show()
+    return figure
 
 
 if __name__ == '__main__':
-    main()
+    parser = ArgumentParser(description='Renders GIS layers projected on a sphere')
+    # Допустима хордова похибка мешів відносно радіуса сфери.
+    parser.add_argument('-t', type=float, default=1e-7, help='mesh tolerance')
+    # Записує глобус у файл (PNG, SVG, PDF, HTML) замість показу в браузері.
+    parser.add_argument('-e', help='export path')
+    # Вмикає профілювання; необов'язкове значення - шлях для pstats-файлу.
+    parser.add_argument('--profile', nargs='?', const='', help='profile stages')
+    args = parser.parse_args()
+    if args.profile is not None:
+        enable(args.profile)
+    main(args.e, args.t)
@@ -1,22 +1,31 @@
-from numpy import array, arange, cov, corrcoef
+from argparse import ArgumentParser
+from typing import Optional
+from numpy import array, arange, column_stack, load, ndarray
 from plotly.graph_objs import Figure, Scatter
 from tabulate import tabulate
+from mathmodel.streaming import Moments, rolling, decimate
+
+# Вибірки, на яких демонструються статистичні показники.
+x0 = array([95, 116, 150, 87, 52, 156, 173, 41, 54, 197, 149, 16, 92, 198, 108, 39, 124])
+x1 = array([114, 110, 99, 109, 128, 112, 85, 107, 142, 114, 71, 104, 155, 118, 58, 99, 167])
 
 
 def main():
-    # Ініціалізуємо вибірки й масив індексів.
-    x0 = array([95, 116, 150, 87, 52, 156, 173, 41, 54, 197, 149, 16, 92, 198, 108, 39, 124])
-    x1 = array([114, 110, 99, 109, 128, 112, 85, 107, 142, 114, 71, 104, 155, 118, 58, 99, 167])
+    # Ініціалізуємо масив індексів.
     ix = arange(0, len(x0))
 
+    # Моменти рахуються інкрементально, тож так само обробляються й потоки.
+    moments = Moments().update(column_stack((x0, x1)))
+    mean, var, std = moments.mean, moments.var(), moments.std()
+
     # Виведення статистичних показників x0 і x1 у stdout.
     print(
         tabulate(
             [
                 ['x0', 'x1'],
-                ['mean', x0.mean(), x1.mean()],
-                ['var', x0.var(), x1.var()],
-                ['std', x0.std(), x1.std()],
+                ['mean', mean[0], mean[1]],
+                ['var', var[0], var[1]],
+                ['std', std[0], std[1]],
             ],
             headers='firstrow',
             tablefmt='psql',
@@ -28,9 +37,50 @@ def main():
     figure = Figure()
     figure.add_trace(Scatter(x=ix, y=x0, mode='lines+markers', name='x0'))
     figure.add_trace(Scatter(x=ix, y=x1, mode='lines+markers', name='x1'))
-    figure.update_layout(title=f'cov = {cov(x0, x1)[0][1]:.4f}, cor = {corrcoef(x0, x1)[0][1]:.4f}')
+    figure.update_layout(
+        title=f'cov = {moments.cov()[0][1]:.4f}, cor = {moments.corr()[0][1]:.4f}'
+    )
+    figure.show()
+
+
+def drift(window: int = 5, samples: Optional[ndarray] = None, limit: int = 2000):
+    """
+    Дрейф кореляції двох рядів у ковзному вікні. Статистики всіх вікон
+    рахуються за один прохід через кумулятивні суми, а довгий результат
+    проріджується до limit точок зі збереженням локальних екстремумів, аби
+    графік лишався легким навіть для мільйонів спостережень.
+    """
+    samples = column_stack((x0, x1)) if samples is None else samples
+    _, cov, corr = rolling(samples, window)
+    ix = arange(window - 1, len(samples))
+    kept = decimate(corr[:, 0, 1], limit)
+    figure = Figure()
+    figure.add_trace(
+        Scatter(x=ix[kept], y=corr[kept, 0, 1], mode='lines', name='cor')
+    )
+    figure.update_layout(
+        title=(
+            f'window = {window}, last cov = {cov[-1][0][1]:.4f}, '
+            f'last cor = {corr[-1][0][1]:.4f}'
+        )
+    )
     figure.show()
 
 
 if __name__ == '__main__':
-    main()
+    parser = ArgumentParser(description='Descriptive statistics of two samples')
+    # Аргумент командного рядка для ідентифікації обраного графіка.
+    parser.add_argument(
+        '-g',
+        default='summary',
+        help='graph name (available ones: summary, drift)'
+    )
+    # Довжина ковзного вікна для графіка дрейфу.
+    parser.add_argument('-w', type=int, default=5, help='rolling window length')
+    # Необов'язковий npy-файл із матрицею N x 2 замість вбудованих вибірок.
+    parser.add_argument('-i', help='samples path (npy, N x 2)')
+    args = parser.parse_args()
+    if args.g == 'drift':
+        drift(args.w, None if args.i is None else load(args.i, mmap_mode='r'))
+    else:
+        main()
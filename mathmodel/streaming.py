@@ -0,0 +1,280 @@
+from itertools import islice
+from typing import Iterable, Optional, Tuple
+from numpy import (
+    ndarray, asarray, float64, zeros, outer, sqrt, diag, atleast_2d, cumsum, einsum,
+    diagonal, ceil, arange, nanargmin, nanargmax, unique, concatenate, full, nan,
+    where, errstate, finfo
+)
+
+
+class Moments:
+    """
+    Інкрементальні описові статистики кількох рядів одночасно: кількість
+    спостережень, вектор середніх і матриця центрованих змішаних моментів,
+    з якої отримуються дисперсії, коваріації й кореляції. Дані надходять
+    порціями (рядки - спостереження, стовпці - ряди) й об'єднуються за
+    паралельною формулою Чана, узагальненням алгоритму Велфорда, тож жодна
+    порція не зберігається після обробки, а проміжні результати незалежних
+    процесів можна злити методом merge.
+    """
+    __slots__ = ['_count', '_mean', '_comoment']
+
+    def __init__(self, width: Optional[int] = None):
+        """
+        Конструктор класу. Кількість рядів можна не вказувати - вона
+        визначиться першою порцією.
+        """
+        self._count = 0
+        self._mean = None if width is None else zeros((width,))
+        self._comoment = None if width is None else zeros((width, width))
+
+    def update(self, chunk: ndarray) -> 'Moments':
+        """
+        Додає порцію спостережень. Одновимірний масив вважається одним рядом.
+        """
+        chunk = asarray(chunk, float64)
+        if chunk.ndim == 1:
+            chunk = chunk[:, None]
+        if len(chunk) == 0:
+            return self
+        mean = chunk.mean(0)
+        centered = chunk - mean
+        self._absorb(len(chunk), mean, centered.T @ centered)
+        return self
+
+    def ingest(self, samples: Iterable, size: int = 65536) -> 'Moments':
+        """
+        Поглинає довільний потік спостережень (чисел або рядків чисел),
+        групуючи його в порції по size елементів.
+        """
+        iterator = iter(samples)
+        while True:
+            batch = list(islice(iterator, size))
+            if not batch:
+                return self
+            self.update(asarray(batch, float64))
+
+    def merge(self, other: 'Moments') -> 'Moments':
+        """
+        Повертає нові статистики, що відповідають об'єднанню обох вибірок.
+        """
+        result = Moments()
+        for moments in (self, other):
+            if moments._count > 0:
+                result._absorb(moments._count, moments._mean, moments._comoment)
+        return result
+
+    def _absorb(self, count: int, mean: ndarray, comoment: ndarray):
+        """
+        Формула Чана для злиття двох наборів моментів.
+        """
+        if self._count == 0:
+            self._count, self._mean, self._comoment = count, mean.copy(), comoment.copy()
+            return
+        total = self._count + count
+        delta = mean - self._mean
+        self._comoment = (
+            self._comoment + comoment + outer(delta, delta) * self._count * count / total
+        )
+        self._mean = self._mean + delta * count / total
+        self._count = total
+
+    @property
+    def count(self) -> int:
+        return self._count
+
+    @property
+    def mean(self) -> ndarray:
+        return self._mean
+
+    def cov(self, ddof: int = 1) -> ndarray:
+        """
+        Коваріаційна матриця; як і numpy.cov, за замовчуванням незміщена.
+        """
+        return self._comoment / (self._count - ddof)
+
+    def var(self, ddof: int = 0) -> ndarray:
+        """
+        Дисперсії рядів; як і ndarray.var, за замовчуванням зміщені.
+        """
+        return diag(self._comoment) / (self._count - ddof)
+
+    def std(self, ddof: int = 0) -> ndarray:
+        return sqrt(self.var(ddof))
+
+    def corr(self) -> ndarray:
+        """
+        Кореляційна матриця Пірсона, аналог numpy.corrcoef.
+        """
+        scale = sqrt(diag(self._comoment))
+        return atleast_2d(self._comoment / outer(scale, scale))
+
+
+class Rolling:
+    """
+    Статистики ковзного вікна останніх window спостережень із O(1) роботою на
+    кожне нове значення. Кільцевий буфер зберігає вікно, а середні й змішані
+    моменти оновлюються формулою Велфорда при додаванні нового спостереження
+    й оберненою до неї формулою при витісненні найстарішого. Щоб похибки
+    округлення не накопичувались на довгих рядах, кожні refresh оновлень
+    моменти перераховуються з буфера - це теж O(1) в амортизованому сенсі.
+    """
+    __slots__ = [
+        '_window',
+        '_refresh',
+        '_buffer',
+        '_position',
+        '_count',
+        '_updates',
+        '_mean',
+        '_comoment'
+    ]
+
+    def __init__(
+        self,
+        window: int,
+        width: int = 2,
+        refresh: Optional[int] = None
+    ):
+        """
+        Конструктор класу. Приймає довжину вікна, кількість рядів і період
+        точного перерахунку моментів (за замовчуванням - довжина вікна).
+        """
+        self._window = window
+        self._refresh = refresh or window
+        self._buffer = zeros((window, width))
+        self._position = 0
+        self._count = 0
+        self._updates = 0
+        self._mean = zeros((width,))
+        self._comoment = zeros((width, width))
+
+    def push(self, sample: ndarray) -> 'Rolling':
+        """
+        Додає одне спостереження (вектор значень усіх рядів).
+        """
+        sample = asarray(sample, float64)
+        if self._count == self._window:
+            old = self._buffer[self._position].copy()
+            self._count -= 1
+            if self._count == 0:
+                # Вікно з одного спостереження: після витіснення воно порожнє.
+                self._mean = zeros(self._mean.shape)
+                self._comoment = zeros(self._comoment.shape)
+            else:
+                mean = self._mean - (old - self._mean) / self._count
+                self._comoment -= outer(old - mean, old - self._mean)
+                self._mean = mean
+        self._buffer[self._position] = sample
+        self._position = (self._position + 1) % self._window
+        self._count += 1
+        delta = sample - self._mean
+        self._mean = self._mean + delta / self._count
+        self._comoment += outer(delta, sample - self._mean)
+        self._updates += 1
+        if self._updates % self._refresh == 0:
+            window = self._buffer[:self._count]
+            self._mean = window.mean(0)
+            centered = window - self._mean
+            self._comoment = centered.T @ centered
+        return self
+
+    @property
+    def count(self) -> int:
+        return self._count
+
+    @property
+    def mean(self) -> ndarray:
+        return self._mean
+
+    def cov(self, ddof: int = 1) -> ndarray:
+        return self._comoment / (self._count - ddof)
+
+    def var(self, ddof: int = 0) -> ndarray:
+        return diag(self._comoment) / (self._count - ddof)
+
+    def corr(self) -> ndarray:
+        """
+        Кореляційна матриця вікна; для ряду, сталого у вікні, - NaN, як у
+        numpy.corrcoef, навіть якщо його дисперсія - лише шум округлення.
+        Поріг шуму береться зі стану вікна за O(1): центрований момент, не
+        більший за eps * count * mean^2, відповідає значенням, що
+        відрізняються від середнього лише на одиниці останнього розряду.
+        """
+        tiny = finfo(float64).eps * self._count * self._mean ** 2
+        return atleast_2d(_correlation(_flatten(self._comoment, tiny)))
+
+
+def rolling(
+    x: ndarray,
+    window: int,
+    ddof: int = 1
+) -> Tuple[ndarray, ndarray, ndarray]:
+    """
+    Пакетний режим ковзних статистик для цілого масиву (рядки - спостереження,
+    стовпці - ряди) через кумулятивні суми значень і їх попарних добутків:
+    кожне вікно отримується різницею двох префіксних сум, тож загальна
+    складність O(n) замість O(n * window). Перед підсумовуванням ряди
+    центруються глобальним середнім, що суттєво зменшує катастрофічне
+    скорочення. Дисперсія, не більша за похибку різниці префіксних сум
+    (window * eps від суми двох віднімуваних сум квадратів), вважається
+    нульовою: ряд, сталий у вікні, має нульові коваріації й кореляцію NaN,
+    як у numpy.corrcoef. Повертає середні, коваріаційні й кореляційні
+    матриці вікон.
+    """
+    x = asarray(x, float64)
+    if x.ndim == 1:
+        x = x[:, None]
+    shift = x.mean(0)
+    x = x - shift
+    sums = concatenate((zeros((1, x.shape[1])), cumsum(x, 0)))
+    products = cumsum(einsum('ni,nj->nij', x, x), 0)
+    products = concatenate((zeros((1,) + products.shape[1:]), products))
+    total = sums[window:] - sums[:-window]
+    squares = products[window:] - products[:-window]
+    mean = total / window
+    comoment = squares - einsum('ni,nj->nij', total, mean)
+    tiny = finfo(float64).eps * window * (
+        diagonal(products[window:], 0, 1, 2) + diagonal(products[:-window], 0, 1, 2)
+    )
+    comoment = _flatten(comoment, tiny)
+    return mean + shift, comoment / (window - ddof), _correlation(comoment)
+
+
+def decimate(y: ndarray, limit: int = 2000) -> ndarray:
+    """
+    Індекси точок для проріджування довгого ряду перед малюванням: ряд
+    ділиться на limit / 2 рівних відрізків, і з кожного беруться мінімум та
+    максимум, тож викиди, важливі для моніторингу, не губляться.
+    """
+    n = len(y)
+    if n <= limit:
+        return arange(n)
+    size = int(ceil(n / (limit // 2)))
+    buckets = -(-n // size)
+    padded = full((buckets * size,), nan)
+    padded[:n] = y
+    padded = padded.reshape(buckets, size)
+    offsets = arange(buckets) * size
+    low = nanargmin(padded, 1) + offsets
+    high = nanargmax(padded, 1) + offsets
+    return unique(concatenate((low, high, [n - 1])))
+
+
+def _flatten(comoment: ndarray, tiny: ndarray) -> ndarray:
+    """
+    Обнуляє рядки й стовпці (останні дві осі) змішаних моментів для рядів,
+    чия дисперсія не перевищує tiny.
+    """
+    flat = diagonal(comoment, 0, -2, -1) <= tiny
+    return where(flat[..., :, None] | flat[..., None, :], 0, comoment)
+
+
+def _correlation(comoment: ndarray) -> ndarray:
+    """
+    Кореляції з матриць змішаних моментів; для рядів з нульовою дисперсією -
+    NaN.
+    """
+    scale = sqrt(diagonal(comoment, 0, -2, -1))
+    with errstate(divide='ignore', invalid='ignore'):
+        return comoment / (scale[..., :, None] * scale[..., None, :])
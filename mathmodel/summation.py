@@ -1,4 +1,16 @@
-from numpy import array, sum as total
+from argparse import ArgumentParser
+from itertools import chain
+from json import dumps
+from math import fsum
+from platform import machine, python_version
+from timeit import default_timer
+from typing import Any, Callable, Dict, List
+from numpy import (
+    array, sum as total, einsum, vdot, dot, empty, float64, multiply, ndarray, dtype,
+    __version__ as numpy_version
+)
+from numpy.random import default_rng
+from tabulate import tabulate
 
 x = array(
     [
@@ -9,10 +21,205 @@ x = array(
         [21, 22, 23, 24, 25]
     ]
 )
-s = 0
-for r in x:
-    for c in r:
-        s += c * c
-print(s)
-print(sum(c * c for r in x for c in r))
-print(total(x * x))
+
+
+def main():
+    """
+    Початкова демонстрація: сума квадратів трьома способами.
+    """
+    print(loop(x))
+    print(generator(x))
+    print(product(x))
+
+
+def loop(v: ndarray) -> float:
+    """
+    Вкладений цикл Python по рядках і стовпцях (для векторів - по елементах).
+    """
+    s = 0
+    for r in v.reshape(-1, v.shape[-1]):
+        for c in r:
+            s += c * c
+    return s
+
+
+def generator(v: ndarray) -> float:
+    """
+    Генераторний вираз із вбудованою функцією sum.
+    """
+    return sum(c * c for r in v.reshape(-1, v.shape[-1]) for c in r)
+
+
+def product(v: ndarray) -> float:
+    """
+    numpy.sum від поелементного добутку: створює тимчасовий масив x * x.
+    """
+    return total(v * v)
+
+
+def einsummed(v: ndarray) -> float:
+    """
+    Згортка Ейнштейна без проміжного масиву.
+    """
+    return einsum('i,i->', v.ravel(), v.ravel())
+
+
+def dotted(v: ndarray) -> float:
+    """
+    Скалярний добуток вектора на себе через BLAS.
+    """
+    return vdot(v, v)
+
+
+def pairwise(v: ndarray, block: int = 1 << 16) -> float:
+    """
+    Поблочна сума: кожен блок згортається через BLAS, а часткові суми
+    додаються попарним (каскадним) підсумовуванням numpy, тож похибка росте
+    як O(log n) замість O(n).
+    """
+    v = v.ravel()
+    partials = array(
+        [dot(v[i:i + block], v[i:i + block]) for i in range(0, len(v), block)]
+    )
+    return total(partials)
+
+
+def inplace(v: ndarray, block: int = 1 << 16) -> float:
+    """
+    Квадрати обчислюються блоками в один заздалегідь виділений буфер, тож,
+    на відміну від product, не потрібен тимчасовий масив розміру вхідного.
+    """
+    v = v.ravel()
+    buffer, s = empty((min(block, len(v)),), v.dtype), v.dtype.type(0)
+    for i in range(0, len(v), block):
+        chunk = v[i:i + block]
+        multiply(chunk, chunk, out=buffer[:len(chunk)])
+        s += total(buffer[:len(chunk)])
+    return s
+
+
+# Стратегії підсумовування; перші дві - інтерпретовані цикли Python.
+strategies: Dict[str, Callable[[ndarray], float]] = {
+    'loop': loop,
+    'generator': generator,
+    'product': product,
+    'einsum': einsummed,
+    'vdot': dotted,
+    'pairwise': pairwise,
+    'inplace': inplace
+}
+slow = {'loop', 'generator'}
+
+
+def reference(v: ndarray, block: int = 1 << 20) -> float:
+    """
+    Точна (з коректним округленням) сума квадратів у float64 через math.fsum,
+    яка слугує еталоном для оцінки похибки.
+    """
+    v = v.ravel()
+    return fsum(
+        chain.from_iterable(
+            (v[i:i + block].astype(float64) ** 2).tolist()
+            for i in range(0, len(v), block)
+        )
+    )
+
+
+def benchmark(
+    sizes: List[int],
+    names: List[str],
+    types: List[str],
+    repeat: int = 3,
+    limit: int = 10 ** 6,
+    seed: int = 42
+) -> List[Dict[str, Any]]:
+    """
+    Вимірює найкращий час із repeat запусків кожної стратегії для кожного
+    розміру й типу даних. Вхідні дані - відтворювані (фіксоване зерно)
+    рівномірні числа з [0, 1). Цикли Python пропускаються для розмірів понад
+    limit, бо їх час зростає до годин. Разом із часом зберігається відносна
+    похибка результату відносно точної суми тих самих даних у цьому типі.
+    """
+    records = []
+    for size in sizes:
+        data = default_rng(seed).random(size)
+        for kind in types:
+            v = data.astype(kind, copy=False)
+            # Еталон рахується з уже приведених даних, тож похибка описує
+            # лише підсумовування, а не округлення входу до типу kind.
+            exact = reference(v)
+            for name in names:
+                if name in slow and size > limit:
+                    continue
+                best, result = float('inf'), 0.0
+                for _ in range(repeat):
+                    start = default_timer()
+                    result = float(strategies[name](v))
+                    best = min(best, default_timer() - start)
+                records.append(
+                    {
+                        'strategy': name,
+                        'dtype': dtype(kind).name,
+                        'size': size,
+                        'seconds': best,
+                        'throughput': size / best if best > 0 else None,
+                        'result': result,
+                        'error': abs(result - exact) / exact if exact else 0.0
+                    }
+                )
+    return records
+
+
+if __name__ == '__main__':
+    parser = ArgumentParser(description='Sum of squares strategies and benchmarks')
+    # Вмикає режим вимірювань замість простої демонстрації.
+    parser.add_argument('-b', action='store_true', help='run benchmarks')
+    # Розміри вхідних векторів.
+    parser.add_argument(
+        '-s',
+        type=int,
+        nargs='+',
+        default=[10, 1000, 10 ** 5, 10 ** 7],
+        help='vector sizes'
+    )
+    # Перелік стратегій, за замовчуванням - усі.
+    parser.add_argument(
+        '-m',
+        nargs='+',
+        default=list(strategies.keys()),
+        help=f'strategies (available ones: {", ".join(strategies.keys())})'
+    )
+    # Типи даних для порівняння точності й швидкості.
+    parser.add_argument('-t', nargs='+', default=['float64', 'float32'], help='dtypes')
+    # Кількість повторів кожного вимірювання.
+    parser.add_argument('-r', type=int, default=3, help='repeats')
+    # Файл для збереження результатів у форматі JSON.
+    parser.add_argument('-o', help='JSON output path')
+    args = parser.parse_args()
+    if not args.b:
+        main()
+    else:
+        records = benchmark(args.s, args.m, args.t, args.r)
+        print(
+            tabulate(
+                [
+                    [r['strategy'], r['dtype'], r['size'], r['seconds'], r['error']]
+                    for r in records
+                ],
+                headers=['strategy', 'dtype', 'size', 'seconds', 'error'],
+                tablefmt='psql'
+            )
+        )
+        if args.o:
+            with open(args.o, 'w') as stream:
+                stream.write(
+                    dumps(
+                        {
+                            'machine': machine(),
+                            'python': python_version(),
+                            'numpy': numpy_version,
+                            'records': records
+                        },
+                        indent=2
+                    )
+                )
@@ -0,0 +1,177 @@
+from hashlib import sha1
+from pathlib import Path
+from types import CodeType, ModuleType
+from typing import Any, Callable, Iterator, Optional, Set, Tuple, Union
+from numpy import ndarray, meshgrid, linspace, load, savez_compressed, empty, ones
+from mathmodel.caching import LRU
+
+Bounds = Tuple[Tuple[float, float], Tuple[float, float]]
+Resolution = Union[int, Tuple[int, int]]
+Grid = Tuple[ndarray, ndarray, ndarray]
+_cache_dir = Path(__file__).parent.parent / '.cache/surfaces'
+_memory = LRU(32)
+
+
+def sample(
+    f: Callable[[ndarray, ndarray], ndarray],
+    bounds: Bounds,
+    resolution: Resolution,
+    is_persistent: bool = True
+) -> Grid:
+    """
+    Обчислює значення функції на рівномірній сітці в заданих межах. Результат
+    запам'ятовується за ключем (функція, межі, роздільність) спочатку в
+    оперативному LRU-кеші, а потім - у стиснутому npz-файлі на диску, тому
+    повторний запуск графіка не перераховує поверхню. Ключ функції залежить
+    від її байткоду, констант, замикань і використаних глобальних значень,
+    тож редагування тіла функції чи зміна замкнених параметрів інвалідує кеш.
+    """
+    nx, ny = _pair(resolution)
+    key = _key(f, bounds, (nx, ny))
+    grid = _lookup(key, is_persistent)
+    if grid is None:
+        x, y = meshgrid(linspace(*bounds[0], nx), linspace(*bounds[1], ny))
+        grid = _store(key, (x, y, f(x, y)), is_persistent)
+    return grid
+
+
+def refine(
+    f: Callable[[ndarray, ndarray], ndarray],
+    bounds: Bounds,
+    resolution: Resolution,
+    levels: int = 3,
+    is_persistent: bool = True
+) -> Iterator[Grid]:
+    """
+    Прогресивне уточнення поверхні: спершу віддається груба сітка, далі на
+    кожному рівні роздільність зростає з n до 2n - 1 вузлів. Вузли
+    попереднього рівня є кожним другим вузлом наступного, тому їх значення
+    переносяться без повторного обчислення, а функція рахується лише в нових
+    точках. Генератор зручно поєднувати з FigureWidget у Jupyter, оновлюючи
+    трасу Surface після кожного рівня.
+    """
+    nx, ny = _pair(resolution)
+    grid = sample(f, bounds, (nx, ny), is_persistent)
+    yield grid
+    for _ in range(1, levels):
+        nx, ny = 2 * nx - 1, 2 * ny - 1
+        key = _key(f, bounds, (nx, ny))
+        fine = _lookup(key, is_persistent)
+        if fine is None:
+            x, y = meshgrid(linspace(*bounds[0], nx), linspace(*bounds[1], ny))
+            z, mask = empty(x.shape), ones(x.shape, bool)
+            z[::2, ::2], mask[::2, ::2] = grid[2], False
+            z[mask] = f(x[mask], y[mask])
+            fine = _store(key, (x, y, z), is_persistent)
+        grid = fine
+        yield grid
+
+
+def _lookup(key: str, is_persistent: bool) -> Optional[Grid]:
+    """
+    Шукає сітку спершу в пам'яті, а потім на диску.
+    """
+    grid = _memory.get(key)
+    path = _cache_dir / f'{key}.npz'
+    if grid is None and is_persistent and path.exists():
+        with load(path) as archive:
+            grid = archive['x'], archive['y'], archive['z']
+        _memory.put(key, grid)
+    return grid
+
+
+def _store(key: str, grid: Grid, is_persistent: bool) -> Grid:
+    """
+    Зберігає обчислену сітку в обидва рівні кешу.
+    """
+    _memory.put(key, grid)
+    if is_persistent:
+        _cache_dir.mkdir(parents=True, exist_ok=True)
+        savez_compressed(_cache_dir / f'{key}.npz', x=grid[0], y=grid[1], z=grid[2])
+    return grid
+
+
+def _pair(resolution: Resolution) -> Tuple[int, int]:
+    """
+    Приводить роздільність до пари (кількість вузлів за X, кількість за Y).
+    """
+    if isinstance(resolution, int):
+        return resolution, resolution
+    return int(resolution[0]), int(resolution[1])
+
+
+def _key(
+    f: Callable[[ndarray, ndarray], ndarray],
+    bounds: Bounds,
+    resolution: Tuple[int, int]
+) -> str:
+    """
+    Стабільний між запусками ідентифікатор сітки. Для звичайних функцій
+    Python враховуються модуль, кваліфіковане ім'я, байткод і константи, а
+    також вміст замикань і значення глобальних імен, на які посилається
+    функція (див. _fingerprint), для інших об'єктів (наприклад, ufunc) - їх
+    текстове представлення.
+    """
+    digest = sha1(
+        repr(
+            (
+                getattr(f, '__module__', None),
+                getattr(f, '__qualname__', repr(f)),
+                bounds,
+                resolution
+            )
+        ).encode()
+    )
+    _fingerprint(f, digest, set(), getattr(f, '__module__', None))
+    return digest.hexdigest()
+
+
+def _fingerprint(value: Any, digest: Any, seen: Set[int], module: Optional[str]):
+    """
+    Додає до хешу значення, від якого залежить результат функції. Для
+    функцій модуля module рекурсивно враховуються байткод (разом із
+    вкладеними lambda), вміст комірок замикання й значення глобальних імен
+    з co_names, тож lambda, що замикають різні константи, отримують різні
+    ключі. Функції інших модулів (бібліотечні) представлені модулем і
+    кваліфікованим ім'ям, модулі - назвою, масиви - байтами, решта - repr.
+    """
+    if id(value) in seen:
+        return
+    seen.add(id(value))
+    code = getattr(value, '__code__', None)
+    if isinstance(code, CodeType) and getattr(value, '__module__', None) == module:
+        _code(code, digest)
+        for cell in getattr(value, '__closure__', None) or ():
+            try:
+                contents = cell.cell_contents
+            except ValueError:
+                contents = None
+            _fingerprint(contents, digest, seen, module)
+        names = getattr(value, '__globals__', {})
+        for name in code.co_names:
+            if name in names:
+                digest.update(name.encode())
+                _fingerprint(names[name], digest, seen, module)
+    elif callable(value) and hasattr(value, '__qualname__'):
+        digest.update(repr((getattr(value, '__module__', None), value.__qualname__)).encode())
+    elif isinstance(value, ModuleType):
+        digest.update(value.__name__.encode())
+    elif isinstance(value, ndarray):
+        digest.update(repr((value.dtype.str, value.shape)).encode())
+        digest.update(value.tobytes())
+    else:
+        digest.update(repr(value).encode())
+
+
+def _code(code: CodeType, digest: Any):
+    """
+    Байткод, імена й константи об'єкта коду, зокрема вкладених функцій,
+    repr яких містить адресу в пам'яті.
+    """
+    digest.update(code.co_code)
+    digest.update(repr(code.co_names).encode())
+    for constant in code.co_consts:
+        if isinstance(constant, CodeType):
+            _code(constant, digest)
+        else:
+            digest.update(repr(constant).encode())
@@ -1,9 +1,16 @@
 from argparse import ArgumentParser
-from typing import Callable, Any, Tuple
-from numpy import ndarray, array, full, abs
+from typing import Callable, Any, Optional, Tuple, Union
+from numpy import (
+    ndarray, array, full, abs, linspace, concatenate, nonzero, isfinite, all as every,
+    histogram2d, log1p, repeat, errstate, empty
+)
 from plotly.subplots import make_subplots
-from plotly.graph_objs import Scatter3d
+from plotly.graph_objs import Scatter3d, Heatmap, Figure
 from scipy.integrate import solve_ivp
+from mathmodel.profiling import count, stage
+
+# Параметр сімейства: число або масив значень (вісь параметра).
+Parameter = Union[float, ndarray]
 
 
 def main(f: Callable[[Any, ndarray], ndarray]):
@@ -90,114 +97,216 @@ def solve_ivp_euler(
     y, dt = full((steps, len(y0)), y0), (span[1] - span[0]) / steps
     for i in range(1, steps):
         y[i] = y[i - 1] + dt * f(0, y[i - 1])
+    count('synergy.euler.iterations', steps - 1)
     return y.T
 
 
-def rossler(_, y: ndarray) -> ndarray:
+def bifurcation(
+    f: Callable[..., ndarray],
+    name: str,
+    values: ndarray,
+    y0: ndarray = array([-0.8, 0.8, 0.8]),
+    span: Tuple[float, float] = (0.0, 300.0),
+    transient: float = 150.0,
+    dt: float = 0.01,
+    section: Tuple[int, float] = (1, 0.0),
+    observed: int = 0
+) -> Tuple[ndarray, ndarray]:
+    """
+    Рушій біфуркаційних діаграм. Замість тисяч послідовних запусків
+    solve_ivp усі значення параметра name інтегруються одночасно: стан має
+    форму 3 x N, а права частина f обчислює всі N систем одним викликом
+    (параметри сімейств rossler і chua приймають масиви). Крок -
+    класичний метод Рунге-Кутта 4-го порядку зі сталим dt. Після
+    перехідного проміжку transient фіксуються перетини перерізу Пуанкаре
+    y[section[0]] = section[1] у напрямку зростання; точка перетину
+    знаходиться лінійною інтерполяцією між кроками, а в ній береться
+    координата observed. Траєкторії, що розбіглися, вилучаються.
+    Повертає значення параметра й спостережувані координати всіх
+    перетинів.
+    """
+    values = array(values, float)
+    index, level = section
+    y = repeat(array(y0, float)[:, None], len(values), 1)
+    members = array(range(len(values)))
+    parameters, points = [], []
+    steps = int((span[1] - span[0]) / dt)
+    start = int((transient - span[0]) / dt)
+
+    def field(state: ndarray) -> ndarray:
+        return f(0, state, **{name: values[members]})
+
+    with stage('synergy.bifurcation'), errstate(all='ignore'):
+        for step in range(steps):
+            k1 = field(y)
+            k2 = field(y + dt / 2 * k1)
+            k3 = field(y + dt / 2 * k2)
+            k4 = field(y + dt * k3)
+            following = y + dt / 6 * (k1 + 2 * k2 + 2 * k3 + k4)
+            if step >= start:
+                a, b = y[index] - level, following[index] - level
+                crossed = nonzero((a < 0) & (b >= 0))[0]
+                if len(crossed):
+                    fraction = a[crossed] / (a[crossed] - b[crossed])
+                    parameters.append(values[members[crossed]])
+                    points.append(
+                        y[observed, crossed] +
+                        fraction * (following[observed, crossed] - y[observed, crossed])
+                    )
+            y = following
+            finite = every(isfinite(y), axis=0)
+            if not finite.all():
+                y, members = y[:, finite], members[finite]
+                if len(members) == 0:
+                    break
+    count('synergy.bifurcation.steps', steps * len(values))
+    if not parameters:
+        return empty(0), empty(0)
+    return concatenate(parameters), concatenate(points)
+
+
+def diagram(
+    parameters: ndarray,
+    points: ndarray,
+    bins: Tuple[int, int] = (800, 600),
+    limits: Optional[Tuple[float, float]] = None
+) -> Figure:
+    """
+    Біфуркаційна діаграма як растр густини: перетини розкладаються в
+    гістограму 2D (параметр x спостережувана координата), і теплова карта
+    показує логарифм кількості перетинів у клітинці, тож мільйони точок не
+    перевантажують браузер, а часто відвідувані гілки лишаються помітними.
+    """
+    ranges = None
+    if limits is not None and len(parameters):
+        ranges = [[parameters.min(), parameters.max()], list(limits)]
+    counts, xs, ys = histogram2d(parameters, points, bins, ranges)
+    figure = Figure(
+        Heatmap(
+            x=(xs[1:] + xs[:-1]) / 2,
+            y=(ys[1:] + ys[:-1]) / 2,
+            z=log1p(counts.T),
+            colorscale='inferno',
+            showscale=False,
+            hoverinfo='skip'
+        )
+    )
+    figure.update_layout(margin={'t': 30, 'r': 30, 'b': 30, 'l': 30})
+    return figure
+
+
+def rossler(
+    _,
+    y: ndarray,
+    a: Parameter = 0.2,
+    b: Parameter = 0.2,
+    c: Parameter = 5.7,
+    d: Parameter = 0
+) -> ndarray:
     """
     Функція правих частинь рівнянь аттрактора Рьослера:
-    https://en.wikipedia.org/wiki/R%C3%B6ssler_attractor .
+    https://en.wikipedia.org/wiki/R%C3%B6ssler_attractor . Параметри
+    сімейства (x' = d - y - z, y' = x + ay, z' = b + z(x - c)) можуть бути
+    масивами: тоді y має форму 3 x N, і за один виклик обчислюються праві
+    частини N систем з різними параметрами.
     """
-    return array([-y[1] - y[2], y[0] + 0.2 * y[1], 0.2 + y[2] * (y[0] - 5.7)])
+    return array([d - y[1] - y[2], y[0] + a * y[1], b + y[2] * (y[0] - c)])
 
 
-def chua(_, y: ndarray) -> ndarray:
+def chua(
+    _,
+    y: ndarray,
+    alpha: Parameter = 9,
+    beta: Parameter = 14.29,
+    k: Parameter = 1,
+    m: Parameter = 0.71,
+    h: Parameter = 0.22,
+    e: Parameter = 1,
+    s: Parameter = 1,
+    q: Parameter = 0,
+    r: Parameter = 0
+) -> ndarray:
     """
     Ланцюг Чуа, за основу взято даний аттрактор для електричних кіл:
-    https://en.wikipedia.org/wiki/Chua%27s_circuit .
+    https://en.wikipedia.org/wiki/Chua%27s_circuit . Сімейство
+    x' = alpha(y - kx + mx + h(|x + e| - |x - e|)), y' = x - y + sz + q,
+    z' = r - beta y з параметрами-масивами, як і в rossler.
     """
     return array(
         [
-            9 * (y[1] - y[0] + 0.71 * y[0] + 0.22 * (abs(y[0] + 1) - abs(y[0] - 1))),
-            y[0] - y[1] + y[2],
-            -14.29 * y[1]
+            alpha * (y[1] - k * y[0] + m * y[0] + h * (abs(y[0] + e) - abs(y[0] - e))),
+            y[0] - y[1] + s * y[2] + q,
+            r - beta * y[1]
         ]
     )
 
 
-def ring(_, y: ndarray) -> ndarray:
+def ring(t, y: ndarray, **parameters: Parameter) -> ndarray:
     """
-    Фігура у вигляді майже замкненого кільця, похідна від ланцюга Чуа. 
+    Фігура у вигляді майже замкненого кільця, похідна від ланцюга Чуа.
     """
-    return array(
-        [
-            0.3 * (
-                y[1] -
-                y[0] +
-                0.0013 * y[0] +
-                0.09 * (abs(y[0] + 0.0012) - abs(y[0] - 0.0012))
-            ),
-            y[0] - y[1] + 3 * y[2] + 0.03,
-            -0.002 * y[1]
-        ]
+    return chua(
+        t,
+        y,
+        **{
+            'alpha': 0.3, 'beta': 0.002, 'm': 0.0013, 'h': 0.09, 'e': 0.0012,
+            's': 3, 'q': 0.03,
+            **parameters
+        }
     )
 
 
-def bowl(_, y: ndarray) -> ndarray:
+def bowl(t, y: ndarray, **parameters: Parameter) -> ndarray:
     """
     Мископодібний нащадок аттрактора Рьослера.
     """
-    return array([-y[1] - y[2], y[0] + 0.2 * y[1], 0.2 + y[2] * (y[0] - 1.7)])
+    return rossler(t, y, **{'c': 1.7, **parameters})
 
 
-def stripe(_, y: ndarray) -> ndarray:
+def stripe(t, y: ndarray, **parameters: Parameter) -> ndarray:
     """
     Замкнена стрічка, потомок Рьослера.
     """
-    return array([-y[1] - y[2], y[0] + 0.2 * y[1], 0.2 + y[2] * (y[0] - 0.7)])
+    return rossler(t, y, **{'c': 0.7, **parameters})
 
 
-def spiral(_, y: ndarray) -> ndarray:
+def spiral(t, y: ndarray, **parameters: Parameter) -> ndarray:
     """
     Спіральний вигляд аттрактора Рьослера.
     """
-    return array([-y[1] - y[2], y[0] + 0.2 * y[1], 10.2 + y[2] * (y[0] - 6)])
+    return rossler(t, y, **{'b': 10.2, 'c': 6, **parameters})
 
 
-def lasso(_, y: ndarray) -> ndarray:
+def lasso(t, y: ndarray, **parameters: Parameter) -> ndarray:
     """
     Ще один ласоподібний різновид Рьослера.
     """
-    return array([6 - y[1] - y[2], y[0] + 0.03 * y[1], 4.2 + y[2] * (y[0] - 3)])
+    return rossler(t, y, **{'a': 0.03, 'b': 4.2, 'c': 3, 'd': 6, **parameters})
 
 
-def signature(_, y: ndarray) -> ndarray:
+def signature(t, y: ndarray, **parameters: Parameter) -> ndarray:
     """
     Диск-і-підпис, представлення ланцюга Чуа.
     """
-    return array(
-        [
-            7 * (y[1] - y[0] + 0.71 * y[0] + 0.22 * (abs(y[0] + 1) - abs(y[0] - 1))),
-            y[0] - y[1] + y[2] - 0.002,
-            -16 * y[1] + 0.5
-        ]
-    )
+    return chua(t, y, **{'alpha': 7, 'beta': 16, 'q': -0.002, 'r': 0.5, **parameters})
 
 
-def disk(_, y: ndarray) -> ndarray:
+def disk(t, y: ndarray, **parameters: Parameter) -> ndarray:
     """
     Щільно спресований диск на основі Чуа.
     """
-    return array(
-        [
-            9 * (y[1] - y[0] + 0.1 * y[0] + 0.05 * (abs(y[0] + 1) - abs(y[0] - 1))),
-            y[0] - y[1] + y[2] - 0.002,
-            -16 * y[1] + 0.5
-        ]
+    return chua(
+        t,
+        y,
+        **{'beta': 16, 'm': 0.1, 'h': 0.05, 'q': -0.002, 'r': 0.5, **parameters}
     )
 
 
-def globe(_, y: ndarray) -> ndarray:
+def globe(t, y: ndarray, **parameters: Parameter) -> ndarray:
     """
     Вигнута глобула, потомок ланцюга Чуа.
     """
-    return array(
-        [
-            9 * (y[1] - 2 * y[0] + 0.8 * y[0] + 0.3 * (abs(y[0] + 1) - abs(y[0] - 1))),
-            y[0] - y[1] + y[2],
-            -14.29 * y[1]
-        ]
-    )
+    return chua(t, y, **{'k': 2, 'm': 0.8, 'h': 0.3, **parameters})
 
 
 if __name__ == '__main__':
@@ -221,8 +330,21 @@ if __name__ == '__main__':
         default='rossler',
         help=f'dynamic system name (available ones: {", ".join(fs.keys())})'
     )
+    # Біфуркаційна діаграма за параметром сімейства замість траєкторій:
+    # назва параметра, нижня й верхня межі.
+    parser.add_argument('-b', nargs=3, help='bifurcation parameter name, low and high')
+    # Кількість значень параметра на діаграмі.
+    parser.add_argument('-n', type=int, default=2000, help='parameter values count')
     args = parser.parse_args()
     if args.f not in fs:
         print('There\'re no functions with such a name')
+    elif args.b:
+        diagram(
+            *bifurcation(
+                fs[args.f],
+                args.b[0],
+                linspace(float(args.b[1]), float(args.b[2]), args.n)
+            )
+        ).show()
     else:
         main(fs[args.f])
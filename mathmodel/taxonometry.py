@@ -1,8 +1,8 @@
 from typing import Optional
 from numpy import linspace, sum, ndarray, max, argmin, array, append
-from plotly.figure_factory import create_dendrogram
 from plotly.graph_objects import Bar, Figure
 from sklearn.preprocessing import scale
+from mathmodel.clustering import linkage, dendrogram
 
 
 def main():
@@ -46,9 +46,8 @@ def main():
     figure.add_trace(Bar(name='Еталон', x=features, y=standard))
     figure.update_layout(margin={'t': 20, 'r': 20, 'b': 20, 'l': 20})
     figure.write_image('images/profiles.png', width=1200, height=600)
-    figure = create_dendrogram(  # Дендрограма відносно еталонного рішення.
-        append(companies, [standard], 0),
-        orientation='left',
+    figure = dendrogram(  # Дендрограма відносно еталонного рішення.
+        linkage(append(companies, [standard], 0)),
         labels=names + ['standard']
     )
     figure.update_layout(margin={'t': 20, 'r': 20, 'b': 20, 'l': 20})
@@ -0,0 +1,354 @@
+from argparse import ArgumentParser
+from gzip import compress
+from hashlib import sha1
+from json import loads, dumps
+from math import pi, log, tan, cos, radians, atan, sinh, degrees, floor
+from pathlib import Path
+from re import fullmatch
+from sqlite3 import connect
+from threading import Lock
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from numpy import array, ndarray, empty, rint, log as ln, tan as tg, radians as rad
+from shapely.geometry import shape, mapping
+from shapely.ops import clip_by_rect, transform
+from mathmodel.optimization import optimize
+
+# Шари в порядку накладання, як у gis.main.
+names = ('oblasts', 'cities', 'rivers', 'roads')
+# Роздільність координат тайла (як у Mapbox Vector Tiles) і запас обрізання
+# в одиницях тайла, аби товсті лінії на межах тайлів не переривались.
+extent, margin = 4096, 64
+_layers_dir = Path(__file__).parent.parent / 'layers'
+# Довжина градуса дуги екватора в метрах.
+_meters = 111320
+Level = Tuple[List[Tuple[str, Dict[str, Any], Any]], ndarray]
+_cache_path = Path(__file__).parent.parent / '.cache/tiles/layers.mbtiles'
+_page = '''<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<link rel="stylesheet" href="https://unpkg.com/leaflet@1.9.4/dist/leaflet.css">
+<script src="https://unpkg.com/leaflet@1.9.4/dist/leaflet.js"></script>
+<style>html, body, #map {height: 100%; margin: 0}</style>
+</head>
+<body>
+<div id="map"></div>
+<script>
+const styles = {
+  oblasts: ['#ebf2e7', '#b46198', 2],
+  cities: ['#a1a0a0', '#656464', 1],
+  rivers: ['#9fcee5', '#2a5eea', 1],
+  roads: [null, '#ffb732', 2]
+};
+const Vector = L.GridLayer.extend({
+  createTile(coords, done) {
+    const canvas = L.DomUtil.create('canvas');
+    const size = this.getTileSize();
+    canvas.width = size.x;
+    canvas.height = size.y;
+    fetch(`/${coords.z}/${coords.x}/${coords.y}.json`)
+      .then(r => r.ok ? r.json() : {layers: {}})
+      .then(tile => {
+        const c = canvas.getContext('2d'), k = size.x / tile.extent;
+        for (const [name, features] of Object.entries(tile.layers)) {
+          const [fill, line, width] = styles[name];
+          for (const f of features) {
+            const g = f.geometry, path = new Path2D();
+            const rings = g.type === 'LineString' ? [g.coordinates] :
+              g.type === 'MultiLineString' || g.type === 'Polygon' ?
+              g.coordinates : g.coordinates.flat();
+            for (const r of rings) {
+              r.forEach(([x, y], i) => i ? path.lineTo(x * k, y * k) :
+                path.moveTo(x * k, y * k));
+            }
+            if (fill && g.type.endsWith('Polygon')) {
+              c.fillStyle = fill;
+              c.fill(path, 'evenodd');
+            }
+            c.strokeStyle = line;
+            c.lineWidth = width;
+            c.stroke(path);
+          }
+        }
+        done(null, canvas);
+      });
+    return canvas;
+  }
+});
+const map = L.map('map').setView([48.1, 35.0], 7);
+new Vector({minZoom: %d, maxZoom: %d}).addTo(map);
+</script>
+</body>
+</html>
+'''
+
+
+class Tiles:
+    """
+    Нарізка шарів ГІС на тайли z/x/y у проекції Web Mercator. Для кожного
+    рівня масштабу геометрія один раз спрощується через
+    optimization.optimize з допуском у пів пікселя тайла 256x256, тож на
+    дрібних масштабах тайл містить у рази менше вершин, ніж вихідний шар.
+    Тайл - це стиснутий gzip JSON: об'єкти кожного шару обрізаються рамкою
+    тайла із запасом, а координати квантуються до цілих у межах [0, extent),
+    як у Mapbox Vector Tiles. Готові тайли зберігаються в одному SQLite-файлі
+    за схемою MBTiles, тож нарізка відбувається лише під час першого запиту
+    або попереднього заповнення (seed). Зміна будь-якого GeoJSON-файлу
+    змінює його хеш у метаданих і очищає сховище.
+    """
+    __slots__ = ['_path', '_zooms', '_bounds', '_connection', '_lock', '_levels']
+
+    def __init__(
+        self,
+        path: Path = _cache_path,
+        zooms: Tuple[int, int] = (5, 12)
+    ):
+        """
+        Конструктор класу. Приймає шлях до MBTiles-файлу й діапазон рівнів.
+        """
+        self._path = Path(path)
+        self._zooms = zooms
+        self._levels: Dict[int, Level] = {}
+        self._lock = Lock()
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+        self._connection = connect(str(self._path), check_same_thread=False)
+        self._connection.executescript(
+            '''
+            CREATE TABLE IF NOT EXISTS metadata (name TEXT PRIMARY KEY, value TEXT);
+            CREATE TABLE IF NOT EXISTS tiles (
+                zoom_level INTEGER,
+                tile_column INTEGER,
+                tile_row INTEGER,
+                tile_data BLOB,
+                PRIMARY KEY (zoom_level, tile_column, tile_row)
+            );
+            '''
+        )
+        digest = sha1(
+            b''.join((_layers_dir / f'{n}.geojson').read_bytes() for n in names)
+        ).hexdigest()
+        metadata = dict(self._connection.execute('SELECT name, value FROM metadata'))
+        if metadata.get('source') != digest:
+            self._connection.execute('DELETE FROM tiles')
+        self._bounds = self._extent()
+        self._connection.executemany(
+            'INSERT OR REPLACE INTO metadata VALUES (?, ?)',
+            [
+                ('name', 'layers'),
+                ('format', 'json'),
+                ('bounds', ','.join(map(str, self._bounds))),
+                ('minzoom', str(zooms[0])),
+                ('maxzoom', str(zooms[1])),
+                ('source', digest)
+            ]
+        )
+        self._connection.commit()
+
+    def get(self, z: int, x: int, y: int) -> Optional[bytes]:
+        """
+        Повертає стиснутий тайл або None, якщо він поза рівнями чи межами
+        даних. Відсутній у сховищі тайл нарізається й одразу записується.
+        """
+        if not self._zooms[0] <= z <= self._zooms[1]:
+            return None
+        west, south, east, north = bounds(z, x, y)
+        if (
+            east < self._bounds[0] or west > self._bounds[2] or
+            north < self._bounds[1] or south > self._bounds[3]
+        ):
+            return None
+        with self._lock:
+            row = self._connection.execute(
+                'SELECT tile_data FROM tiles WHERE zoom_level = ? AND '
+                'tile_column = ? AND tile_row = ?',
+                (z, x, (1 << z) - 1 - y)
+            ).fetchone()
+        if row is not None:
+            return row[0]
+        data = compress(dumps(self.cut(z, x, y), separators=(',', ':')).encode())
+        with self._lock:
+            self._connection.execute(
+                'INSERT OR REPLACE INTO tiles VALUES (?, ?, ?, ?)',
+                (z, x, (1 << z) - 1 - y, data)
+            )
+            self._connection.commit()
+        return data
+
+    def cut(self, z: int, x: int, y: int) -> Dict[str, Any]:
+        """
+        Нарізає один тайл: обирає об'єкти рівня, чиї рамки перетинають рамку
+        тайла із запасом, обрізає їх і переводить у координати тайла.
+        """
+        features, boxes = self._level(z)
+        west, south, east, north = bounds(z, x, y)
+        dx, dy = (east - west) * margin / extent, (north - south) * margin / extent
+        west, south, east, north = west - dx, south - dy, east + dx, north + dy
+        hits = (
+            (boxes[:, 0] <= east) & (boxes[:, 2] >= west) &
+            (boxes[:, 1] <= north) & (boxes[:, 3] >= south)
+        ).nonzero()[0]
+        layers: Dict[str, List[Dict[str, Any]]] = {}
+        for i in hits:
+            name, properties, geometry = features[i]
+            clipped = clip_by_rect(geometry, west, south, east, north)
+            # Вироджене обрізання може дати колекцію різнотипних частин.
+            parts = (
+                clipped.geoms
+                if clipped.geom_type == 'GeometryCollection' else
+                [clipped]
+            )
+            layers.setdefault(name, []).extend(
+                {
+                    'type': 'Feature',
+                    'properties': properties,
+                    'geometry': _integers(
+                        mapping(transform(lambda u, v: _project(u, v, z, x, y), p))
+                    )
+                }
+                for p in parts
+                if not p.is_empty
+            )
+        return {'extent': extent, 'layers': layers}
+
+    def seed(self, zooms: Optional[Sequence[int]] = None) -> int:
+        """
+        Попередньо нарізає всі тайли, що покривають межі даних, на вказаних
+        рівнях. Повертає кількість тайлів.
+        """
+        n = 0
+        for z in zooms or range(self._zooms[0], self._zooms[1] + 1):
+            x0, y0 = tile(self._bounds[0], self._bounds[3], z)
+            x1, y1 = tile(self._bounds[2], self._bounds[1], z)
+            for x in range(x0, x1 + 1):
+                for y in range(y0, y1 + 1):
+                    n += self.get(z, x, y) is not None
+        return n
+
+    def handle(self, path: str) -> Optional[Tuple[bytes, Dict[str, str]]]:
+        """
+        Обробник запитів для serving.serve: /z/x/y.json віддає тайл, а корінь -
+        сторінку з картою Leaflet, що малює тайли на canvas.
+        """
+        if path in {'/', '/index.html'}:
+            page = _page % self._zooms
+            return page.encode(), {'Content-Type': 'text/html; charset=utf-8'}
+        match = fullmatch(r'/(\d+)/(\d+)/(\d+)\.json', path)
+        data = None if match is None else self.get(*map(int, match.groups()))
+        if data is None:
+            return None
+        return data, {'Content-Type': 'application/json', 'Content-Encoding': 'gzip'}
+
+    def _level(self, z: int) -> Level:
+        """
+        Спрощені для рівня z об'єкти всіх шарів разом із їх рамками.
+        """
+        if z not in self._levels:
+            tolerance = 180 / (256 << z)
+            # Пороги площ відкидання дрібних частин і отворів не перевищують
+            # площі пікселя рівня (сторона - допуск у метрах на екваторі),
+            # тож на великих масштабах дрібні острови й отвори лишаються.
+            pixel = (tolerance * _meters) ** 2
+            features = []
+            for name in names:
+                collection = loads(
+                    (_layers_dir / f'{name}.geojson').read_text(encoding='utf-8')
+                )
+                for f in collection['features']:
+                    geometry = optimize(
+                        f['geometry'],
+                        tolerance,
+                        min(pixel, 5e6),
+                        min(pixel, 1e6)
+                    )
+                    if not geometry['coordinates']:
+                        continue
+                    properties = {
+                        k: v
+                        for k, v in f['properties'].items()
+                        if k == 'name'
+                    }
+                    features.append((name, properties, shape(geometry)))
+            boxes = empty((len(features), 4))
+            for i, (_, _, geometry) in enumerate(features):
+                boxes[i] = geometry.bounds
+            with self._lock:
+                self._levels[z] = features, boxes
+        return self._levels[z]
+
+    def _extent(self) -> Tuple[float, float, float, float]:
+        """
+        Спільна рамка всіх шарів у градусах.
+        """
+        _, boxes = self._level(self._zooms[0])
+        return (
+            boxes[:, 0].min(),
+            boxes[:, 1].min(),
+            boxes[:, 2].max(),
+            boxes[:, 3].max()
+        )
+
+
+def tile(lon: float, lat: float, z: int) -> Tuple[int, int]:
+    """
+    Номер тайла рівня z, що містить точку.
+    """
+    n = 1 << z
+    x = (lon + 180) / 360 * n
+    y = (1 - log(tan(radians(lat)) + 1 / cos(radians(lat))) / pi) / 2 * n
+    return min(max(floor(x), 0), n - 1), min(max(floor(y), 0), n - 1)
+
+
+def bounds(z: int, x: int, y: int) -> Tuple[float, float, float, float]:
+    """
+    Рамка тайла в градусах: захід, південь, схід, північ.
+    """
+    n = 1 << z
+    return (
+        x / n * 360 - 180,
+        degrees(atan(sinh(pi * (1 - 2 * (y + 1) / n)))),
+        (x + 1) / n * 360 - 180,
+        degrees(atan(sinh(pi * (1 - 2 * y / n))))
+    )
+
+
+def _integers(geometry: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Замінює дійсні координати (shapely завжди зберігає double) цілими, аби
+    JSON тайла не містив зайвих '.0'.
+    """
+    def cast(c: Any) -> Any:
+        return int(c) if isinstance(c, float) else [cast(v) for v in c]
+
+    return {**geometry, 'coordinates': cast(geometry['coordinates'])}
+
+
+def _project(lon: Any, lat: Any, z: int, x: int, y: int) -> Tuple[list, list]:
+    """
+    Переводить координати в градусах у квантовані координати тайла.
+    """
+    n = 1 << z
+    u = array(lon, float)
+    v = rad(array(lat, float))
+    u = ((u + 180) / 360 * n - x) * extent
+    v = ((1 - ln(tg(v / 2 + pi / 4)) / pi) / 2 * n - y) * extent
+    return rint(u).astype(int).tolist(), rint(v).astype(int).tolist()
+
+
+if __name__ == '__main__':
+    parser = ArgumentParser(description='Vector tiles of the GIS layers')
+    # Попередньо нарізає всі тайли замість запуску сервера.
+    parser.add_argument('-s', action='store_true', help='seed tiles and exit')
+    # Мінімальний і максимальний рівні масштабу.
+    parser.add_argument('-z', type=int, nargs=2, default=[5, 12], help='zoom range')
+    # Шлях до MBTiles-сховища.
+    parser.add_argument('-f', default=str(_cache_path), help='MBTiles path')
+    # Адреса й порт HTTP-сервера.
+    parser.add_argument('-H', default='127.0.0.1', help='host')
+    parser.add_argument('-p', type=int, default=8000, help='port')
+    args = parser.parse_args()
+    tiles = Tiles(Path(args.f), tuple(args.z))
+    if args.s:
+        print(f'{tiles.seed()} tiles')
+    else:
+        from mathmodel.serving import serve
+        serve(tiles.handle, args.H, args.p)
@@ -0,0 +1,226 @@
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence
+from numpy import (
+    ndarray, arange, asarray, unique, bincount, minimum, maximum, column_stack,
+    concatenate, cumsum, diff, argmin, roll, nonzero, ones, zeros, empty, int64
+)
+from shapely.geometry import LineString
+from mathmodel.geodesy import flatten
+
+
+class Topology(NamedTuple):
+    """
+    Спільне зберігання меж у стилі TopoJSON: arcs - ламані (масиви точок
+    N x 2), а кільця багатокутників - списки посилань на них. Посилання ~i
+    (тобто -i - 1) означає i-ту дугу, пройдену у зворотному напрямку.
+    Геометрії, що не є багатокутниками, зберігаються як є.
+    """
+    arcs: List[ndarray]
+    geometries: List[Dict[str, Any]]
+
+
+def build(geometries: Sequence[Dict[str, Any]]) -> Topology:
+    """
+    Розбиває всі кільця на дуги між вузлами й усуває дублікати. Точки
+    ототожнюються за точним збігом координат через numpy.unique. Вузол - це
+    точка, що має в різних кільцях різні пари сусідів, тобто місце, де
+    спільна межа розходиться. Кільця без вузлів стають замкненими дугами,
+    поверненими до найменшої точки, тож однакові кільця різних геометрій теж
+    зберігаються один раз. Дуга, що збігається з уже знайденою у
+    зворотному порядку, отримує посилання ~i.
+    """
+    rings = [r for g in geometries for p in _polygons(g) for r in p]
+    coordinates, offsets = flatten(rings)
+    if len(coordinates) == 0:
+        return Topology([], list(geometries))
+    points, ids = unique(coordinates, axis=0, return_inverse=True)
+    ids = ids.ravel()
+    junctions = _junctions(ids, offsets, len(points))
+    arcs: List[ndarray] = []
+    index: Dict[bytes, int] = {}
+    references = iter(
+        [
+            _cut(ids[offsets[i]:offsets[i + 1] - 1], junctions, arcs, index)
+            for i in range(len(rings))
+        ]
+    )
+    return Topology(
+        [points[a] for a in arcs],
+        [
+            g
+            if not _polygons(g) else
+            {
+                'type': g['type'],
+                'arcs': (
+                    [next(references) for _ in g['coordinates']]
+                    if g['type'] == 'Polygon' else
+                    [[next(references) for _ in p] for p in g['coordinates']]
+                )
+            }
+            for g in geometries
+        ]
+    )
+
+
+def simplify(topology: Topology, tolerance: float) -> Topology:
+    """
+    Спрощує кожну дугу рівно один раз алгоритмом Дугласа-Пекера, що
+    зберігає кінці, тож вузли лишаються на місці, а спільна межа сусідів -
+    однаковою для обох, без щілин і накладань.
+    """
+    return topology._replace(
+        arcs=[
+            a
+            if len(a) < 3 else
+            asarray(LineString(a).simplify(tolerance, preserve_topology=False).coords)
+            for a in topology.arcs
+        ]
+    )
+
+
+def geometries(
+    topology: Topology,
+    fallback: Optional[Topology] = None
+) -> List[Dict[str, Any]]:
+    """
+    Відновлює GeoJSON-геометрії з посилань на дуги. Кільце, що після
+    спрощення вироджується (менше ніж 4 точки), береться з fallback (як
+    правило, неспрощеної топології), а якщо і там воно вироджене,
+    відкидається; багатокутник без зовнішнього кільця відкидається цілком.
+    """
+    def ring(references: List[int]) -> Optional[List[List[float]]]:
+        result = _ring(topology.arcs, references)
+        if len(result) < 4 and fallback is not None:
+            result = _ring(fallback.arcs, references)
+        return None if len(result) < 4 else result.tolist()
+
+    def polygon(references: List[List[int]]) -> List[List[List[float]]]:
+        rings = [ring(r) for r in references]
+        return [] if not rings or rings[0] is None else [r for r in rings if r]
+
+    results = []
+    for g in topology.geometries:
+        if 'arcs' not in g:
+            results.append(g)
+        elif g['type'] == 'Polygon':
+            results.append({'type': 'Polygon', 'coordinates': polygon(g['arcs'])})
+        else:
+            results.append(
+                {
+                    'type': 'MultiPolygon',
+                    'coordinates': [p for p in map(polygon, g['arcs']) if p]
+                }
+            )
+    return results
+
+
+def encode(topology: Topology, layers: Sequence[str]) -> Dict[str, Any]:
+    """
+    Об'єкт TopoJSON (без квантування координат) з багатокутниками
+    топології: layers[i] - назва колекції, до якої належить i-та геометрія.
+    """
+    objects: Dict[str, Dict[str, Any]] = {}
+    for name, g in zip(layers, topology.geometries):
+        if 'arcs' not in g:
+            continue
+        objects.setdefault(
+            name,
+            {'type': 'GeometryCollection', 'geometries': []}
+        )['geometries'].append(g)
+    return {
+        'type': 'Topology',
+        'arcs': [a.tolist() for a in topology.arcs],
+        'objects': objects
+    }
+
+
+def _polygons(geometry: Dict[str, Any]) -> List[Any]:
+    if geometry['type'] == 'Polygon':
+        return [geometry['coordinates']]
+    if geometry['type'] == 'MultiPolygon':
+        return geometry['coordinates']
+    return []
+
+
+def _junctions(ids: ndarray, offsets: ndarray, n: int) -> ndarray:
+    """
+    Ознаки вузлів для всіх унікальних точок. Сусіди кожного входження
+    беруться циклічно без замикальної точки кільця, а пара сусідів
+    впорядковується, тож прохід спільної межі в будь-якому напрямку дає ту
+    саму пару.
+    """
+    lengths = maximum(diff(offsets) - 1, 0)
+    kept = ones(len(ids), bool)
+    kept[(offsets[1:] - 1)[lengths > 0]] = False
+    current = ids[kept]
+    starts = zeros(len(lengths), int64)
+    cumsum(lengths[:-1], out=starts[1:])
+    ends = starts + lengths - 1
+    filled = lengths > 0
+    following = arange(1, len(current) + 1)
+    preceding = arange(-1, len(current) - 1)
+    following[ends[filled]] = starts[filled]
+    preceding[starts[filled]] = ends[filled]
+    a, b = current[preceding], current[following]
+    pairs = unique(column_stack((current, minimum(a, b), maximum(a, b))), axis=0)
+    return bincount(pairs[:, 0], minlength=n) > 1
+
+
+def _cut(
+    ring: ndarray,
+    junctions: ndarray,
+    arcs: List[ndarray],
+    index: Dict[bytes, int]
+) -> List[int]:
+    """
+    Розрізає кільце (ідентифікатори точок без замикальної) на дуги між
+    вузлами й повертає посилання на них.
+    """
+    if len(ring) == 0:
+        return []
+    cuts = nonzero(junctions[ring])[0]
+    if len(cuts) == 0:
+        return [_reference(_closed(ring), _closed(ring[::-1]), arcs, index)]
+    ring = roll(ring, -cuts[0])
+    closed = concatenate((ring, ring[:1]))
+    bounds = (cuts - cuts[0]).tolist() + [len(ring)]
+    return [
+        _reference(closed[s:e + 1], closed[s:e + 1][::-1], arcs, index)
+        for s, e in zip(bounds[:-1], bounds[1:])
+    ]
+
+
+def _closed(ring: ndarray) -> ndarray:
+    """
+    Замкнена дуга, повернена так, щоб починатись із найменшої точки.
+    """
+    ring = roll(ring, -int(argmin(ring)))
+    return concatenate((ring, ring[:1]))
+
+
+def _reference(
+    forward: ndarray,
+    backward: ndarray,
+    arcs: List[ndarray],
+    index: Dict[bytes, int]
+) -> int:
+    """
+    Посилання на дугу: наявну в прямому або зворотному напрямку чи нову.
+    """
+    key = forward.tobytes()
+    if key in index:
+        return index[key]
+    if backward.tobytes() in index:
+        return ~index[backward.tobytes()]
+    index[key] = len(arcs)
+    arcs.append(forward)
+    return index[key]
+
+
+def _ring(arcs: List[ndarray], references: List[int]) -> ndarray:
+    """
+    Склеює кільце з дуг, відкидаючи спільну точку на кожному стику.
+    """
+    parts = [arcs[r] if r >= 0 else arcs[~r][::-1] for r in references]
+    if not parts:
+        return empty((0, 2))
+    return concatenate([parts[0]] + [p[1:] for p in parts[1:]])
@@ -1,8 +1,18 @@
+from __future__ import annotations
 from random import uniform
-from typing import Tuple
-from numpy import full, sqrt, ndarray, vstack, array
-from scipy.spatial import Delaunay
-from shapely.geometry import Polygon, Point, LineString
+from typing import Optional, Tuple, Iterable, TYPE_CHECKING
+from numpy import (
+    full, sqrt, ndarray, vstack, array, arange, column_stack, zeros, roll, errstate,
+    count_nonzero, nonzero, linspace, minimum, maximum, unique, clip, searchsorted,
+    ceil, repeat, cumsum, stack, concatenate, isin, insert
+)
+from numpy.linalg import norm
+from mathmodel.profiling import timed, stage, count
+
+# Важкі залежності імпортуються всередині функцій, аби модуль, а з ним і
+# консольні команди, завантажувались швидко.
+if TYPE_CHECKING:
+    from shapely.geometry import Polygon
 
 
 def inflate(
@@ -18,42 +28,160 @@ def inflate(
     return x * k, y * k, z * k
 
 
+@timed('utils.mesh')
 def mesh(
     shape: ndarray,
     r: float = 50,
-    z: float = 20
+    z: float = 20,
+    tolerance: Optional[float] = None
 ) -> Tuple[ndarray, ndarray, ndarray, ndarray, ndarray, ndarray]:
     """
     Функція, яка заповнює заданий контур випадковими точками й проектує
-    отриману поверхню на сферу з допомогою триангуляції Делоне.
+    отриману поверхню на сферу з допомогою триангуляції Делоне. Якщо задано
+    tolerance, замість випадкових точок виконується адаптивне згущення (див.
+    refine).
     """
+    if tolerance is not None:
+        return refine(shape, r, z, tolerance)
+    from scipy.spatial import Delaunay
+    from shapely.geometry import Polygon, Point
     polygon = Polygon(shape)
     min_x, min_y, max_x, max_y = polygon.bounds
-    delaunay = Delaunay(
-        vstack(
+    with stage('utils.mesh.sampling'):
+        interior = [
+            [p.x, p.y]
+            for p in
             (
-                shape,
-                [
-                    [p.x, p.y]
-                    for p in
-                    (
-                        Point(uniform(min_x, max_x), uniform(min_y, max_y))
-                        for _ in range(1000)
-                    )
-                    if p.within(polygon)
-                ]
+                Point(uniform(min_x, max_x), uniform(min_y, max_y))
+                for _ in range(1000)
             )
+            if p.within(polygon)
+        ]
+    with stage('utils.mesh.delaunay'):
+        delaunay = Delaunay(vstack((shape, interior)))
+    x, y, z = inflate(delaunay.points, r=r, z=z)
+    with stage('utils.mesh.filter'):
+        ijk = array(
+            [
+                t
+                for t in delaunay.simplices
+                if _is_included(delaunay.points[t], polygon)  # noqa
+            ]
         )
+    count('utils.mesh.triangles', len(ijk))
+    return x, y, z, ijk[:, 0], ijk[:, 1], ijk[:, 2]
+
+
+@timed('utils.refine')
+def refine(
+    shape: ndarray,
+    r: float = 50,
+    z: float = 20,
+    tolerance: float = 1e-4,
+    iterations: int = 16
+) -> Tuple[ndarray, ndarray, ndarray, ndarray, ndarray, ndarray]:
+    """
+    Адаптивна тріангуляція контуру для проекції на сферу. Допустима хордова
+    похибка - відстань між пласким трикутником і поверхнею - задається
+    відносно радіуса: tolerance * r. Спершу контур згущується так, щоб
+    прогин кожного ребра L^2 / 8r не перевищував допуску, далі тріангуляція
+    Делоне уточнюється ітеративно: у кожен трикутник, чия похибка (в центрі
+    ваги й серединах ребер) завелика, вставляється його центр ваги. Тож
+    маленькі міста лишаються тріангуляцією самого контуру, а великі області
+    отримують рівно стільки внутрішніх точок, скільки потребує кривизна.
+    Кожна тріангуляція робиться узгодженою з контуром (див. _conform), тож
+    відкидання зовнішніх трикутників не лишає дір біля межі.
+    """
+    limit = tolerance * r
+    ring = shape[:-1] if len(shape) > 1 and (shape[0] == shape[-1]).all() else shape
+    points = _densify(ring, r, z, limit)
+    contour = arange(len(points))
+    with stage('utils.refine.delaunay'):
+        for _ in range(iterations):
+            points, contour, simplices = _conform(points, contour)
+            triangles = points[simplices]
+            # Середини ребер зсуваються до центру ваги: середина ребра
+            # контуру лежить точно на межі, де тест парності неоднозначний.
+            centers = triangles.mean(1)
+            mask = inside(centers, [ring])
+            for i in range(3):
+                middles = (triangles[:, i] + triangles[:, (i + 1) % 3]) / 2
+                mask &= inside(middles + (centers - middles) * 1e-3, [ring])
+            simplices, triangles = simplices[mask], triangles[mask]
+            split = _chord(triangles, r, z) > limit
+            if not split.any():
+                break
+            points = vstack((points, triangles[split].mean(1)))
+    x, y, h = inflate(points, r=r, z=z)
+    count('utils.mesh.triangles', len(simplices))
+    return x, y, h, simplices[:, 0], simplices[:, 1], simplices[:, 2]
+
+
+def _densify(ring: ndarray, r: float, z: float, limit: float) -> ndarray:
+    """
+    Вставляє в ребра кільця рівномірно розташовані точки, аби довжина
+    кожного спроектованого на сферу ребра була не більша за sqrt(8r *
+    limit), тобто його прогин - не більший за limit.
+    """
+    following = roll(ring, -1, 0)
+    start, end = column_stack(inflate(ring, r, z)), column_stack(inflate(following, r, z))
+    pieces = maximum(ceil(norm(end - start, axis=1) / sqrt(8 * r * limit)), 1).astype(int)
+    edges = repeat(arange(len(ring)), pieces)
+    steps = arange(len(edges)) - repeat(cumsum(pieces) - pieces, pieces)
+    t = (steps / pieces[edges])[:, None]
+    return ring[edges] * (1 - t) + following[edges] * t
+
+
+def _conform(
+    points: ndarray,
+    contour: ndarray,
+    rounds: int = 64
+) -> Tuple[ndarray, ndarray, ndarray]:
+    """
+    Тріангуляція Делоне, в якій присутні всі відрізки контуру (номери точок
+    контуру за порядком обходу): у кожен відрізок, якого немає серед ребер
+    тріангуляції, вставляється його середина, і так доти, доки відсутніх
+    відрізків не лишиться. Повертає точки, контур і трикутники.
+    """
+    from scipy.spatial import Delaunay
+    simplices = Delaunay(points).simplices
+    for _ in range(rounds):
+        n = len(points)
+        edges = concatenate([simplices[:, [i, (i + 1) % 3]] for i in range(3)])
+        edges.sort(1)
+        following = roll(contour, -1)
+        segments = column_stack((contour, following))
+        segments.sort(1)
+        missing = ~isin(segments[:, 0] * n + segments[:, 1], edges[:, 0] * n + edges[:, 1])
+        if not missing.any():
+            break
+        middles = (points[contour[missing]] + points[following[missing]]) / 2
+        numbers = arange(n, n + len(middles))
+        # Середина вставляється в контур одразу після початку свого відрізка.
+        contour = insert(contour, nonzero(missing)[0] + 1, numbers)
+        points = vstack((points, middles))
+        simplices = Delaunay(points).simplices
+    return points, contour, simplices
+
+
+def _chord(triangles: ndarray, r: float, z: float) -> ndarray:
+    """
+    Хордова похибка трикутників m x 3 x 2: найбільша відстань між точкою
+    пласкої грані (у центрі ваги й серединах ребер) і проекцією відповідної
+    точки площини на сферу.
+    """
+    m = len(triangles)
+    vertices = stack(
+        [column_stack(inflate(triangles[:, i], r, z)) for i in range(3)],
+        1
     )
-    x, y, z = inflate(delaunay.points, r=r, z=z)
-    ijk = array(
-        [
-            t
-            for t in delaunay.simplices
-            if _is_included(delaunay.points[t], polygon)  # noqa
-        ]
+    weights = array(
+        [[1 / 3, 1 / 3, 1 / 3], [0.5, 0.5, 0], [0, 0.5, 0.5], [0.5, 0, 0.5]]
     )
-    return x, y, z, ijk[:, 0], ijk[:, 1], ijk[:, 2]
+    flat = (weights @ triangles).reshape(-1, 2)
+    chords = (weights @ vertices).reshape(-1, 3)
+    errors = norm(column_stack(inflate(flat, r, z)) - chords, axis=1)
+    return errors.reshape(m, len(weights)).max(1)
 
 
 def _is_included(triangle: ndarray, polygon: Polygon) -> bool:
@@ -61,6 +189,7 @@ def _is_included(triangle: ndarray, polygon: Polygon) -> bool:
     Ця невеличка утилітна функція необхідна для визначення того, чиварто
     включати даний трикутник у базовий полігон і результуючу теселяцію.
     """
+    from shapely.geometry import LineString
     return all(
         polygon.contains(ls) or polygon.exterior.contains(ls)
         for ls in
@@ -69,3 +198,93 @@ def _is_included(triangle: ndarray, polygon: Polygon) -> bool:
             for i in range(len(triangle))
         )
     )
+
+
+def cone_faces(n: int) -> ndarray:
+    """
+    Індекси трикутних граней бічної поверхні конуса з n вершинами основи, де
+    вершина конуса має індекс n. Кожна грань - пара сусідніх вершин основи й
+    спільний пік.
+    """
+    i = arange(n)
+    return column_stack((i, (i + 1) % n, full((n,), n)))
+
+
+def cylinder_faces(n: int) -> ndarray:
+    """
+    Індекси граней бічної поверхні циліндра, чиї n вершин чергуються в
+    порядку "нижня точка ребра - верхня точка". Кожні три послідовні вершини
+    утворюють трикутник, тож кожна прямокутна грань складається з двох.
+    """
+    i = arange(n)
+    return column_stack((i, (i + 1) % n, (i + 2) % n))
+
+
+def dual_cone_faces(n: int) -> ndarray:
+    """
+    Індекси граней подвоєного конуса: дві копії основи по n вершин і спільна
+    вершина з індексом 2n.
+    """
+    i = arange(2 * n)
+    return column_stack((i, (i + 1) % n + i // n * n, full((2 * n,), 2 * n)))
+
+
+def inside(points: ndarray, rings: Iterable[ndarray], block: int = 1 << 22) -> ndarray:
+    """
+    Векторизований тест належності точок багатокутнику за правилом парності
+    перетинів: з кожної точки проводиться горизонтальний промінь і рахується,
+    скільки ребер кілець він перетинає. Оскільки враховуються всі кільця
+    одразу, порожнини й окремі частини мультиполігона обробляються без
+    додаткової логіки. Кільце перевіряється лише для точок, чий промінь
+    узагалі може перетнути його обмежувальну рамку, а сама рамка ділиться на
+    горизонтальні смуги, тож кожна точка порівнюється тільки з ребрами своєї
+    смуги. Матриця "точки x ребра" обчислюється блоками не більше block
+    елементів, аби обмежити пам'ять.
+    """
+    result = zeros((len(points),), bool)
+    for ring in rings:
+        low, high = ring.min(0), ring.max(0)
+        candidates = nonzero(
+            (points[:, 1] >= low[1]) &
+            (points[:, 1] <= high[1]) &
+            (points[:, 0] <= high[0])
+        )[0]
+        if candidates.size == 0:
+            continue
+        a, b = ring, roll(ring, -1, 0)
+        count = max(int(sqrt(len(ring))), 1)
+        bands = linspace(low[1], high[1], count + 1)
+        first = _band(bands, minimum(a[:, 1], b[:, 1]))
+        last = _band(bands, maximum(a[:, 1], b[:, 1]))
+        groups = _band(bands, points[candidates, 1])
+        for q in unique(groups):
+            members = candidates[groups == q]
+            edges = nonzero((first <= q) & (last >= q))[0]
+            result[members] ^= _parity(points[members], a[edges], b[edges], block)
+    return result
+
+
+def _band(bands: ndarray, y: ndarray) -> ndarray:
+    """
+    Номер горизонтальної смуги для кожної ординати.
+    """
+    return clip(searchsorted(bands, y, 'right') - 1, 0, len(bands) - 2)
+
+
+def _parity(points: ndarray, a: ndarray, b: ndarray, block: int) -> ndarray:
+    """
+    Парність кількості перетинів горизонтальних променів із ребрами ab.
+    """
+    x, y = points[:, 0:1], points[:, 1:2]
+    parity = zeros((len(points),), bool)
+    step = max(block // max(len(points), 1), 1)
+    for s in range(0, len(a), step):
+        ax, ay = a[s:s + step, 0], a[s:s + step, 1]
+        bx, by = b[s:s + step, 0], b[s:s + step, 1]
+        with errstate(divide='ignore', invalid='ignore'):
+            crosses = (
+                ((ay > y) != (by > y)) &
+                (x < (bx - ax) * (y - ay) / (by - ay) + ax)
+            )
+        parity ^= count_nonzero(crosses, 1) % 2 == 1
+    return parity
@@ -0,0 +1,24 @@
+from concurrent.futures import ThreadPoolExecutor
+from mathmodel import profiling
+from mathmodel.profiling import Traced, absorb, count, timed
+
+
+@timed('tests.work')
+def work(n: int) -> int:
+    count('tests.items', n)
+    return n * 2
+
+
+def test_traced_in_threads(monkeypatch):
+    """
+    У пулі потоків обгортка не вимикає профілювання й не губить таймінги.
+    """
+    monkeypatch.setattr(profiling, '_enabled', True)
+    monkeypatch.setattr(profiling, '_timings', type(profiling._timings)(lambda: [0, 0.0]))
+    monkeypatch.setattr(profiling, '_counters', type(profiling._counters)(int))
+    with ThreadPoolExecutor(4) as pool:
+        results = [absorb(p) for p in pool.map(Traced(work), range(10))]
+    assert results == [n * 2 for n in range(10)]
+    assert profiling._enabled
+    assert profiling._timings['tests.work'][0] == 10
+    assert profiling._counters['tests.items'] == 45
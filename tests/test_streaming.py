@@ -0,0 +1,52 @@
+from numpy import column_stack, corrcoef, isnan
+from numpy.random import default_rng
+from mathmodel.streaming import Rolling, rolling
+
+
+def test_rolling_quiet_after_loud():
+    """
+    Тихий режим після гучного: кореляції вікон другої половини не NaN і
+    збігаються з numpy.corrcoef.
+    """
+    rng = default_rng(0)
+    n, window = 10 ** 6, 50
+    x = rng.normal(size=(n, 2))
+    x[:, 1] += 0.8 * x[:, 0]
+    x[n // 2:] *= 1e-3
+    _, _, correlations = rolling(x, window)
+    assert not isnan(correlations[n // 2:, 0, 1]).any()
+    for start in range(n // 2, n - window, 49999):
+        expected = corrcoef(x[start:start + window].T)[0, 1]
+        assert abs(correlations[start, 0, 1] - expected) < 1e-4
+
+
+def test_rolling_constant_window():
+    rng = default_rng(1)
+    x = rng.normal(size=(2000, 2))
+    x[1000:1100, 0] = 7.0
+    _, covariances, correlations = rolling(x, 50)
+    assert isnan(correlations[1000:1051, 0, 1]).all()
+    assert (covariances[1000:1051, 0, 1] == 0).all()
+
+
+def test_live_correlation_large_mean():
+    """
+    Ряд із великим середнім і малим розкидом не вважається сталим.
+    """
+    rng = default_rng(2)
+    x = column_stack((1000 + 1e-3 * rng.normal(size=20000), rng.normal(size=20000)))
+    x[:, 1] += 1000 * (x[:, 0] - 1000)
+    monitor = Rolling(10000)
+    for sample in x:
+        monitor.push(sample)
+    assert abs(monitor.corr()[0, 1] - corrcoef(x[-10000:].T)[0, 1]) < 1e-9
+
+
+def test_live_correlation_constant_window():
+    rng = default_rng(3)
+    monitor = Rolling(100)
+    for sample in rng.normal(size=(300, 2)):
+        monitor.push(sample)
+    for value in rng.normal(size=100):
+        monitor.push([1000.0, value])
+    assert isnan(monitor.corr()[0, 1])
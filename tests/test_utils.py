@@ -0,0 +1,28 @@
+from numpy import column_stack
+from shapely.geometry import Polygon
+from mathmodel.layers import Layer
+from mathmodel.utils import refine
+
+
+def test_refine_covers_polygons():
+    """
+    Трикутники адаптивної тріангуляції покривають кожен багатокутник шарів
+    без дір: їх сумарна площа на площині збігається з площею контуру.
+    """
+    for name in ('oblasts', 'cities', 'rivers'):
+        layer = Layer(name)
+        for feature in layer._features():
+            for is_polygon, points in layer._flatten3d(feature['geometry']):
+                if not is_polygon:
+                    continue
+                x, y, h, i, j, k = refine(points, layer._r, layer._z, 1e-7)
+                # Обернене до inflate перетворення: h = z * k.
+                scale = h / layer._z
+                flat = column_stack((x / scale, y / scale))
+                a, b, c = flat[i], flat[j], flat[k]
+                area = abs(
+                    (b[:, 0] - a[:, 0]) * (c[:, 1] - a[:, 1]) -
+                    (b[:, 1] - a[:, 1]) * (c[:, 0] - a[:, 0])
+                ).sum() / 2
+                exact = Polygon(points).area
+                assert abs(area - exact) <= 1e-6 * exact, feature['properties'].get('name')